@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.dependencies import get_sx
 from app.lifecycle import SentienceX
+from dialogue.policy import ChatOutput
 
 
 router = APIRouter()
@@ -84,14 +87,36 @@ def _handle_admin_command(sx: SentienceX, text: str) -> ChatResponse:
     return _admin_reply("Unknown admin command. Type 'help'.", {"mode": "admin", "admin": {"unknown": True}})
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(req: Request, body: ChatRequest, resp: Response, sx: SentienceX = Depends(get_sx)) -> ChatResponse:
+def _set_admin_mode(sx: SentienceX, active: bool) -> None:
+    # Runs serialized with chat turns, so the shared events flag never changes
+    # while a turn is in flight.
+    if active:
+        # The last exchange's deferred writes still publish as a user turn.
+        sx.policy.flush_deferred()
+    sx.events.enabled = not active
+
+
+def _user_turn(sx: SentienceX, message: str, client_meta: Dict[str, Any]) -> ChatOutput:
+    _set_admin_mode(sx, False)
+    return sx.policy.handle_user_message(message, client_meta=client_meta)
+
+
+async def _check_rate_limit(req: Request) -> None:
     limiter = getattr(req.app.state, "rate_limiter", None)
     if limiter is not None:
         ok = await limiter.allow(req)
         if not ok:
             raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
+
+def _sse(name: str, data: Dict[str, Any]) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(req: Request, body: ChatRequest, resp: Response, sx: SentienceX = Depends(get_sx)) -> ChatResponse:
+    await _check_rate_limit(req)
+
     mgr = getattr(req.app.state, "admin_manager", None)
     admin_sid = req.cookies.get("sx_admin")
     admin_active = bool(mgr and admin_sid and mgr.verify_session(admin_sid))
@@ -107,7 +132,7 @@ async def chat(req: Request, body: ChatRequest, resp: Response, sx: SentienceX =
             if mgr and admin_sid:
                 mgr.revoke_session(admin_sid)
             resp.delete_cookie("sx_admin")
-            sx.events.enabled = True
+            await sx.runner.run(_set_admin_mode, sx, False)
             return ChatResponse(
                 reply="Admin mode exited.",
                 tone="normal",
@@ -126,7 +151,7 @@ async def chat(req: Request, body: ChatRequest, resp: Response, sx: SentienceX =
             )
         sid = mgr.create_session(ttl_sec=15)
         resp.set_cookie("sx_admin", sid, httponly=True, samesite="strict")
-        sx.events.enabled = False
+        await sx.runner.run(_set_admin_mode, sx, True)
         return ChatResponse(
             reply="Admin mode enabled.",
             tone="normal",
@@ -141,7 +166,7 @@ async def chat(req: Request, body: ChatRequest, resp: Response, sx: SentienceX =
             if mgr and admin_sid:
                 mgr.revoke_session(admin_sid)
             resp.delete_cookie("sx_admin")
-            sx.events.enabled = True
+            await sx.runner.run(_set_admin_mode, sx, False)
             return ChatResponse(
                 reply="Admin mode exited.",
                 tone="normal",
@@ -149,12 +174,50 @@ async def chat(req: Request, body: ChatRequest, resp: Response, sx: SentienceX =
                 brevity="micro",
                 meta={"mode": "user", "admin": {"exited": True}},
             )
-        sx.events.enabled = False
-        return _handle_admin_command(sx, s)
+        await sx.runner.run(_set_admin_mode, sx, True)
+        # Not serialized with chat turns: `training run` can take minutes.
+        return await sx.runner.run(_handle_admin_command, sx, s, serialize=False)
 
     # Normal user chat
-    sx.events.enabled = True
-    out = sx.policy.handle_user_message(body.message, client_meta=body.client or {})
+    out = await sx.runner.run(_user_turn, sx, body.message, body.client or {})
     out_meta = dict(out.meta or {})
     out_meta.setdefault("mode", "user")
     return ChatResponse(reply=out.reply, tone=out.tone, template_id=out.template_id, brevity=out.brevity, meta=out_meta)
+
+
+@router.post("/chat/stream")
+async def chat_stream(req: Request, body: ChatRequest, sx: SentienceX = Depends(get_sx)) -> StreamingResponse:
+    """
+    User chat as server-sent events: `reply` as soon as the text is shaped,
+    then `meta` (inference/retrieval), then `persisted` once the exchange is
+    written to memory. Pipeline failures after the stream opened arrive as
+    `error`. Admin commands stay on `POST /chat`, which manages the session
+    cookie.
+    """
+    await _check_rate_limit(req)
+    mgr = getattr(req.app.state, "admin_manager", None)
+    admin_sid = req.cookies.get("sx_admin")
+    if body.message.strip().lower().startswith("admin:") or (mgr and admin_sid and mgr.verify_session(admin_sid)):
+        raise HTTPException(status_code=409, detail="Admin commands go through POST /chat")
+
+    async def gen():
+        # Open the stream while the turn waits for the pipeline.
+        yield ": accepted\n\n"
+        try:
+            out = await sx.runner.run(_user_turn, sx, body.message, body.client or {})
+        except Exception as e:
+            yield _sse("error", {"error": type(e).__name__})
+            return
+        yield _sse("reply", {"reply": out.reply, "tone": out.tone, "template_id": out.template_id, "brevity": out.brevity})
+        meta = dict(out.meta or {})
+        meta.setdefault("mode", "user")
+        yield _sse("meta", meta)
+        ok = True
+        if out.recorded is not None:
+            try:
+                await asyncio.wrap_future(out.recorded)
+            except Exception:
+                ok = False
+        yield _sse("persisted", {"ok": ok})
+
+    return StreamingResponse(gen(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
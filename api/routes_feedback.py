@@ -23,7 +23,14 @@ class FeedbackRequest(BaseModel):
 @router.post("/feedback")
 async def feedback(body: FeedbackRequest, sx: SentienceX = Depends(get_sx)) -> Dict[str, Any]:
     payload = body.model_dump()
-    sx.memory.add_feedback({"kind": "explicit", **payload})
-    sx.updater.apply_explicit_feedback(payload)
+
+    def apply() -> None:
+        # Feedback is about the last reply; let its bookkeeping land first.
+        sx.policy.flush_deferred()
+        sx.memory.add_feedback({"kind": "explicit", **payload})
+        sx.updater.apply_explicit_feedback(payload)
+
+    # Learning state is shared with the chat pipeline; apply between turns.
+    await sx.runner.run(apply)
     return {"ok": True}
 
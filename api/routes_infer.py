@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.dependencies import get_sx
+from app.lifecycle import SentienceX
+from security.dependencies import require_admin
+
+
+router = APIRouter(prefix="/infer", tags=["infer"])
+
+
+class InferBatchRequest(BaseModel):
+    texts: List[str] = Field(default_factory=list, description="Texts to analyse, in order.")
+    turns: bool = Field(default=False, description="Also re-score every stored user turn from turns.jsonl.")
+    batch_size: int = Field(default=256, ge=1, le=4096, description="Texts scored per matrix product.")
+
+
+def _inputs(body: InferBatchRequest, sx: SentienceX) -> Iterator[Tuple[Dict[str, Any], str]]:
+    for i, text in enumerate(body.texts):
+        yield {"index": i}, text
+    if body.turns:
+        for t in sx.memory.iter_turns(role="user"):
+            yield {"turn_id": t.turn_id, "ts": t.ts}, t.text
+
+
+@router.post("/batch")
+async def infer_batch(body: InferBatchRequest, _: None = Depends(require_admin), sx: SentienceX = Depends(get_sx)) -> StreamingResponse:
+    if not body.texts and not body.turns:
+        raise HTTPException(status_code=400, detail="Nothing to infer")
+
+    def gen() -> Iterator[str]:
+        # Sync generator: Starlette iterates it in the threadpool, one NDJSON line per text.
+        it = _inputs(body, sx)
+        while True:
+            chunk = list(islice(it, body.batch_size))
+            if not chunk:
+                break
+            states = sx.infer_batch([text for _, text in chunk])
+            for (ref, _), inf in zip(chunk, states):
+                yield json.dumps({**ref, "normalized": inf.normalized, "inference": inf.to_meta()}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
@@ -13,7 +13,12 @@ router = APIRouter(prefix="/session", tags=["session"])
 
 @router.get("/resume")
 async def resume(n: int = Query(default=24, ge=1, le=120), sx: SentienceX = Depends(get_sx)) -> Dict[str, Any]:
-    turns = list(sx.memory.stm.iter())[-int(n) :]
+    def recent() -> list:
+        # Include the last exchange even if its write is still queued.
+        sx.policy.flush_deferred()
+        return list(sx.memory.stm.iter())[-int(n) :]
+
+    turns = await sx.runner.run(recent)
     return {
         "turns": [{"turn_id": t.turn_id, "ts": t.ts, "role": t.role, "text": t.text, "meta": t.meta} for t in turns],
         "last_user": next(({"turn_id": t.turn_id, "text": t.text} for t in reversed(turns) if t.role == "user"), None),
@@ -29,15 +29,24 @@ class Settings(BaseSettings):
     training_nightly: bool = Field(default=False)
     training_nightly_hour: int = Field(default=3)
     training_nightly_minute: int = Field(default=15)
+    training_hash_buckets: int = Field(default=64)
+    training_hash_seed: int = Field(default=0)
 
     stm_turns: int = Field(default=18)
+    index_half_life_days: float = Field(default=180.0)
+    index_scan_segments: int = Field(default=0)
+    index_unload_after_s: float = Field(default=900.0)
+    wal_fsync_interval_s: float = Field(default=1.0)
     max_reply_chars: int = Field(default=800)
+    chat_workers: int = Field(default=2)
+    parallel_stages: bool = Field(default=False)
 
     proactive_min_turn_gap: int = Field(default=6)
     proactive_min_hours_gap: int = Field(default=12)
 
     distress_hidden_threshold: float = Field(default=0.62)
     threat_threshold: float = Field(default=0.70)
+    safety_latency_budget_ms: float = Field(default=25.0)
 
     templates_dir_name: str = Field(default="templates")
     lexicons_dir_name: str = Field(default="lexicons")
@@ -3,17 +3,19 @@ from __future__ import annotations
 import time
 import datetime as _dt
 from dataclasses import dataclass
+from typing import List, Sequence
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.config import Settings
 from cognition.inference_state import InferenceState
 from dialogue.policy import DialoguePolicy
+from dialogue.runner import PipelineRunner
 from learning.online_update import OnlineUpdater
 from locale_pack.loader import LocalePack
 from logging.stream import EventBus
 from memory.persistence import MemoryStore
-from monitoring.governor import ResourceGovernor
+from monitoring.governor import Budget, ResourceGovernor
 from monitoring.metrics import Metrics
 from monitoring.resources import ResourceMonitor
 from scheduler.retrain import register_jobs
@@ -28,6 +30,7 @@ class SentienceX:
     locale: LocalePack
     memory: MemoryStore
     policy: DialoguePolicy
+    runner: PipelineRunner
     updater: OnlineUpdater
     metrics: Metrics
     resources: ResourceMonitor
@@ -40,24 +43,41 @@ class SentienceX:
     def infer(self, text: str) -> InferenceState:
         return InferenceState.from_text(self.locale, text)
 
+    def infer_batch(self, texts: Sequence[str]) -> List[InferenceState]:
+        return InferenceState.from_texts(self.locale, texts)
+
 
 def startup_system(settings: Settings) -> SentienceX:
     started_at = time.time()
 
     events = EventBus()
     locale = LocalePack.load(settings.locale)
-    metrics = Metrics()
+    metrics = Metrics(safety_budget_ms=settings.safety_latency_budget_ms)
     resources = ResourceMonitor()
-    governor = ResourceGovernor(resources)
-    memory = MemoryStore.open(settings.data_dir, locale=locale, stm_turns=settings.stm_turns, events=events)
+    governor = ResourceGovernor(resources, user_budget=Budget(scan_segments=settings.index_scan_segments or None))
+    memory = MemoryStore.open(
+        settings.data_dir,
+        locale=locale,
+        stm_turns=settings.stm_turns,
+        events=events,
+        index_half_life_days=settings.index_half_life_days,
+        index_unload_after_s=settings.index_unload_after_s,
+        wal_fsync_interval_s=settings.wal_fsync_interval_s,
+    )
     updater = OnlineUpdater(store=memory, events=events)
     policy = DialoguePolicy(settings=settings, locale=locale, memory=memory, metrics=metrics, updater=updater, events=events)
     policy.set_governor(governor)
+    runner = PipelineRunner(metrics=metrics, workers=settings.chat_workers)
     tts = TTSEngine(locale=locale)
 
     training = None
     if settings.training_enabled:
-        cfg = TrainingConfig(train_dir=settings.training_train_dir, data_dir=settings.data_dir)
+        cfg = TrainingConfig(
+            train_dir=settings.training_train_dir,
+            data_dir=settings.data_dir,
+            hash_buckets=settings.training_hash_buckets,
+            hash_seed=settings.training_hash_seed,
+        )
         training = TrainingOrchestrator(locale=locale, cfg=cfg)
 
     scheduler = AsyncIOScheduler()
@@ -94,6 +114,7 @@ def startup_system(settings: Settings) -> SentienceX:
         locale=locale,
         memory=memory,
         policy=policy,
+        runner=runner,
         updater=updater,
         metrics=metrics,
         resources=resources,
@@ -108,4 +129,6 @@ def startup_system(settings: Settings) -> SentienceX:
 async def shutdown_system(sx: SentienceX) -> None:
     sx.events.publish("system.shutdown", {})
     sx.scheduler.shutdown(wait=False)
+    sx.runner.close()
+    sx.policy.close()
     sx.memory.close()
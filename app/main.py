@@ -4,6 +4,7 @@ from fastapi import FastAPI
 
 from api.routes_chat import router as chat_router
 from api.routes_feedback import router as feedback_router
+from api.routes_infer import router as infer_router
 from api.routes_logs import router as logs_router
 from api.routes_metrics import router as metrics_router
 from api.routes_tts import router as tts_router
@@ -43,6 +44,7 @@ def create_app() -> FastAPI:
     app.include_router(health_router)
     app.include_router(chat_router)
     app.include_router(feedback_router)
+    app.include_router(infer_router)
     app.include_router(user_router)
     app.include_router(session_router)
     app.include_router(metrics_router)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import heapq
 import re
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from nlp.segmenter import contains_phrase
 
@@ -15,6 +16,76 @@ class Claim:
     confidence: float
 
 
+class KnownFacts:
+    """
+    Long-term claims keyed by (key, value), indexed by key. Contradiction
+    checks only ever compare a new claim with facts under the same key, so
+    lookups here cost O(1) per claim instead of a scan over every fact.
+    Iterates in insertion order, like the list it replaces.
+    """
+
+    def __init__(self, claims: Iterable[Claim] = ()):
+        self._facts: Dict[Tuple[str, str], Claim] = {}
+        self._by_key: Dict[str, Dict[str, Claim]] = {}
+        # Per key, a max-heap of (-confidence, value) over positive facts;
+        # entries that no longer match the fact are dropped lazily.
+        self._positive: Dict[str, List[Tuple[float, str]]] = {}
+        for c in claims:
+            self.put(c)
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def __iter__(self) -> Iterator[Claim]:
+        return iter(self._facts.values())
+
+    def get(self, key: str, value: str) -> Optional[Claim]:
+        return self._facts.get((key, value))
+
+    def put(self, c: Claim) -> None:
+        prev = self._facts.get((c.key, c.value))
+        self._facts[(c.key, c.value)] = c
+        values = self._by_key.setdefault(c.key, {})
+        values[c.value] = c
+        if c.polarity == +1 and (prev is None or prev.polarity != +1 or prev.confidence != c.confidence):
+            heap = self._positive.setdefault(c.key, [])
+            heapq.heappush(heap, (-c.confidence, c.value))
+            if len(heap) > 2 * len(values) + 8:
+                heap[:] = [(-f.confidence, v) for v, f in values.items() if f.polarity == +1]
+                heapq.heapify(heap)
+
+    def remove(self, key: str, value: str) -> None:
+        if self._facts.pop((key, value), None) is None:
+            return
+        values = self._by_key[key]
+        del values[value]
+        if not values:
+            del self._by_key[key]
+            self._positive.pop(key, None)
+
+    def best_positive(self, key: str, exclude: str) -> float:
+        """Highest confidence among positive facts under `key` with a value other than `exclude` (0 if none)."""
+        heap = self._positive.get(key)
+        if not heap:
+            return 0.0
+        values = self._by_key.get(key, {})
+        held: List[Tuple[float, str]] = []
+        best = 0.0
+        while heap:
+            neg, value = heap[0]
+            f = values.get(value)
+            if f is None or f.polarity != +1 or f.confidence != -neg:
+                heapq.heappop(heap)  # stale
+            elif value == exclude:
+                held.append(heapq.heappop(heap))
+            else:
+                best = -neg
+                break
+        for e in held:
+            heapq.heappush(heap, e)
+        return best
+
+
 _SPACE_RE = re.compile(r"\s+")
 
 
@@ -94,24 +165,21 @@ class ContradictionResult:
 
 
 def contradiction_score(new_claims: Iterable[Claim], known_facts: Iterable[Claim]) -> ContradictionResult:
-    known = list(known_facts)
+    known = known_facts if isinstance(known_facts, KnownFacts) else KnownFacts(known_facts)
     best: Tuple[float, Optional[str], str] = (0.0, None, "")
 
     for nc in new_claims:
-        for kf in known:
-            if nc.key != kf.key:
-                continue
-            # Direct polarity clash on same value or same key with "do_it"
-            if nc.value == kf.value and nc.polarity != kf.polarity:
-                s = min(1.0, 0.55 + 0.45 * min(nc.confidence, kf.confidence))
-                if s > best[0]:
-                    best = (s, nc.key, "polarity_flip_same_value")
-            elif nc.key in {"i_am", "i_have", "i_like"} and nc.polarity == +1 and kf.polarity == +1 and nc.value != kf.value:
-                # Non-exclusive contradictions: keep gentle (people change).
-                s = 0.25 * min(nc.confidence, kf.confidence)
-                if s > best[0]:
-                    best = (s, nc.key, "different_value_same_key")
+        # Direct polarity clash on same value or same key with "do_it"
+        kf = known.get(nc.key, nc.value)
+        if kf is not None and nc.polarity != kf.polarity:
+            s = min(1.0, 0.55 + 0.45 * min(nc.confidence, kf.confidence))
+            if s > best[0]:
+                best = (s, nc.key, "polarity_flip_same_value")
+        if nc.key in {"i_am", "i_have", "i_like"} and nc.polarity == +1:
+            # Non-exclusive contradictions: keep gentle (people change).
+            s = 0.25 * min(nc.confidence, known.best_positive(nc.key, exclude=nc.value))
+            if s > best[0]:
+                best = (s, nc.key, "different_value_same_key")
 
     score, key, note = best
     return ContradictionResult(score=score, contradictory=score >= 0.60, key=key, note=note)
-
@@ -3,9 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from locale_pack.loader import LocalePack
-from nlp.features import extract_features
+from nlp.features import FeatureBundle, make_bundle
 from cognition.learned import hidden_priors
 
+# Named features read below; the inference feature plan must cover them.
+HIDDEN_FEATURES = ("pos_hits", "neg_hits", "distress_hits", "masking_hits", "minimizer_hits", "hedging_hits", "ellipses")
+
 
 @dataclass(frozen=True)
 class HiddenEmotion:
@@ -14,7 +17,11 @@ class HiddenEmotion:
 
 
 def infer_hidden_distress(locale: LocalePack, text: str) -> HiddenEmotion:
-    feats = extract_features(locale, text)
+    return hidden_distress_from_bundle(make_bundle(locale, text))
+
+
+def hidden_distress_from_bundle(bundle: FeatureBundle) -> HiddenEmotion:
+    feats = bundle.named
     reasons: list[str] = []
 
     pos = feats.get("pos_hits", 0.0)
@@ -1,19 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from cognition.contradiction import Claim, ContradictionResult, contradiction_score, extract_claims
-from cognition.hidden_emotion import HiddenEmotion, infer_hidden_distress
-from cognition.masking_detector import MaskingResult, detect_masking
+from cognition.hidden_emotion import HIDDEN_FEATURES, HiddenEmotion, hidden_distress_from_bundle
+from cognition.masking_detector import MASKING_FEATURES, MaskingResult, masking_from_bundle
 from locale_pack.loader import LocalePack
-from nlp.normalizer import Normalizer
+from nlp.feature_space import FeaturePlan
+from nlp.features import FeatureBundle, make_bundles, rehash_bundle
 from nlp.sarcasm import SarcasmModel, SarcasmResult
 from nlp.sentiment import SentimentModel, SentimentResult
 from nlp.sentence_splitter import SentenceSplitter
 from nlp.threat import ThreatModel, ThreatResult
 from nlp.intent import IntentModel, IntentResult
+from nlp.multihead import HEAD_FILES, MultiHeadClassifier
+from style.extractor import STYLE_FEATURES
 
 
 def _models_dir() -> Path:
@@ -26,7 +29,7 @@ _MTIMES: Dict[str, float] = {}
 
 def _models_mtime(md: Path) -> float:
     mt = 0.0
-    for fn in ("sentiment_weights.json", "intent_weights.json", "sarcasm_weights.json", "threat_weights.json"):
+    for fn in HEAD_FILES.values():
         p = md / fn
         if p.exists():
             mt = max(mt, p.stat().st_mtime)
@@ -50,6 +53,38 @@ def _get_models() -> tuple[SentimentModel, IntentModel, SarcasmModel, ThreatMode
     return models
 
 
+def _get_fused() -> Tuple[Optional[MultiHeadClassifier], FeaturePlan]:
+    """
+    The four task models stacked into one multi-head matrix, plus the feature
+    plan they need, rebuilt whenever `_get_models` reloads. The fused model is
+    None while the heads disagree on the hash space.
+    """
+    models = _get_models()
+    cached = _CACHED.get("models.fused")
+    if cached is not None and cached[0] is models:  # type: ignore[index]
+        return cached[1], cached[2]  # type: ignore[index]
+    sentiment_m, intent_m, sarcasm_m, threat_m = models
+    classifiers = [sentiment_m.classifier, intent_m.classifier, sarcasm_m.classifier, threat_m.classifier]
+    try:
+        fused: Optional[MultiHeadClassifier] = MultiHeadClassifier(
+            {
+                "sentiment": sentiment_m.classifier,
+                "intent": intent_m.classifier,
+                "sarcasm": sarcasm_m.classifier,
+                "threat": threat_m.classifier,
+            }
+        )
+        used = fused.used_features()
+    except ValueError:
+        fused = None
+        used = [name for clf in classifiers for name in clf.used_features()]
+    # Features nothing reads are never computed: groups with no non-zero weight
+    # in any head and no cognition/style consumer drop out of extraction.
+    plan = FeaturePlan.for_features([*used, *HIDDEN_FEATURES, *MASKING_FEATURES, *STYLE_FEATURES])
+    _CACHED["models.fused"] = (models, fused, plan)
+    return fused, plan
+
+
 @dataclass(frozen=True)
 class InferenceState:
     text: str
@@ -62,38 +97,91 @@ class InferenceState:
     hidden: HiddenEmotion
     claims: list[Claim]
     contradiction: Optional[ContradictionResult]
+    bundle: FeatureBundle
 
     @staticmethod
-    def from_text(locale: LocalePack, text: str, known_facts: Optional[list[Claim]] = None) -> "InferenceState":
-        normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
-        normalized = normalizer.apply(text)
+    def from_text(locale: LocalePack, text: str, known_facts: Optional[Iterable[Claim]] = None) -> "InferenceState":
+        return InferenceState.from_texts(locale, [text], known_facts=known_facts)[0]
+
+    @staticmethod
+    def from_texts(locale: LocalePack, texts: Sequence[str], known_facts: Optional[Iterable[Claim]] = None) -> List["InferenceState"]:
+        """
+        Analyse a batch of texts: the segmenter is built once per batch (the
+        normalizer once per locale pack), and all four heads are scored for the
+        whole batch in one matrix product.
+        """
+        normalizer = locale.normalizer
+        normalized = [normalizer.apply(t) for t in texts]
 
         splitter = SentenceSplitter(locale.abbreviations)
-        _ = splitter.split(normalized)  # kept for future features; validates localization logic
+        for n in normalized:
+            _ = splitter.split(n)  # kept for future features; validates localization logic
 
+        # Segmentation, lexicon scans and hashing happen once per text; every
+        # consumer below reads from the same bundle.
         sentiment_m, intent_m, sarcasm_m, threat_m = _get_models()
-        sentiment = sentiment_m.infer(locale, normalized)
-        intent = intent_m.infer(locale, normalized)
-        sarcasm = sarcasm_m.infer(locale, normalized)
-        threat = threat_m.infer(locale, normalized)
-
-        masking = detect_masking(locale, normalized)
-        hidden = infer_hidden_distress(locale, normalized)
-        claims = extract_claims(normalized)
-
-        contradiction = None
-        if known_facts:
-            contradiction = contradiction_score(claims, known_facts)
-
-        return InferenceState(
-            text=text,
-            normalized=normalized,
-            sentiment=sentiment,
-            intent=intent,
-            sarcasm=sarcasm,
-            threat=threat,
-            masking=masking,
-            hidden=hidden,
-            claims=claims,
-            contradiction=contradiction,
-        )
+        fused, plan = _get_fused()
+        heads: List[Tuple[SentimentResult, IntentResult, SarcasmResult, ThreatResult]] = []
+        if fused is not None:
+            bundles = make_bundles(locale, normalized, fused.hash_space, plan)
+            for bundle, preds in zip(bundles, fused.predict_all_batch([b.vec for b in bundles])):
+                heads.append(
+                    (
+                        sentiment_m.infer_bundle(bundle, preds["sentiment"]),
+                        intent_m.infer_bundle(bundle, preds["intent"]),
+                        sarcasm_m.infer_bundle(bundle, preds["sarcasm"]),
+                        threat_m.infer_bundle(bundle, preds["threat"]),
+                    )
+                )
+        else:
+            # A half-finished retrain with a new bucket count: score each head in
+            # its own space until they agree again.
+            bundles = make_bundles(locale, normalized, sentiment_m.hash_space, plan)
+            for bundle in bundles:
+                heads.append(
+                    (
+                        sentiment_m.infer_bundle(bundle),
+                        intent_m.infer_bundle(rehash_bundle(locale, bundle, intent_m.hash_space)),
+                        sarcasm_m.infer_bundle(rehash_bundle(locale, bundle, sarcasm_m.hash_space)),
+                        threat_m.infer_bundle(rehash_bundle(locale, bundle, threat_m.hash_space)),
+                    )
+                )
+
+        out: List[InferenceState] = []
+        for text, norm, bundle, (sentiment, intent, sarcasm, threat) in zip(texts, normalized, bundles, heads):
+            claims = extract_claims(norm)
+            contradiction = None
+            if known_facts:
+                contradiction = contradiction_score(claims, known_facts)
+            out.append(
+                InferenceState(
+                    text=text,
+                    normalized=norm,
+                    sentiment=sentiment,
+                    intent=intent,
+                    sarcasm=sarcasm,
+                    threat=threat,
+                    masking=masking_from_bundle(bundle),
+                    hidden=hidden_distress_from_bundle(bundle),
+                    claims=claims,
+                    contradiction=contradiction,
+                    bundle=bundle,
+                )
+            )
+        return out
+
+    def with_contradiction(self, known_facts: Optional[Iterable[Claim]]) -> "InferenceState":
+        """A copy with the claims checked against `known_facts`, when those arrive after the analysis."""
+        return replace(self, contradiction=contradiction_score(self.claims, known_facts) if known_facts else None)
+
+    def to_meta(self) -> dict:
+        return {
+            "sentiment": {"label": self.sentiment.label, "confidence": self.sentiment.confidence, "score": self.sentiment.score},
+            "intent": {"label": self.intent.label, "confidence": self.intent.confidence},
+            "sarcasm": {"is_sarcastic": self.sarcasm.is_sarcastic, "confidence": self.sarcasm.confidence},
+            "threat": {"label": self.threat.label, "confidence": self.threat.confidence, "rule_hit": self.threat.rule_hit},
+            "masking": {"is_masking": self.masking.is_masking, "confidence": self.masking.confidence, "reasons": self.masking.reasons},
+            "hidden": {"distress_score": self.hidden.distress_score, "reasons": self.hidden.reasons},
+            "contradiction": (self.contradiction.__dict__ if self.contradiction else None),
+            "claims": [c.__dict__ for c in self.claims],
+        }
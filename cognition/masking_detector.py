@@ -3,9 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from locale_pack.loader import LocalePack
-from nlp.features import extract_features
+from nlp.features import FeatureBundle, make_bundle
 from cognition.learned import masking_patterns
 
+# Named features read below; the inference feature plan must cover them.
+MASKING_FEATURES = ("masking_hits", "minimizer_hits", "hedging_hits", "neg_hits", "distress_hits")
+
 
 @dataclass(frozen=True)
 class MaskingResult:
@@ -15,7 +18,11 @@ class MaskingResult:
 
 
 def detect_masking(locale: LocalePack, text: str) -> MaskingResult:
-    feats = extract_features(locale, text)
+    return masking_from_bundle(make_bundle(locale, text))
+
+
+def masking_from_bundle(bundle: FeatureBundle) -> MaskingResult:
+    feats = bundle.named
     reasons: list[str] = []
 
     masking = feats.get("masking_hits", 0.0)
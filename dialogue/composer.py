@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
 from locale_pack.loader import LocalePack
-from learning.online_update import OnlineUpdater
+from learning.template_ranker import TemplateRanker
 from memory.persistence import RetrievedMemory
 
 
@@ -33,7 +33,7 @@ def reflect_phrase(sentiment_label: str, hidden_score: float, masking: bool) ->
     return "I’m with you. "
 
 
-def pick_template(locale: LocalePack, updater: OnlineUpdater, tone: str, brevity: str, seed: int) -> dict:
+def pick_template(locale: LocalePack, ranker: TemplateRanker, tone: str, brevity: str, seed: int) -> dict:
     groups = {
         "normal": locale.templates.normal,
         "empathy": locale.templates.empathy,
@@ -46,16 +46,16 @@ def pick_template(locale: LocalePack, updater: OnlineUpdater, tone: str, brevity
         candidates = groups.get(tone, locale.templates.normal) or locale.templates.normal
 
     ids = [c["id"] for c in candidates]
-    chosen_id = updater.template_ranker.pick(ids, seed=seed)
+    chosen_id = ranker.pick(ids, seed=seed)
     for c in candidates:
         if c["id"] == chosen_id:
             return c
     return candidates[0]
 
 
-def compose(locale: LocalePack, updater: OnlineUpdater, tone: str, brevity: str, slots: Dict[str, str]) -> Composed:
+def compose(locale: LocalePack, ranker: TemplateRanker, tone: str, brevity: str, slots: Dict[str, str]) -> Composed:
     seed = int(time.time()) ^ hash((tone, brevity, slots.get("topic", "")))
-    tpl = pick_template(locale, updater, tone=tone, brevity=brevity, seed=seed)
+    tpl = pick_template(locale, ranker, tone=tone, brevity=brevity, seed=seed)
     text = _safe_format(tpl["text"], slots=slots)
     return Composed(text=text, template_id=tpl["id"], tone=tpl.get("tone", tone))
 
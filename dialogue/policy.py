@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from app.config import Settings
 from cognition.learned import policy_priors
@@ -11,16 +12,20 @@ from cognition.inference_state import InferenceState
 from dialogue.brevity import choose_brevity
 from dialogue.composer import Composed, compose, reflect_phrase
 from dialogue.proactive import choose_proactive
+from dialogue.stages import Stage, run_stages
 from dialogue.state import DialogueState
 from learning.online_update import OnlineUpdater
+from learning.template_ranker import TemplateRanker
 from locale_pack.loader import LocalePack
 from logging.stream import EventBus
 from memory.persistence import MemoryStore, RetrievedMemory
-from monitoring.governor import ResourceGovernor
-from nlp.features import make_context
+from memory.wal import read_snapshot, write_snapshot
+from monitoring.governor import DegradeHints, ResourceGovernor
 from knowledge.store import KnowledgeStore
-from style.extractor import extract_style
-from style.profile import load_style, save_style
+from nlp.phrase_matcher import PhraseMatcher
+from nlp.threat import SafetyHit, safety_screen
+from style.extractor import style_from_bundle
+from style.profile import StyleProfile
 from style.shaper import shape_reply
 
 
@@ -31,6 +36,20 @@ class ChatOutput:
     template_id: str
     brevity: str
     meta: dict
+    # Completes once the exchange's deferred bookkeeping is written.
+    recorded: Optional[Future] = field(default=None, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class ReplySnapshot:
+    """
+    Copies of the style profile and template ranker as of the end of the last
+    full turn. The safety fast path reads these instead of the live objects,
+    which the deferred worker may be updating at the same moment.
+    """
+
+    style: StyleProfile
+    ranker: TemplateRanker
 
 
 class DialoguePolicy:
@@ -42,13 +61,46 @@ class DialoguePolicy:
         self._updater = updater
         self._events = events
         self._state = DialogueState()
-        self._style_path = memory._data_dir / "style.json"  # persisted state
-        self._style = load_style(self._style_path)
+        self._style_path = memory._data_dir / "style.json"  # snapshot; updates go through the WAL
+        self._style = self._load_style()
+        memory.wal.add_snapshot(("style",), self._snapshot_style)
         self._knowledge = KnowledgeStore.load()
+        # Unlike `locale.phrases`, topic mentions are substring matches.
+        self._distress_topics = PhraseMatcher({"distress": self._locale.lexicons.distress_topics}, bounded=False)
         self._policy_priors = policy_priors() or {}
         self._knowledge_sig = self._knowledge_signature()
         self._policy_priors_mtime = self._policy_priors_signature()
         self._governor: ResourceGovernor | None = None
+        # Post-reply bookkeeping (turns, episodes, semantic memory, learning);
+        # one worker keeps it in turn order.
+        self._deferred = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sx-deferred")
+        self._pending: List[Future] = []
+        # Optionally overlap retrieval with the text analysis of the same turn.
+        self._stage_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sx-stage") if settings.parallel_stages else None
+        self._reply_snapshot = self._take_snapshot()
+
+    def _load_style(self) -> StyleProfile:
+        obj, seq = read_snapshot(self._style_path)
+        self._memory.wal.advance(seq)
+        # Style ops carry the whole profile, so the newest one wins.
+        for _, _, op in self._memory.wal.records(after=seq, kinds=("style",)):
+            obj = op
+        return StyleProfile.from_json(obj) if obj is not None else StyleProfile()
+
+    def _snapshot_style(self, seq: int) -> None:
+        write_snapshot(self._style_path, self._style.to_json(), seq)
+
+    def _take_snapshot(self) -> ReplySnapshot:
+        # Safety arms are added up front so picking from the copy never changes it.
+        ranker = self._updater.template_ranker.copy()
+        ranker.ensure(t["id"] for t in self._locale.templates.safety)
+        return ReplySnapshot(style=StyleProfile.from_json(self._style.to_json()), ranker=ranker)
+
+    def _update_style(self, inf: InferenceState) -> None:
+        # Style reads the same per-turn feature bundle as the classifiers.
+        style_sig = style_from_bundle(inf.bundle)
+        self._style.update(style_sig.tokens, style_sig.emojis, style_sig.exclaims, style_sig.questions, style_sig.hedges)
+        self._memory.wal.log("style", self._style.to_json())
 
     @property
     def state(self) -> DialogueState:
@@ -105,18 +157,11 @@ class DialoguePolicy:
                 pass
 
     def _topic_salience(self, normalized_l: str) -> Dict[str, float]:
-        topics: Dict[str, float] = {}
-        for phrase in self._locale.lexicons.distress_topics:
-            if phrase in normalized_l:
-                topics[phrase] = 1.0
+        # Both lexicons are compiled automatons: one pass each, whatever their size.
+        topics: Dict[str, float] = {p: 1.0 for p in self._distress_topics.matches(normalized_l).get("distress", [])}
         # Learned topics
-        for topic, tp in self._knowledge.topics.items():
-            if topic and topic in normalized_l:
-                topics[topic] = max(topics.get(topic, 0.0), 1.0)
-                continue
-            for term in tp.related_terms[:48]:
-                if term and term in normalized_l:
-                    topics[topic] = max(topics.get(topic, 0.0), 0.75)
+        for topic, sal in self._knowledge.topic_hits(normalized_l).items():
+            topics[topic] = max(topics.get(topic, 0.0), sal)
         return topics
 
     def _tone(self, inf: InferenceState) -> str:
@@ -171,35 +216,86 @@ class DialoguePolicy:
         self._state.last_proactive_ts = time.time()
         return "proactive", {"topic": pp.topic}
 
+    def _defer(self, fn: Callable[..., None], *args: Any) -> Future:
+        """
+        Queue `fn(*args)` behind earlier post-reply work. Inside a WAL batch the
+        batch goes with it, so the exchange is still logged as one record.
+        """
+        ops = self._memory.wal.detach()
+        fut = self._deferred.submit(self._run_deferred, ops, fn, args)
+        self._pending.append(fut)
+        return fut
+
+    def _run_deferred(self, ops: Optional[List[list]], fn: Callable[..., None], args: tuple) -> None:
+        wal = self._memory.wal
+        with wal.resume(ops) if ops is not None else wal.batch():
+            fn(*args)
+
+    def flush_deferred(self) -> None:
+        """Barrier: wait for queued post-reply work so memory and learning state are current."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        t0 = time.perf_counter()
+        for fut in pending:
+            try:
+                fut.result()
+            except Exception as e:
+                self._events.publish("dialogue.deferred_error", {"error": type(e).__name__})
+        self._metrics.observe_deferred_wait((time.perf_counter() - t0) * 1000.0)
+
+    def close(self) -> None:
+        self.flush_deferred()
+        self._deferred.shutdown(wait=True)
+        if self._stage_pool is not None:
+            self._stage_pool.shutdown(wait=True)
+
     def handle_user_message(self, text: str, client_meta: Optional[dict] = None) -> ChatOutput:
         t0 = time.time()
 
+        # Safety pre-pass: compiled threat/self-harm rules on the normalized text,
+        # before retrieval and the classifiers. The normalizer caches, so the full
+        # path below reuses this result. A rule below the threat threshold falls
+        # through, so the classifier decides as it would without the fast path.
+        normalized = self._locale.normalizer.apply(text)
+        hit = safety_screen(normalized.lower())
+        if hit is not None and hit.confidence >= self._settings.threat_threshold:
+            return self._safety_reply(t0, text, normalized, hit, client_meta)
+
+        self.flush_deferred()
+
+        # Every state change of the exchange (learning, style, turns, semantic)
+        # lands in one WAL record, including the part deferred past the reply.
+        with self._memory.wal.batch():
+            return self._full_reply(t0, text, client_meta)
+
+    def _full_reply(self, t0: float, text: str, client_meta: Optional[dict]) -> ChatOutput:
         # Implicit learning signal from how fast the user came back.
         self._updater.on_user_message()
 
         self._state.bump_user()
-        style_sig = extract_style(self._locale, text)
-        self._style.update(style_sig.tokens, style_sig.emojis, style_sig.exclaims, style_sig.questions, style_sig.hedges)
-        save_style(self._style_path, self._style)
 
         hints = None
         if self._governor is not None and getattr(self._events, "enabled", True):
             # Only enforce budgets in normal user mode (admin disables events).
             hints = self._governor.hints_for_user()
 
-        # Retrieve relevant memory for "read between the lines" + continuity.
-        if hints is not None and hints.level == "hard":
-            retrieved = RetrievedMemory(turns=[], episodes=[], facts=self._memory.semantic.facts)
-        else:
-            limit_turns = hints.retrieval_limit_turns if hints is not None else 10
-            scan_tail = hints.scan_tail_lines if hints is not None else 8000
-            retrieved = self._memory.retrieve(text, limit_turns=limit_turns, scan_tail_lines=scan_tail)
-        known_facts = retrieved.facts
-
-        inf = InferenceState.from_text(self._locale, text, known_facts=known_facts)
+        # Retrieval and the text-only analysis are independent; only the
+        # contradiction check needs both. Style logs to this thread's WAL batch.
+        done, stage_ms = run_stages(
+            [
+                Stage("retrieve", lambda: self._retrieve(text, hints)),
+                Stage("analyze", lambda: InferenceState.from_text(self._locale, text), inline=True),
+                Stage("style", self._update_style, deps=("analyze",), inline=True),
+                Stage("contradiction", lambda inf, r: inf.with_contradiction(r.facts), deps=("analyze", "retrieve"), inline=True),
+            ],
+            self._stage_pool,
+        )
+        self._metrics.observe_turn_stages(stage_ms)
+        retrieved: RetrievedMemory = done["retrieve"]
+        inf: InferenceState = done["contradiction"]
 
-        ctx = make_context(self._locale, inf.normalized)
-        brevity = choose_brevity(self._locale, self._style, hidden_distress=inf.hidden.distress_score, user_tokens=len(ctx.tokens_l))
+        brevity = choose_brevity(self._locale, self._style, hidden_distress=inf.hidden.distress_score, user_tokens=len(inf.bundle.ctx.tokens_l))
 
         # Proactive can override tone when user isn't in immediate crisis.
         proactive = None
@@ -212,7 +308,7 @@ class DialoguePolicy:
         slots["reflect"] = reflect_phrase(inf.sentiment.label, inf.hidden.distress_score, inf.masking.is_masking)
         slots["topic"] = (proactive[1].get("topic") if proactive else "") or self._best_topic(text_l=inf.normalized.lower())
 
-        composed = compose(self._locale, self._updater, tone=tone, brevity=brevity, slots=slots)
+        composed = compose(self._locale, self._updater.template_ranker, tone=tone, brevity=brevity, slots=slots)
 
         # Optionally add one topic-bound action (skill) when it's appropriate.
         allow_actions = True if hints is None else bool(hints.allow_actions)
@@ -242,25 +338,21 @@ class DialoguePolicy:
 
         shaped = shape_reply(self._locale, self._style, composed.text, target_brevity=brevity, max_chars=self._settings.max_reply_chars)
 
-        # Persist turns + semantic updates
-        self._memory.add_turn("user", inf.normalized, meta={"client": client_meta or {}, "inference": self._meta_inference(inf)})
-        self._memory.track_episode_turn(inf.normalized, distress_score=inf.hidden.distress_score)
-
-        topic_salience = self._topic_salience(inf.normalized.lower())
-        self._memory.update_semantic(claims=inf.claims, topic_salience=topic_salience, distress_score=inf.hidden.distress_score)
-
-        self._memory.add_turn(
-            "assistant",
-            shaped.text,
-            meta={"tone": composed.tone, "template_id": composed.template_id, "brevity": shaped.brevity},
-        )
-        self._updater.note_response(template_id=composed.template_id, tone=composed.tone)
+        # Persisting the exchange doesn't change the reply; it runs after the
+        # reply is returned and before the next turn's retrieval.
+        recorded = self._defer(self._record_exchange, inf, client_meta, composed, shaped.text, shaped.brevity, {})
 
         self._state.bump_ai(composed.tone, composed.template_id)
+        # Everything the fast path reads is current here: the deferred queue
+        # was drained before this turn and style was updated in-line.
+        self._reply_snapshot = self._take_snapshot()
 
         dt_ms = (time.time() - t0) * 1000.0
         self._metrics.observe_chat_latency(dt_ms)
-        self._events.publish("dialogue.reply", {"tone": composed.tone, "template_id": composed.template_id, "brevity": shaped.brevity, "latency_ms": dt_ms})
+        self._events.publish(
+            "dialogue.reply",
+            {"tone": composed.tone, "template_id": composed.template_id, "brevity": shaped.brevity, "latency_ms": dt_ms, "stages_ms": stage_ms},
+        )
 
         return ChatOutput(
             reply=shaped.text,
@@ -274,26 +366,84 @@ class DialoguePolicy:
                     "episodes": retrieved.episodes,
                 },
             },
+            recorded=recorded,
+        )
+
+    def _retrieve(self, text: str, hints: Optional[DegradeHints]) -> RetrievedMemory:
+        # Relevant memory for "read between the lines" + continuity.
+        if hints is not None and hints.level == "hard":
+            return RetrievedMemory(turns=[], episodes=[], facts=self._memory.semantic.facts)
+        limit_turns = hints.retrieval_limit_turns if hints is not None else 10
+        # Without hints (admin mode) the configured scan window still applies; 0 = all weeks.
+        scan_segments = hints.scan_segments if hints is not None else (self._settings.index_scan_segments or None)
+        return self._memory.retrieve(text, limit_turns=limit_turns, scan_segments=scan_segments)
+
+    def _safety_reply(self, t0: float, text: str, normalized: str, hit: SafetyHit, client_meta: Optional[dict]) -> ChatOutput:
+        """
+        Answer a rule-matched crisis message from the safety templates without
+        retrieval, classifiers or disk I/O; the full analysis, style update and
+        persistence run afterwards on the deferred worker.
+
+        Style and template choice come from the last full turn's snapshot, so
+        the reply doesn't depend on how far the deferred worker has got.
+        """
+        snap = self._reply_snapshot
+        self._state.bump_user()
+        # A crisis phrase counts as maximal distress for brevity purposes.
+        user_tokens = len(self._locale.segmenter.tokens(normalized))
+        brevity = choose_brevity(self._locale, snap.style, hidden_distress=1.0, user_tokens=user_tokens)
+        composed = compose(self._locale, snap.ranker, tone="safety", brevity=brevity, slots={})
+        shaped = shape_reply(self._locale, snap.style, composed.text, target_brevity=brevity, max_chars=self._settings.max_reply_chars)
+        self._state.bump_ai(composed.tone, composed.template_id)
+
+        dt_ms = (time.time() - t0) * 1000.0
+        self._metrics.observe_safety_latency(dt_ms)
+
+        safety = {"fast_path": True, "label": hit.label, "phrases": hit.phrases, "latency_ms": dt_ms}
+        recorded = self._defer(self._finish_safety_turn, text, client_meta, composed, shaped.text, shaped.brevity, safety)
+        self._events.publish("dialogue.reply", {"tone": composed.tone, "template_id": composed.template_id, "brevity": shaped.brevity, "latency_ms": dt_ms})
+
+        return ChatOutput(
+            reply=shaped.text,
+            tone=composed.tone,
+            template_id=composed.template_id,
+            brevity=shaped.brevity,
+            meta={
+                "inference": {"threat": {"label": hit.label, "confidence": hit.confidence, "rule_hit": True}, "deferred": True},
+                "safety": safety,
+                "retrieved": {"turn_ids": [], "episodes": []},
+            },
+            recorded=recorded,
         )
 
+    def _finish_safety_turn(self, text: str, client_meta: Optional[dict], composed: Composed, reply: str, brevity: str, safety: dict) -> None:
+        # The analysis the full path does before replying, for a reply that has
+        # already been sent.
+        self._updater.on_user_message()
+        inf = InferenceState.from_text(self._locale, text)
+        self._update_style(inf)
+        self._record_exchange(inf, client_meta, composed, reply, brevity, {"safety": safety})
+
+    def _record_exchange(self, inf: InferenceState, client_meta: Optional[dict], composed: Composed, reply: str, brevity: str, user_meta: dict) -> None:
+        # Persist turns + semantic updates, in this order on both paths.
+        self._memory.add_turn("user", inf.normalized, meta={"client": client_meta or {}, "inference": self._meta_inference(inf), **user_meta})
+        self._memory.track_episode_turn(inf.normalized, distress_score=inf.hidden.distress_score)
+
+        topic_salience = self._topic_salience(inf.normalized.lower())
+        self._memory.update_semantic(claims=inf.claims, topic_salience=topic_salience, distress_score=inf.hidden.distress_score)
+
+        self._memory.add_turn("assistant", reply, meta={"tone": composed.tone, "template_id": composed.template_id, "brevity": brevity})
+        self._updater.note_response(template_id=composed.template_id, tone=composed.tone)
+
     def _best_topic(self, text_l: str) -> str:
-        for phrase in self._locale.lexicons.distress_topics:
-            if phrase in text_l:
-                return phrase
-        for term, sal in sorted(self._memory.semantic.topics.items(), key=lambda kv: kv[1], reverse=True)[:4]:
-            if sal >= 0.25:
-                return term
+        distress = self._distress_topics.matches(text_l).get("distress")
+        if distress:
+            return distress[0]
+        top = self._memory.semantic.top_topic()
+        if top is not None and top[1] >= 0.25:
+            return top[0]
         return "that"
 
     @staticmethod
     def _meta_inference(inf: InferenceState) -> dict:
-        return {
-            "sentiment": {"label": inf.sentiment.label, "confidence": inf.sentiment.confidence, "score": inf.sentiment.score},
-            "intent": {"label": inf.intent.label, "confidence": inf.intent.confidence},
-            "sarcasm": {"is_sarcastic": inf.sarcasm.is_sarcastic, "confidence": inf.sarcasm.confidence},
-            "threat": {"label": inf.threat.label, "confidence": inf.threat.confidence, "rule_hit": inf.threat.rule_hit},
-            "masking": {"is_masking": inf.masking.is_masking, "confidence": inf.masking.confidence, "reasons": inf.masking.reasons},
-            "hidden": {"distress_score": inf.hidden.distress_score, "reasons": inf.hidden.reasons},
-            "contradiction": (inf.contradiction.__dict__ if inf.contradiction else None),
-            "claims": [c.__dict__ for c in inf.claims],
-        }
+        return inf.to_meta()
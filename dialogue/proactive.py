@@ -31,8 +31,9 @@ def choose_proactive(
         if hours >= min_hours_gap:
             return ProactivePrompt(topic=topic, kind="unresolved")
 
-    if semantic.topics:
-        topic, sal = sorted(semantic.topics.items(), key=lambda kv: kv[1], reverse=True)[0]
+    top = semantic.top_topic()
+    if top is not None:
+        topic, sal = top
         if sal >= 0.35 and (now - semantic.last_turn_ts) / 3600.0 >= min_hours_gap:
             return ProactivePrompt(topic=topic, kind="trend")
 
@@ -47,9 +48,7 @@ def choose_proactive(
                 dist = float(semantic.emotions.get("distress", 0.0))
                 if dist >= float(wd.get("min_distress", 0.70)) - 0.10:
                     if style_avg_tokens is None or style_avg_tokens <= 8.5:
-                        topic = "that"
-                        if semantic.topics:
-                            topic = sorted(semantic.topics.items(), key=lambda kv: kv[1], reverse=True)[0][0]
+                        topic = top[0] if top is not None else "that"
                         if (now - semantic.last_turn_ts) / 3600.0 >= min_hours_gap:
                             return ProactivePrompt(topic=topic, kind="trend")
         except Exception:
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from monitoring.metrics import Metrics
+
+
+T = TypeVar("T")
+
+
+class PipelineRunner:
+    """
+    Runs the blocking chat pipeline (and other synchronous request work) on a
+    bounded thread pool so the event loop keeps serving `/health`, SSE and
+    TTS while a turn is in flight.
+
+    Work that reads or mutates `DialogueState`/`MemoryStore` is serialized by
+    an asyncio lock, in arrival order. The lock is held until the worker
+    finishes, even if the waiting request is cancelled, so two turns never
+    overlap.
+    """
+
+    def __init__(self, metrics: Metrics, workers: int = 2):
+        self._metrics = metrics
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="sx-chat")
+        self._lock = asyncio.Lock()
+        self._depth = 0  # admitted and not yet finished
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def _enter(self) -> None:
+        self._depth += 1
+        self._metrics.set_chat_queue_depth(self._depth)
+
+    def _leave(self) -> None:
+        self._depth -= 1
+        self._metrics.set_chat_queue_depth(self._depth)
+
+    async def run(self, fn: Callable[..., T], *args: Any, serialize: bool = True, **kwargs: Any) -> T:
+        t0 = time.perf_counter()
+
+        def call() -> T:
+            self._metrics.observe_chat_wait((time.perf_counter() - t0) * 1000.0)
+            return fn(*args, **kwargs)
+
+        self._enter()
+        try:
+            if serialize:
+                await self._lock.acquire()
+            try:
+                fut = asyncio.wrap_future(self._pool.submit(call))
+            except BaseException:
+                if serialize:
+                    self._lock.release()
+                raise
+        except BaseException:
+            self._leave()
+            raise
+
+        def done(_: asyncio.Future) -> None:
+            if serialize:
+                self._lock.release()
+            self._leave()
+
+        fut.add_done_callback(done)
+        return await asyncio.shield(fut)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
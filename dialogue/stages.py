@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of a turn. `fn` is called with the results of `deps`, in order.
+    Inline stages run on the calling thread (use it for anything that logs to
+    the caller's WAL batch, or is too cheap to be worth a hand-off); the rest
+    go to the pool as soon as their dependencies are done.
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+    inline: bool = False
+
+
+def _timed(fn: Callable[..., Any], args: List[Any]) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def run_stages(stages: Sequence[Stage], pool: Optional[Executor]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run `stages` (each declared after its dependencies) and return their
+    results and run times in ms by name. Without a pool every stage runs
+    inline, in declaration order. The first failure is re-raised once the
+    stages already running have finished.
+    """
+    seen: set = set()
+    for st in stages:
+        missing = [d for d in st.deps if d not in seen]
+        if missing:
+            raise ValueError(f"stage {st.name!r} depends on undeclared {missing}")
+        seen.add(st.name)
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    waiting = list(stages)
+    running: Dict[Future, str] = {}
+    try:
+        while waiting or running:
+            ready = [st for st in waiting if all(d in results for d in st.deps)]
+            for st in ready:
+                if pool is not None and not st.inline:
+                    waiting.remove(st)
+                    running[pool.submit(_timed, st.fn, [results[d] for d in st.deps])] = st.name
+            inline = next((st for st in ready if st.inline or pool is None), None)
+            if inline is not None:
+                # One at a time, so stages it unblocks start as early as possible.
+                waiting.remove(inline)
+                results[inline.name], timings[inline.name] = _timed(inline.fn, [results[d] for d in inline.deps])
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                results[name], timings[name] = fut.result()
+    except BaseException:
+        # Don't leave pool stages reading state the caller is about to change.
+        wait(running)
+        raise
+    return results, timings
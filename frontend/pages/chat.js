@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from "react";
-import { apiGet, apiPost } from "../lib/api";
+import { apiGet, apiPost, apiStream } from "../lib/api";
 import { TopNav } from "../lib/layout";
 import { notifyError, notifyOk } from "../lib/notify";
 import { clearChatState, loadChatState, saveChatState } from "../lib/state";
@@ -118,6 +118,21 @@ export default function ChatPage() {
     return () => clearTimeout(id);
   }, [adminMode, busy, lastActivity]);
 
+  // Normal chat streams: show the reply as soon as it arrives, attach meta later.
+  async function streamReply(msg) {
+    const id = nowId();
+    await apiStream("/chat/stream", { message: msg, client: { ui: "nextjs" } }, (name, data) => {
+      if (name === "reply") {
+        const aiTurn = { id, role: "assistant", text: data.reply, tone: data.tone, template_id: data.template_id, brevity: data.brevity, meta: {} };
+        setTurns((t) => [...t, aiTurn]);
+      } else if (name === "meta") {
+        setTurns((t) => t.map((x) => (x.id === id ? { ...x, meta: data } : x)));
+      } else if (name === "error") {
+        throw new Error(`Chat failed: ${data.error}`);
+      }
+    });
+  }
+
   async function send() {
     const msg = input.trim();
     if (!msg || busy) return;
@@ -127,6 +142,17 @@ export default function ChatPage() {
     const display = msg.toLowerCase().startsWith("admin:") ? "admin:[redacted]" : msg;
     const userTurn = { id: nowId(), role: "user", text: display };
     setTurns((t) => [...t, userTurn]);
+    if (!adminMode && !msg.toLowerCase().startsWith("admin:")) {
+      try {
+        await streamReply(msg);
+      } catch (e) {
+        notifyError(e, "Chat request failed");
+      } finally {
+        setLastActivity(Date.now());
+        setBusy(false);
+      }
+      return;
+    }
     try {
       const res = await apiPost("/chat", {
         message: msg,
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from nlp.phrase_matcher import PhraseMatcher
+
+
+# Related terms per topic that count as a mention of it.
+TOPIC_TERMS = 48
+
 
 def _root() -> Path:
     return Path(__file__).resolve().parents[1]
@@ -22,6 +28,14 @@ class TopicProfile:
 class KnowledgeStore:
     topics: Dict[str, TopicProfile]
     actions: Dict[str, List[str]]  # topic -> actions
+    # Topic names and related terms in one automaton, one category per topic.
+    # Substring matches, so inflections ("stressed") still count.
+    _matcher: PhraseMatcher = field(init=False, repr=False)
+    _order: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._matcher = PhraseMatcher({t: [t, *tp.related_terms[:TOPIC_TERMS]] for t, tp in self.topics.items()}, bounded=False)
+        self._order = {t: i for i, t in enumerate(self.topics)}
 
     @staticmethod
     def load() -> "KnowledgeStore":
@@ -55,6 +69,14 @@ class KnowledgeStore:
 
         return KnowledgeStore(topics=topics, actions=actions)
 
+    def topic_hits(self, text_l: str) -> Dict[str, float]:
+        """
+        Learned topics mentioned in `text_l`, in store order: 1.0 when the
+        topic itself is named, 0.75 for one of its related terms.
+        """
+        hits = self._matcher.matches(text_l)
+        return {t: 1.0 if t.lower() in hits[t] else 0.75 for t in sorted(hits, key=self._order.__getitem__)}
+
     def best_actions(self, topic: str, limit: int = 1) -> List[str]:
         if not topic:
             return []
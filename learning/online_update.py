@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -11,6 +10,7 @@ from learning.template_ranker import TemplateRanker, load_ranker, save_ranker
 from learning.tone_preference import TonePreference, load_tone, save_tone
 from logging.stream import EventBus
 from memory.persistence import MemoryStore
+from memory.wal import read_snapshot, write_snapshot
 
 
 @dataclass
@@ -24,31 +24,33 @@ class OnlineUpdater:
     def __init__(self, store: MemoryStore, events: EventBus):
         self._store = store
         self._events = events
-        self._path = store._data_dir / "learning.json"  # persisted state
+        self._path = store._data_dir / "learning.json"  # snapshot; signals go through the WAL
 
         self.template_ranker: TemplateRanker
         self.tone_pref: TonePreference
         self.last_response: Optional[LastResponse] = None
 
         self._load()
+        store.wal.add_snapshot(("learning",), self._snapshot)
 
     def _load(self) -> None:
-        if self._path.exists():
-            obj = json.loads(self._path.read_text(encoding="utf-8"))
+        obj, seq = read_snapshot(self._path)
+        if obj is not None:
             self.template_ranker = TemplateRanker.from_json(obj.get("template_ranker", {}))
             self.tone_pref = TonePreference.from_json(obj.get("tone_pref", {}))
         else:
             self.template_ranker = TemplateRanker()
             self.tone_pref = TonePreference()
+        wal = self._store.wal
+        wal.advance(seq)
+        for _, _, op in wal.records(after=seq, kinds=("learning",)):
+            self._apply(op)
 
-    def save(self) -> None:
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._path.write_text(
-            json.dumps(
-                {"template_ranker": self.template_ranker.to_json(), "tone_pref": self.tone_pref.to_json()},
-                ensure_ascii=False,
-            ),
-            encoding="utf-8",
+    def _snapshot(self, seq: int) -> None:
+        write_snapshot(
+            self._path,
+            {"template_ranker": self.template_ranker.to_json(), "tone_pref": self.tone_pref.to_json()},
+            seq,
         )
 
     def note_response(self, template_id: str, tone: str) -> None:
@@ -67,13 +69,17 @@ class OnlineUpdater:
         self.apply_signal(sig, template_id=sig.template_id, tone=sig.tone)
 
     def apply_signal(self, sig: FeedbackSignal, template_id: Optional[str], tone: Optional[str]) -> None:
-        if template_id:
-            self.template_ranker.update(template_id, success=sig.success, weight=sig.weight)
-        if tone:
-            self.tone_pref.update(tone, reward=(1.0 if sig.success else -1.0) * sig.weight)
-        self.save()
+        op = {"template_id": template_id, "tone": tone, "success": bool(sig.success), "weight": float(sig.weight)}
+        with self._store.wal.batch():
+            self._apply(op)
+            self._store.wal.log("learning", op)
         self._events.publish(
             "learning.update",
             {"kind": sig.kind, "success": sig.success, "weight": sig.weight, "template_id": template_id, "tone": tone},
         )
 
+    def _apply(self, op: dict) -> None:
+        if op.get("template_id"):
+            self.template_ranker.update(op["template_id"], success=op["success"], weight=op["weight"])
+        if op.get("tone"):
+            self.tone_pref.update(op["tone"], reward=(1.0 if op["success"] else -1.0) * op["weight"])
@@ -45,6 +45,10 @@ class TemplateRanker:
     def update(self, template_id: str, success: bool, weight: float = 1.0) -> None:
         self.arms.setdefault(template_id, BetaArm()).update(success=success, weight=weight)
 
+    def copy(self) -> "TemplateRanker":
+        # list() takes the items in one step, so a concurrent update can't break the copy.
+        return TemplateRanker(arms={k: BetaArm(a=v.a, b=v.b) for k, v in list(self.arms.items())})
+
     def to_json(self) -> dict:
         return {"arms": {k: {"a": v.a, "b": v.b} for k, v in self.arms.items()}}
 
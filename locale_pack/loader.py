@@ -5,6 +5,14 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List, Set
 
+from nlp.cues import CUE_PHRASES
+from nlp.normalizer import Normalizer
+from nlp.phrase_matcher import PhraseMatcher
+from nlp.segmenter import Segmenter
+
+
+_NORMALIZE_CACHE = 512
+
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[1]
@@ -22,6 +30,33 @@ def _read_lines(path: Path) -> List[str]:
     return lines
 
 
+def _read_rule_lines(path: Path) -> List[str]:
+    # Rule sides may start or end with significant spaces, so lines are kept as-is.
+    if not path.exists():
+        raise FileNotFoundError(str(path))
+    return [raw for raw in path.read_text(encoding="utf-8").splitlines() if raw.strip() and not raw.lstrip().startswith("#")]
+
+
+_ALPHABET_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", '"': '"'}
+
+
+def _read_alphabet(path: Path) -> Set[str]:
+    # Whitespace is part of the alphabet (it separates words), so lines are not
+    # stripped; \n, \t, \r, \", \\ are read as escapes.
+    chars: Set[str] = set()
+    for raw in _read_rule_lines(path):
+        i = 0
+        while i < len(raw):
+            ch = raw[i]
+            if ch == "\\" and i + 1 < len(raw) and raw[i + 1] in _ALPHABET_ESCAPES:
+                chars.add(_ALPHABET_ESCAPES[raw[i + 1]])
+                i += 2
+                continue
+            chars.add(ch)
+            i += 1
+    return chars
+
+
 def _read_wordset(path: Path) -> Set[str]:
     return {ln.lower() for ln in _read_lines(path)}
 
@@ -67,6 +102,17 @@ class Lexicons:
         tset = {t.lower() for t in tokens}
         return any(w in tset for w in lex)
 
+    def phrase_groups(self) -> Dict[str, Set[str]]:
+        # Multi-word lexicons matched as bounded phrases (the sentiment ones are token sets).
+        return {
+            "hedging": self.hedging,
+            "minimizers": self.minimizers,
+            "masking_markers": self.masking_markers,
+            "distress_topics": self.distress_topics,
+            "threat": self.threat,
+            "sarcasm": self.sarcasm,
+        }
+
 
 @dataclass(frozen=True)
 class LocalePack:
@@ -77,6 +123,9 @@ class LocalePack:
     lexicons: Lexicons
     templates: Templates
     style_rules: Dict[str, object]
+    phrases: PhraseMatcher
+    normalizer: Normalizer
+    segmenter: Segmenter
 
     @staticmethod
     def load(locale: str) -> "LocalePack":
@@ -85,8 +134,8 @@ class LocalePack:
         if not base.exists():
             raise FileNotFoundError(f"Locale not found: {locale} ({base})")
 
-        alphabet = set("".join(_read_lines(base / "alphabet.txt")))
-        normalize_rules = _read_lines(base / "normalize.rules")
+        alphabet = _read_alphabet(base / "alphabet.txt")
+        normalize_rules = _read_rule_lines(base / "normalize.rules")
         abbreviations = {a.strip() for a in _read_lines(base / "abbreviations.txt")}
 
         lex_dir = base / "lexicons"
@@ -103,6 +152,9 @@ class LocalePack:
             distress_topics=_read_wordset(lex_dir / "distress_topics.txt"),
         )
 
+        # All phrase lexicons plus the fixed feature cues, compiled once per locale.
+        phrases = PhraseMatcher({**lex.phrase_groups(), **CUE_PHRASES})
+
         templates = Templates.load(templates_dir)
         style_rules = json.loads((base / "style_rules.json").read_text(encoding="utf-8"))
 
@@ -114,5 +166,8 @@ class LocalePack:
             lexicons=lex,
             templates=templates,
             style_rules=style_rules,
+            phrases=phrases,
+            normalizer=Normalizer.from_rule_lines(normalize_rules, cache_size=_NORMALIZE_CACHE),
+            segmenter=Segmenter(alphabet),
         )
 
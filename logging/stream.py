@@ -19,14 +19,32 @@ class Event:
 
 
 class EventBus:
+    """
+    In-process event stream for `/logs/stream`. `publish` may be called from
+    worker threads (chat pipeline, scheduler); off the event loop it hands the
+    event over with `call_soon_threadsafe`, since asyncio queues are not
+    thread-safe.
+    """
+
     def __init__(self):
         self._q: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=2000)
+        self._loop: Optional[asyncio.AbstractEventLoop] = _running_loop()
         self.enabled: bool = True
 
     def publish(self, name: str, data: Dict[str, Any]) -> None:
         if not self.enabled:
             return
         ev = Event(ts=time.time(), name=name, data=data)
+        loop = self._loop
+        if loop is not None and _running_loop() is not loop:
+            try:
+                loop.call_soon_threadsafe(self._put, ev)
+            except RuntimeError:
+                pass  # loop closed during shutdown
+            return
+        self._put(ev)
+
+    def _put(self, ev: Event) -> None:
         try:
             self._q.put_nowait(ev)
         except asyncio.QueueFull:
@@ -41,6 +59,14 @@ class EventBus:
                 pass
 
     async def subscribe(self) -> AsyncIterator[Event]:
+        self._loop = asyncio.get_running_loop()
         while True:
             ev = await self._q.get()
             yield ev
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
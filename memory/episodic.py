@@ -1,13 +1,26 @@
 from __future__ import annotations
 
 import json
+import mmap
+import struct
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from locale_pack.loader import LocalePack
-from nlp.segmenter import Segmenter
+from memory.index import InvertedIndex
+from memory.tail import tail_lines
+
+
+# Episodes kept in memory after startup; older ones are read from disk on demand.
+_RECENT = 64
+
+_MAGIC = b"SXEI"
+_VERSION = 1
+_HEADER = struct.Struct("<4sI")  # magic, version
+_RECORD = struct.Struct("<QddQI")  # episode_id, started_at, ended_at, byte offset, byte length
 
 
 @dataclass(frozen=True)
@@ -20,34 +33,207 @@ class Episode:
     distress_avg: float
 
 
+def _episode_from_json(obj: dict) -> Episode:
+    return Episode(
+        episode_id=int(obj["episode_id"]),
+        started_at=float(obj["started_at"]),
+        ended_at=float(obj["ended_at"]),
+        summary=str(obj["summary"]),
+        top_terms=list(obj.get("top_terms", [])),
+        distress_avg=float(obj.get("distress_avg", 0.0)),
+    )
+
+
+def _episode_to_json(ep: Episode) -> dict:
+    return {
+        "episode_id": ep.episode_id,
+        "started_at": ep.started_at,
+        "ended_at": ep.ended_at,
+        "summary": ep.summary,
+        "top_terms": ep.top_terms,
+        "distress_avg": ep.distress_avg,
+    }
+
+
+def _parse(lines: Iterable[Union[str, bytes]]) -> List[Episode]:
+    out: List[Episode] = []
+    for ln in lines:
+        if not ln.strip():
+            continue
+        try:
+            out.append(_episode_from_json(json.loads(ln)))
+        except Exception:
+            continue  # torn or hand-edited line
+    return out
+
+
 class EpisodicMemory:
-    def __init__(self, path: Path, locale: LocalePack):
+    """
+    Append-only `episodes.jsonl`, plus:
+
+    - `episodes.idx`: fixed-width `(id, started_at, ended_at, offset, length)`
+      records in file order. Ids and start times both increase, so it doubles
+      as the sorted time array; lookups by id or time read one record each
+      through a memory map and then exactly one line.
+    - `episode_index/`: an `InvertedIndex` over each episode's `top_terms`,
+      ranked the same way as turns (BM25 with recency decay).
+
+    Only the newest `_RECENT` episodes are held in memory.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        locale: LocalePack,
+        index_half_life_days: float = 180.0,
+        index_unload_after_s: float = 900.0,
+    ):
         self._path = path
         self._locale = locale
+        self._sidecar_path = path.with_suffix(".idx")
+        self._lock = threading.RLock()
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._torn = False  # episodes.jsonl ends in a partial line
         self._episodes: List[Episode] = []
         self._next_id = 1
+        self._sync_sidecar()
         self._load()
+        self.index = InvertedIndex.open(
+            path.parent / "episode_index", half_life_days=index_half_life_days, unload_after_s=index_unload_after_s
+        )
+        self._catch_up_index()
 
     def _load(self) -> None:
+        # Only the tail is parsed at startup; ids are increasing, so the last
+        # episode also gives the next id.
+        self._episodes = _parse(tail_lines(self._path, _RECENT))
+        for ep in self._episodes:
+            self._next_id = max(self._next_id, ep.episode_id + 1)
+
+    # ---- sidecar ----
+
+    def _sync_sidecar(self) -> None:
+        count = self._sidecar_count()
+        if count is None:
+            self.rebuild_sidecar()
+            return
+        self._count = count
+        end = 0
+        if count:
+            _, _, _, off, ln = self._record(count - 1)
+            end = off + ln
+            size = self._path.stat().st_size if self._path.exists() else 0
+            ep = self._read(off, ln) if end <= size else None
+            if ep is None or ep.episode_id != self._record(count - 1)[0]:
+                # episodes.jsonl was replaced or truncated underneath the sidecar.
+                self.rebuild_sidecar()
+                return
+        self._index_from(end)
+
+    def _sidecar_count(self) -> Optional[int]:
+        p = self._sidecar_path
+        if not p.exists() or p.stat().st_size < _HEADER.size:
+            return None
+        with p.open("rb") as f:
+            magic, version = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            return None
+        count, extra = divmod(p.stat().st_size - _HEADER.size, _RECORD.size)
+        if extra:
+            # A torn record from a crash mid-append; drop it.
+            with p.open("r+b") as f:
+                f.truncate(_HEADER.size + count * _RECORD.size)
+        return count
+
+    def rebuild_sidecar(self) -> int:
+        """Rewrite `episodes.idx` by scanning `episodes.jsonl`; returns the record count."""
+        with self._lock:
+            self._unmap()
+            self._sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._sidecar_path.open("wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION))
+            self._count = 0
+            self._index_from(0)
+            return self._count
+
+    def _index_from(self, start: int) -> None:
+        self._torn = False
         if not self._path.exists():
             return
-        for ln in self._path.read_text(encoding="utf-8").splitlines():
-            if not ln.strip():
-                continue
-            obj = json.loads(ln)
-            ep = Episode(
-                episode_id=int(obj["episode_id"]),
-                started_at=float(obj["started_at"]),
-                ended_at=float(obj["ended_at"]),
-                summary=str(obj["summary"]),
-                top_terms=list(obj.get("top_terms", [])),
-                distress_avg=float(obj.get("distress_avg", 0.0)),
-            )
-            self._episodes.append(ep)
-            self._next_id = max(self._next_id, ep.episode_id + 1)
+        records: List[bytes] = []
+        with self._path.open("rb") as f:
+            f.seek(start)
+            off = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    self._torn = True
+                    break
+                eps = _parse([line])
+                if eps:
+                    ep = eps[0]
+                    records.append(_RECORD.pack(ep.episode_id, ep.started_at, ep.ended_at, off, len(line)))
+                off += len(line)
+        if records:
+            with self._sidecar_path.open("ab") as f:
+                f.write(b"".join(records))
+            self._count += len(records)
+            self._unmap()
+
+    def _unmap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _record(self, i: int) -> Tuple[int, float, float, int, int]:
+        if self._map is None:
+            with self._sidecar_path.open("rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return _RECORD.unpack_from(self._map, _HEADER.size + i * _RECORD.size)
+
+    def _read(self, off: int, ln: int) -> Optional[Episode]:
+        with self._path.open("rb") as f:
+            f.seek(off)
+            eps = _parse([f.read(ln)])
+        return eps[0] if eps else None
+
+    def _position(self, episode_id: int) -> Optional[int]:
+        if not self._count:
+            return None
+        # Ids are dense in practice, so the first guess usually lands.
+        guess = episode_id - self._record(0)[0]
+        if 0 <= guess < self._count and self._record(guess)[0] == episode_id:
+            return guess
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < episode_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._record(lo)[0] == episode_id:
+            return lo
+        return None
+
+    def _catch_up_index(self) -> None:
+        # Index episodes written before the term index existed or lost in a crash.
+        with self._lock:
+            i = self._count
+            while i and self._record(i - 1)[0] > self.index.max_doc_id:
+                i -= 1
+            for j in range(i, self._count):
+                _, _, _, off, ln = self._record(j)
+                ep = self._read(off, ln)
+                if ep is not None:
+                    self._index_episode(ep)
+
+    def _index_episode(self, ep: Episode) -> None:
+        self.index.add_document(self._locale.segmenter, ep.episode_id, " ".join(ep.top_terms), ts=ep.ended_at)
+
+    # ---- writes ----
 
     def add(self, started_at: float, ended_at: float, turns: List[str], distress_scores: List[float]) -> Episode:
-        seg = Segmenter(self._locale.alphabet)
+        seg = self._locale.segmenter
         counts: Dict[str, int] = {}
         for t in turns:
             for tok in seg.tokens(t):
@@ -73,30 +259,82 @@ class EpisodicMemory:
             top_terms=top_terms,
             distress_avg=float(distress_avg),
         )
-        self._next_id += 1
-        self._episodes.append(ep)
-
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        with self._path.open("a", encoding="utf-8") as f:
-            f.write(
-                json.dumps(
-                    {
-                        "episode_id": ep.episode_id,
-                        "started_at": ep.started_at,
-                        "ended_at": ep.ended_at,
-                        "summary": ep.summary,
-                        "top_terms": ep.top_terms,
-                        "distress_avg": ep.distress_avg,
-                    },
-                    ensure_ascii=False,
-                )
-                + "\n"
-            )
+        data = (json.dumps(_episode_to_json(ep), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._next_id += 1
+            self._episodes.append(ep)
+            del self._episodes[:-_RECENT]
+
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open("ab") as f:
+                if self._torn:
+                    # Terminate a partial line left by a crash instead of gluing onto it.
+                    f.write(b"\n")
+                    self._torn = False
+                off = f.tell()
+                f.write(data)
+            with self._sidecar_path.open("ab") as f:
+                f.write(_RECORD.pack(ep.episode_id, ep.started_at, ep.ended_at, off, len(data)))
+            self._count += 1
+            self._unmap()
+            self._index_episode(ep)
         return ep
 
+    # ---- reads ----
+
     def recent(self, n: int = 8) -> List[Episode]:
-        return list(self._episodes)[-n:]
+        if n <= len(self._episodes) or len(self._episodes) < _RECENT:
+            return list(self._episodes)[-n:]
+        return _parse(tail_lines(self._path, n))
+
+    def get_many(self, episode_ids: Iterable[int]) -> List[Episode]:
+        """Episodes for `episode_ids` in the given order; unknown ids are skipped."""
+        cached = {ep.episode_id: ep for ep in self._episodes}
+        out: List[Episode] = []
+        with self._lock:
+            for eid in episode_ids:
+                ep = cached.get(eid)
+                if ep is None:
+                    i = self._position(eid)
+                    if i is None:
+                        continue
+                    _, _, _, off, ln = self._record(i)
+                    ep = self._read(off, ln)
+                if ep is not None:
+                    out.append(ep)
+        return out
+
+    def covering(self, timestamps: Iterable[float]) -> List[int]:
+        """Ids of episodes whose span contains any of `timestamps` (binary search on start times)."""
+        out: List[int] = []
+        with self._lock:
+            for ts in timestamps:
+                lo, hi = 0, self._count
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if self._record(mid)[1] <= ts:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                if lo:
+                    eid, _, ended_at, _, _ = self._record(lo - 1)
+                    if ts <= ended_at and eid not in out:
+                        out.append(eid)
+        return out
+
+    def search(self, query: str, limit: int = 6, max_segments: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top `limit` (episode_id, score) pairs for `query` by their top terms, best first."""
+        return self.index.search(self._locale.segmenter, query, limit=limit, max_segments=max_segments)
 
     def all(self) -> List[Episode]:
-        return list(self._episodes)
+        if not self._path.exists():
+            return []
+        with self._path.open("r", encoding="utf-8") as f:
+            return _parse(f)
+
+    def count(self) -> int:
+        return self._count
 
+    def close(self) -> None:
+        with self._lock:
+            self._unmap()
@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import heapq
 import json
 import math
-from dataclasses import dataclass
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from memory.segment import IndexSegment, Postings, SegmentInfo, read_info, write_segment
 from nlp.segmenter import Segmenter
 
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
 
 _STOP = {
     "the",
@@ -45,8 +59,7 @@ _STOP = {
 }
 
 
-def _terms(seg: Segmenter, text: str) -> Set[str]:
-    terms: Set[str] = set()
+def _tokens(seg: Segmenter, text: str) -> Iterator[str]:
     for t in seg.tokens(text):
         tl = t.lower()
         tl = tl.strip("._-,'\"!?()[]{}<>:;")
@@ -56,64 +69,913 @@ def _terms(seg: Segmenter, text: str) -> Set[str]:
             continue
         if any(ch.isdigit() for ch in tl) and len(tl) > 24:
             continue
-        terms.add(tl)
-    return terms
+        yield tl
+
+
+def _terms(seg: Segmenter, text: str) -> Set[str]:
+    return set(_tokens(seg, text))
+
+
+def _term_counts(seg: Segmenter, text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for tl in _tokens(seg, text):
+        counts[tl] = counts.get(tl, 0) + 1
+    return counts
+
+
+class PostingsTable:
+    """
+    Postings and doc frequencies behind one term -> slot table. Each term
+    string is interned and stored once; postings are `array('I')` (4 bytes per
+    doc id, amortized growth), term frequencies a parallel `array('H')` per
+    term and doc frequencies one `array('I')`. `lens` holds every document's
+    length, including documents without indexed terms.
+    """
+
+    __slots__ = ("slots", "postings", "tfs", "df", "lens")
+
+    def __init__(self) -> None:
+        self.slots: Dict[str, int] = {}
+        self.postings: List[array] = []
+        self.tfs: List[array] = []
+        self.df = array("I")
+        self.lens: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def add(self, term: str, doc_id: int, tf: int = 1) -> None:
+        tf = min(int(tf), 0xFFFF)
+        i = self.slots.get(term)
+        if i is None:
+            self.slots[sys.intern(term)] = len(self.postings)
+            self.postings.append(array("I", (doc_id,)))
+            self.tfs.append(array("H", (tf,)))
+            self.df.append(1)
+            return
+        lst = self.postings[i]
+        if lst[-1] != doc_id:
+            lst.append(doc_id)
+            self.tfs[i].append(tf)
+            self.df[i] += 1
+        else:
+            self.tfs[i][-1] = min(self.tfs[i][-1] + tf, 0xFFFF)
+
+    def add_document(self, doc_id: int, terms: List[str], tfs: List[int]) -> None:
+        for term, tf in zip(terms, tfs):
+            self.add(term, doc_id, tf)
+        self.lens[doc_id] = sum(tfs)
+
+    def get(self, term: str) -> Optional[Tuple[array, array]]:
+        i = self.slots.get(term)
+        return (self.postings[i], self.tfs[i]) if i is not None else None
+
+    def doc_freq(self, term: str) -> int:
+        i = self.slots.get(term)
+        return self.df[i] if i is not None else 0
+
+    def items(self) -> Iterator[Tuple[str, int, array, array]]:
+        for term, i in self.slots.items():
+            yield term, self.df[i], self.postings[i], self.tfs[i]
+
+    def after(self, doc_id: int, minus: Dict[str, int]) -> "PostingsTable":
+        """A copy keeping only doc ids above `doc_id`; `minus` is subtracted from frequencies."""
+        out = PostingsTable()
+        for term, df, lst, tfs in self.items():
+            cut = bisect_right(lst, doc_id)
+            if cut < len(lst):
+                out.slots[term] = len(out.postings)
+                out.postings.append(lst[cut:])
+                out.tfs.append(tfs[cut:])
+                out.df.append(df - minus.get(term, 0))
+        out.lens = {d: n for d, n in self.lens.items() if d > doc_id}
+        return out
+
+    def nbytes(self) -> int:
+        # Array payloads plus per-term object overhead; strings are shared with `slots`.
+        return (
+            sum(sys.getsizeof(a) for a in self.postings)
+            + sum(sys.getsizeof(a) for a in self.tfs)
+            + sys.getsizeof(self.df)
+            + sys.getsizeof(self.lens)
+            + sys.getsizeof(self.slots)
+            + sum(sys.getsizeof(t) for t in self.slots)
+        )
+
+
+# Deltas are folded into their week's segment once they reach this many
+# documents or this fraction of the current week, whichever is larger, so merge
+# I/O amortizes to O(new documents) instead of O(history) per compaction.
+MERGE_MIN_DOCS = 256
+MERGE_RATIO = 0.25
+
+# Okapi BM25 parameters: term frequency saturation and length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Weeks with at least this many postings for the query are scanned with numpy.
+NP_MIN_POSTINGS = 2048
+# Lists longer than this are probed a block at a time; shorter ones are
+# decoded whole, which in pure Python is cheaper than block lookups.
+PROBE_BLOCKS_MIN = 1024
+
+WEEK_S = 7 * 86400
+
+
+def week_of(ts: float) -> int:
+    return int(ts // WEEK_S)
+
+
+def partition_path(root: Path, week: int) -> Path:
+    return root / f"w{week:06d}.bin"
 
 
 @dataclass
-class InvertedIndex:
+class Partition:
+    """
+    One week of the index: a segment file plus its header. The file is mapped
+    on first use and may be dropped again by `InvertedIndex.unload_idle`.
+    """
+
+    week: int
     path: Path
-    postings: Dict[str, List[int]]
-    doc_freq: Dict[str, int]
-    doc_count: int
+    info: SegmentInfo
+    seg: Optional[IndexSegment] = None
+    last_used: float = 0.0
 
     @staticmethod
-    def open(path: Path) -> "InvertedIndex":
-        if path.exists():
-            data = json.loads(path.read_text(encoding="utf-8"))
-            return InvertedIndex(
-                path=path,
-                postings={k: list(map(int, v)) for k, v in data.get("postings", {}).items()},
-                doc_freq={k: int(v) for k, v in data.get("doc_freq", {}).items()},
-                doc_count=int(data.get("doc_count", 0)),
-            )
-        return InvertedIndex(path=path, postings={}, doc_freq={}, doc_count=0)
+    def open(week: int, path: Path) -> "Partition":
+        return Partition(week=week, path=path, info=read_info(path))
 
-    def flush(self) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(
-            json.dumps({"postings": self.postings, "doc_freq": self.doc_freq, "doc_count": self.doc_count}, ensure_ascii=False),
-            encoding="utf-8",
-        )
+    def load(self) -> IndexSegment:
+        seg = self.seg
+        if seg is None:
+            seg = self.seg = IndexSegment(self.path)
+        self.last_used = time.monotonic()
+        return seg
 
-    def add_document(self, seg: Segmenter, doc_id: int, text: str) -> None:
-        terms = _terms(seg, text)
-        if not terms:
-            self.doc_count += 1
+
+@dataclass
+class InvertedIndex:
+    """
+    Weekly index partitions under `root`: one memory-mapped segment per week
+    (`w<week>.bin`, see `memory.segment`) plus in-memory postings for newer
+    documents, which are also written to an append-only delta log
+    (`delta.jsonl`, one document per line).
+
+    `add_document` appends to the log; `flush` only merges when enough deltas
+    have accumulated, so idle periods cost nothing. `open` replays deltas newer
+    than their week's segment, which also covers a crash in the middle of a
+    merge.
+
+    Weeks before the newest are sealed into `sealed-<week>.bin`: per term, the
+    summed doc frequency and, as its "postings", the sealed weeks holding it
+    with its max tf in each. Corpus statistics never touch old segments, and
+    idle sealed segments can be unmapped.
+
+    `search` ranks with BM25, scaled down per week of age (`half_life_days`).
+    Each week is bounded from the summary before it is opened and skipped
+    when it cannot beat the k-th best hit, so weeks without the query's rarer
+    terms (or too old to matter) are never decoded.
+    """
+
+    root: Path
+    half_life_days: float = 180.0
+    unload_after_s: float = 900.0
+    partitions: Dict[int, Partition] = field(default_factory=dict)
+    summary: Optional[IndexSegment] = None
+    sealed_until: int = 0
+    delta: Dict[int, PostingsTable] = field(default_factory=dict)
+    doc_count: int = 0
+    total_len: int = 0
+    max_doc_id: int = 0
+    newest_week: int = 0
+    delta_docs: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def delta_path(self) -> Path:
+        return self.root / "delta.jsonl"
+
+    @property
+    def merging_path(self) -> Path:
+        return self.root / "delta.merging"
+
+    @staticmethod
+    def open(root: Path, half_life_days: float = 180.0, unload_after_s: float = 900.0) -> "InvertedIndex":
+        _migrate_flat_index(root)
+        idx = InvertedIndex(root=root, half_life_days=float(half_life_days), unload_after_s=float(unload_after_s))
+        for path in sorted(root.glob("w*.bin")):
+            week = int(path.stem[1:])
+            part = Partition.open(week, path)
+            idx.partitions[week] = part
+            idx.doc_count += part.info.doc_count
+            idx.total_len += part.info.total_len
+            idx.max_doc_id = max(idx.max_doc_id, part.info.max_doc_id)
+            idx.newest_week = max(idx.newest_week, week)
+        idx._open_summary()
+        idx._replay(idx.merging_path)
+        idx._replay(idx.delta_path)
+        return idx
+
+    def _open_summary(self) -> None:
+        found = sorted(self.root.glob("sealed-*.bin"))
+        for stale in found[:-1]:
+            stale.unlink(missing_ok=True)
+        if found:
+            until = int(found[-1].stem.split("-", 1)[1])
+            seg = IndexSegment.open(found[-1])
+            covered = sum(p.info.doc_count for w, p in self.partitions.items() if w < until)
+            if seg is not None and seg.doc_count == covered:
+                self.summary, self.sealed_until = seg, until
+                return
+            # Out of step with the week files (e.g. copied in by hand): rebuild.
+            if seg is not None:
+                seg.close()
+            found[-1].unlink(missing_ok=True)
+        self.summary, self.sealed_until = self._reseal(None, 0, self.newest_week, self.partitions)
+
+    def _replay(self, log: Path) -> None:
+        if not log.exists():
             return
-        for term in terms:
-            lst = self.postings.get(term)
-            if lst is None:
-                self.postings[term] = [doc_id]
-            else:
-                if not lst or lst[-1] != doc_id:
-                    lst.append(doc_id)
-            self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+        good = 0
+        with log.open("rb") as f:
+            for ln in f:
+                if not ln.endswith(b"\n"):
+                    break  # torn final line after a crash
+                good += len(ln)
+                try:
+                    obj = json.loads(ln)
+                    doc_id = int(obj["doc"])
+                    terms = [str(t) for t in obj["terms"]]
+                    tfs = [int(v) for v in obj["tf"]]
+                    week = int(obj["week"]) if "week" in obj else self.newest_week
+                except Exception:
+                    continue
+                part = self.partitions.get(week)
+                if part is not None and doc_id <= part.info.max_doc_id:
+                    continue  # already merged into its week's segment
+                self._apply(doc_id, terms, tfs, week)
+                self.delta_docs += 1
+        if good < log.stat().st_size:
+            # Drop the partial record so the next append starts on a fresh line.
+            with log.open("r+b") as f:
+                f.truncate(good)
+
+    def _apply(self, doc_id: int, terms: List[str], tfs: List[int], week: int) -> None:
+        table = self.delta.get(week)
+        if table is None:
+            table = self.delta[week] = PostingsTable()
+        table.add_document(doc_id, terms, tfs)
+        self.total_len += table.lens[doc_id]
         self.doc_count += 1
+        self.max_doc_id = max(self.max_doc_id, doc_id)
+        self.newest_week = max(self.newest_week, week)
+
+    def add_document(self, seg: Segmenter, doc_id: int, text: str, ts: Optional[float] = None) -> None:
+        doc = _doc_terms(seg, doc_id, text)
+        with self._lock:
+            # Weeks never go backwards, so a skewed clock cannot reopen a sealed week.
+            week = max(week_of(time.time() if ts is None else ts), self.newest_week)
+            self._log([doc], week)
+
+    def add_documents(self, seg: Segmenter, docs: Iterable[Tuple[int, str, float]]) -> int:
+        """
+        Index `(doc_id, text, ts)` in doc id order, as when rebuilding from
+        `turns.jsonl`. A week that is complete once a newer one starts, and
+        holds nothing yet, is written straight to its segment; the newest week
+        (and any week that already has documents) goes through the delta log
+        like `add_document`. Returns how many documents were indexed.
+        """
+        week: Optional[int] = None
+        pending: List[Tuple[int, List[str], List[int]]] = []
+        wrote = False
+        n = 0
+        for doc_id, text, ts in docs:
+            w = max(week_of(ts), self.newest_week, week if week is not None else 0)
+            if week is not None and w != week:
+                wrote |= self._write_week(week, pending)
+                pending = []
+            week = w
+            pending.append(_doc_terms(seg, doc_id, text))
+            n += 1
+        if pending:
+            with self._lock:
+                self._log(pending, week)
+        if wrote:
+            self.summary, self.sealed_until = self._reseal(self.summary, self.sealed_until, self.newest_week, self.partitions)
+        return n
+
+    def _log(self, docs: List[Tuple[int, List[str], List[int]]], week: int) -> None:
+        # Append documents to the delta log and apply them; the caller holds the lock.
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self.delta_path.open("a", encoding="utf-8") as f:
+            for doc_id, terms, tfs in docs:
+                f.write(json.dumps({"doc": doc_id, "week": week, "terms": terms, "tf": tfs}, ensure_ascii=False) + "\n")
+        for doc_id, terms, tfs in docs:
+            self._apply(doc_id, terms, tfs, week)
+            self.delta_docs += 1
+
+    def _write_week(self, week: int, docs: List[Tuple[int, List[str], List[int]]]) -> bool:
+        """Write a new week's documents as its segment; returns False if the week had some already and they were logged instead."""
+        with self._lock:
+            if week in self.partitions or week in self.delta:
+                self._log(docs, week)
+                return False
+        table = PostingsTable()
+        for doc_id, terms, tfs in docs:
+            table.add_document(doc_id, terms, tfs)
+        min_id, doc_lens = _merged_lens(None, table.lens)
+        path = partition_path(self.root, week)
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_segment(path, table.items(), doc_count=len(docs), max_doc_id=max(table.lens), min_doc_id=min_id, doc_lens=doc_lens)
+        part = Partition.open(week, path)
+        with self._lock:
+            self.partitions[week] = part
+            self.doc_count += part.info.doc_count
+            self.total_len += part.info.total_len
+            self.max_doc_id = max(self.max_doc_id, part.info.max_doc_id)
+            self.newest_week = max(self.newest_week, week)
+        return True
+
+    @property
+    def dirty(self) -> bool:
+        return self.delta_docs > 0
+
+    def sync(self) -> None:
+        """fsync the delta logs; segments are fsynced when written."""
+        with self._lock:
+            for p in (self.merging_path, self.delta_path):
+                if p.exists():
+                    with p.open("rb") as f:
+                        os.fsync(f.fileno())
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Merge the delta log into the week segments if it is due (or `force`).
+        Deltas are durable as soon as they are appended, so skipping is safe.
+        Returns True when a merge happened.
+        """
+        if not self.dirty:
+            return False
+        current = self.partitions.get(self.newest_week)
+        current_docs = current.info.doc_count if current is not None else 0
+        if not force and self.delta_docs < max(MERGE_MIN_DOCS, int(current_docs * MERGE_RATIO)):
+            return False
+        self.merge()
+        return True
+
+    def merge(self) -> None:
+        # Snapshot the (small) delta and rotate the log under the lock; the
+        # merge with the week segments and the writes happen outside it, so
+        # concurrent `add_document` calls only wait for the copy.
+        with self._lock:
+            if self.merging_path.exists():
+                # A previous merge died before cleanup; its deltas are in memory.
+                with self.merging_path.open("a", encoding="utf-8") as out:
+                    if self.delta_path.exists():
+                        out.write(self.delta_path.read_text(encoding="utf-8"))
+                self.delta_path.unlink(missing_ok=True)
+            elif self.delta_path.exists():
+                os.replace(self.delta_path, self.merging_path)
+            delta = {
+                week: ({term: (df, lst.tolist(), tfs.tolist()) for term, df, lst, tfs in table.items()}, dict(table.lens))
+                for week, table in self.delta.items()
+            }
+            max_id = self.max_doc_id
+            merged = self.delta_docs
+            newest = self.newest_week
+            partitions = dict(self.partitions)
+            summary, sealed_until = self.summary, self.sealed_until
+
+        written: Dict[int, Partition] = {}
+        for week, (items, lens) in sorted(delta.items()):
+            if not lens:
+                continue
+            part = partitions.get(week)
+            base = part.load() if part is not None else None
+            min_id, doc_lens = _merged_lens(base, lens)
+            path = partition_path(self.root, week)
+            write_segment(
+                path,
+                _merged_items(base, items),
+                doc_count=(base.doc_count if base is not None else 0) + len(lens),
+                max_doc_id=max(lens),
+                min_doc_id=min_id,
+                doc_lens=doc_lens,
+            )
+            written[week] = Partition.open(week, path)
+        partitions.update(written)
+        new_summary, new_until = self._reseal(summary, sealed_until, newest, partitions)
+        self.merging_path.unlink(missing_ok=True)
+
+        with self._lock:
+            # Keep only what arrived while the merge ran. Replaced segments are
+            # unmapped by GC once no search holds them.
+            self.partitions.update(written)
+            self.summary, self.sealed_until = new_summary, new_until
+            for week, (items, _) in delta.items():
+                table = self.delta[week].after(max_id, {term: df for term, (df, _, _) in items.items()})
+                if table.lens:
+                    self.delta[week] = table
+                else:
+                    del self.delta[week]
+            self.delta_docs -= merged
+
+    def _reseal(
+        self, summary: Optional[IndexSegment], sealed_until: int, until: int, partitions: Dict[int, Partition]
+    ) -> Tuple[Optional[IndexSegment], int]:
+        """Fold weeks in [sealed_until, until) into a new summary segment (week lists, no doc ids)."""
+        weeks = sorted(w for w in partitions if sealed_until <= w < until)
+        if not weeks:
+            return summary, sealed_until
+        # term -> [doc freq, ascending weeks, max tf in each]
+        acc: Dict[str, List] = {}
+        docs = 0
+        if summary is not None:
+            docs += summary.doc_count
+            for term, df, held, max_tfs in summary.items():
+                acc[term] = [df, list(held), list(max_tfs)]
+        for week in weeks:
+            seg = partitions[week].load()
+            docs += seg.doc_count
+            for term, df, max_tf in seg.term_stats():
+                cur = acc.get(term)
+                if cur is None:
+                    acc[term] = [df, [week], [max_tf]]
+                else:
+                    cur[0] += df
+                    cur[1].append(week)
+                    cur[2].append(max_tf)
+        path = self.root / f"sealed-{until:06d}.bin"
+        write_segment(
+            path,
+            ((term, df, held, max_tfs) for term, (df, held, max_tfs) in acc.items()),
+            doc_count=docs,
+            max_doc_id=0,
+            min_doc_id=1,  # no doc length table
+            doc_lens=[],
+        )
+        if summary is not None and summary.path != path:
+            summary.path.unlink(missing_ok=True)
+        return IndexSegment(path), until
+
+    def unload_idle(self, now: Optional[float] = None) -> int:
+        """Drop the maps of sealed weeks unused for `unload_after_s`; returns how many."""
+        if self.unload_after_s <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        dropped = 0
+        for week, part in list(self.partitions.items()):
+            if week < self.newest_week and part.seg is not None and now - part.last_used > self.unload_after_s:
+                part.seg = None  # unmapped by GC once no search holds it
+                dropped += 1
+        return dropped
+
+    def _week_postings(self, week: int, term: str) -> Optional["_TermPostings"]:
+        """`term`'s postings within one week, or None if it has none there."""
+        part = self.partitions.get(week)
+        base = part.load() if part is not None else None
+        i = base.slot(term) if base is not None else None
+        table = self.delta.get(week)
+        got = table.get(term) if table is not None else None
+        tail = None
+        if got is not None:
+            # Copy under the lock: a concurrent add may be appending to both arrays.
+            with self._lock:
+                tail = (got[0].tolist(), got[1].tolist())
+        if i is None and not (tail and tail[0]):
+            return None
+        return _TermPostings(base if i is not None else None, i, tail)
+
+    def _weeks(self) -> List[int]:
+        """Weeks holding documents, newest first."""
+        return sorted(set(self.partitions) | set(self.delta), reverse=True)
+
+    def term_postings(self, term: str) -> List[int]:
+        out: List[int] = []
+        for week in reversed(self._weeks()):
+            got = self._week_postings(week, term)
+            if got is not None:
+                out += got.postings()[0]
+        return out
+
+    def _term_weeks(self, term: str) -> Tuple[int, Dict[int, int]]:
+        """Corpus doc frequency of `term` and its max tf by week; sealed weeks come from the summary."""
+        df = 0
+        weeks: Dict[int, int] = {}
+        summary = self.summary
+        if summary is not None:
+            i = summary.slot(term)
+            if i is not None:
+                df = summary.doc_freq_at(i)
+                weeks.update(zip(*summary.postings_at(i)))
+        for week, part in list(self.partitions.items()):
+            if week >= self.sealed_until:
+                seg = part.load()
+                i = seg.slot(term)
+                if i is not None:
+                    df += seg.doc_freq_at(i)
+                    weeks[week] = seg.max_tf_at(i)
+        for week, table in list(self.delta.items()):
+            got = table.get(term)
+            if got is not None:
+                df += table.doc_freq(term)
+                weeks[week] = max(weeks.get(week, 0), max(got[1]))
+        return df, weeks
+
+    def term_doc_freq(self, term: str) -> int:
+        return self._term_weeks(term)[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Size of the index: what is held in memory vs. mapped from week segments."""
+        parts = list(self.partitions.values())
+        return {
+            "docs": self.doc_count,
+            "delta_docs": self.delta_docs,
+            "delta_terms": sum(len(t) for t in self.delta.values()),
+            "delta_bytes": sum(t.nbytes() for t in self.delta.values()),
+            "segments": len(parts),
+            "segments_loaded": sum(1 for p in parts if p.seg is not None),
+            "segment_bytes": sum(p.info.size for p in parts),
+            "sealed_until_week": self.sealed_until,
+        }
 
     def idf(self, term: str) -> float:
-        df = self.doc_freq.get(term, 0)
-        return math.log((1.0 + self.doc_count) / (1.0 + df)) + 1.0
+        df = self.term_doc_freq(term)
+        return math.log(1.0 + (self.doc_count - df + 0.5) / (df + 0.5))
 
-    def search(self, seg: Segmenter, query: str, limit: int = 12) -> List[Tuple[int, float]]:
+    def recency(self, week: int) -> float:
+        """Score multiplier for documents `newest_week - week` weeks old."""
+        if self.half_life_days <= 0:
+            return 1.0
+        return 0.5 ** (max(0, self.newest_week - week) * 7.0 / self.half_life_days)
+
+    def search(
+        self, seg: Segmenter, query: str, limit: int = 12, max_segments: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Top `limit` (doc_id, score) pairs, best first; ties go to the newer doc.
+        The score is BM25 times the doc's week `recency`. Weeks are searched
+        newest first, at most `max_segments` of them; scores are exact, since
+        a week (or, within one, a doc) is only skipped when its upper bound
+        cannot reach the current k-th best.
+        """
         qterms = _terms(seg, query)
-        if not qterms:
+        if not qterms or limit <= 0 or not self.doc_count:
             return []
-        scores: Dict[int, float] = {}
+        k1, b = BM25_K1, BM25_B
+        avgdl = max(self.total_len / self.doc_count, 1e-9)
+
+        # (term, idf) from corpus-wide statistics, and per week the terms it
+        # holds (by index into `terms`) with their max tf there.
+        terms: List[Tuple[str, float]] = []
+        held: Dict[int, List[Tuple[int, int]]] = {}
         for term in qterms:
-            postings = self.postings.get(term, [])
-            w = self.idf(term)
-            for doc_id in postings[-400:]:
-                scores[doc_id] = scores.get(doc_id, 0.0) + w
-        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+            df, weeks = self._term_weeks(term)
+            if not df:
+                continue
+            for week, max_tf in weeks.items():
+                held.setdefault(week, []).append((len(terms), max_tf))
+            terms.append((term, math.log(1.0 + (self.doc_count - df + 0.5) / (df + 0.5))))
+        if not terms:
+            return []
+
+        if max_segments is not None:
+            keep = set(self._weeks()[: max(1, int(max_segments))])
+            held = {week: tfs for week, tfs in held.items() if week in keep}
+        # Length normalization k1 * (1 - b + b * dl / avgdl) as nb0 + nb1 * dl.
+        nb0, nb1 = k1 * (1.0 - b), k1 * b / avgdl
+        top: List[Tuple[float, int]] = []
+        # Newest first, so a hit tied with the k-th best is already older than it.
+        for week in sorted(held, reverse=True):
+            factor = self.recency(week)
+            if len(top) == limit and factor * sum(_bound(terms[t][1], max_tf, nb0, nb1) for t, max_tf in held[week]) < top[0][0]:
+                continue  # bounded out without opening the week
+            lists = []
+            for t, _ in held[week]:
+                term, w = terms[t]
+                got = self._week_postings(week, term)
+                if got is not None:
+                    lists.append((factor * _bound(w, got.max_tf, nb0, nb1), factor * w, got))
+            if not lists:
+                continue
+            part = self.partitions.get(week)
+            base = part.load() if part is not None else None
+            table = self.delta.get(week)
+            _max_score(
+                lists,
+                top,
+                limit,
+                nb0,
+                nb1,
+                base.lens if base is not None else None,
+                (base.min_doc_id, base.max_doc_id) if base is not None and base.doc_count else (0, -1),
+                table.lens if table is not None else {},
+            )
+        return [(doc, score) for score, doc in sorted(top, reverse=True)]
+
+
+class _TermPostings:
+    """
+    One term's postings: a segment list plus the delta tail (newer ids).
+    `postings` decodes it all; `block` and `tf` look up single docs in long
+    lists, decoding only the block that holds each (see
+    `IndexSegment.skips_at`), and `flat` hands out short ones whole.
+    """
+
+    def __init__(self, seg: Optional[IndexSegment], slot: Optional[int], tail: Optional[Postings]):
+        self.seg = seg
+        self.slot = slot
+        self.tail = tail
+        self.max_tf = max(seg.max_tf_at(slot) if seg is not None else 0, max(tail[1]) if tail else 0)
+        self.size = (seg.doc_freq_at(slot) if seg is not None else 0) + (len(tail[0]) if tail else 0)
+        # Last doc id and max tf per block, read on the first probe.
+        self.last: Optional[List[int]] = None
+        self.max_tfs: List[int] = []
+        self.skips: List[Tuple[int, int, int]] = []
+        self.blocks: Dict[int, Postings] = {}
+
+    def doc_range(self) -> Tuple[int, int]:
+        """Bounds on the doc ids in the list, from the segment header and the tail."""
+        lo = self.seg.min_doc_id if self.seg is not None else self.tail[0][0]
+        return lo, self.tail[0][-1] if self.tail else self.seg.max_doc_id
+
+    def skip_data(self) -> Tuple[List[int], List[int]]:
+        """Last doc id and max tf of each block."""
+        if self.last is None:
+            self._read_skips()
+        return self.last, self.max_tfs
+
+    def _read_skips(self) -> List[int]:
+        last: List[int] = []
+        if self.seg is not None:
+            self.skips = self.seg.skips_at(self.slot)
+            if self.skips:
+                last = [s[0] for s in self.skips]
+                self.max_tfs = [s[2] for s in self.skips]
+            else:
+                # A list without skips is one block.
+                last, self.max_tfs = [self.seg.max_doc_id], [self.seg.max_tf_at(self.slot)]
+        if self.tail:
+            self.blocks[len(last)] = self.tail
+            last.append(self.tail[0][-1])
+            self.max_tfs.append(max(self.tail[1]))
+        self.last = last
+        return last
 
+    def postings(self) -> Postings:
+        docs, tfs = self.seg.postings_at(self.slot) if self.seg is not None else ([], [])
+        if self.tail:
+            docs, tfs = docs + self.tail[0], tfs + self.tail[1]
+        return docs, tfs
+
+    def flat(self) -> Optional[Postings]:
+        """The whole list if it is short or stored as one block, else None."""
+        if self.size <= PROBE_BLOCKS_MIN:
+            return self.postings()
+        if self.last is None:
+            self._read_skips()
+        return None if self.skips else self.postings()
+
+    def block(self, doc: int) -> int:
+        """Index of the only block that may hold `doc` (`len(self.max_tfs)` if none)."""
+        return bisect_left(self.last or self._read_skips(), doc)
+
+    def tf(self, k: int, doc: int) -> int:
+        got = self.blocks.get(k)
+        if got is None:
+            got = self.blocks[k] = self.seg.block_at(self.slot, k, self.skips)
+        docs, tfs = got
+        p = bisect_left(docs, doc)
+        return tfs[p] if p < len(docs) and docs[p] == doc else 0
+
+
+def _bound(w: float, max_tf: int, nb0: float, nb1: float) -> float:
+    # Largest BM25 contribution of a term: its max tf in a doc of that many
+    # tokens, the shortest that can hold it.
+    return w * max_tf * (BM25_K1 + 1.0) / (max_tf + nb0 + nb1 * max_tf) if max_tf else 0.0
+
+
+def _max_score(
+    lists: List[Tuple[float, float, _TermPostings]],
+    top: List[Tuple[float, int]],
+    limit: int,
+    nb0: float,
+    nb1: float,
+    lens,
+    span: Tuple[int, int],
+    delta_lens: Dict[int, int],
+) -> None:
+    """
+    Push the best docs of one week into the `top` min-heap of (score, doc).
+    `lists` are (upper bound, weight, postings) per query term.
+
+    MaxScore, term at a time: lists are accumulated from the highest bound
+    down. Partial scores only grow, so the k-th best partial (or the heap's
+    minimum) is a lower bound on the final k-th score (`threshold`); once the
+    lists left sum to a bound below it, a doc found only there cannot make
+    the top k and those lists are just probed for the candidates already found.
+    Long lists are probed a block at a time: a block whose max tf can't lift
+    the doc over the threshold is never decoded.
+    """
+    k1 = BM25_K1
+    lists.sort(key=lambda x: x[0])
+    bound_sum = list(accumulate(x[0] for x in lists))
+    threshold = top[0][0] if len(top) == limit else 0.0
+    if np is not None and sum(pl.size for _, _, pl in lists) >= NP_MIN_POSTINGS:
+        first, threshold, cands = _scan_np(lists, bound_sum, threshold, limit, nb0, nb1, lens, span, delta_lens)
+    else:
+        first, threshold, cands = _scan(lists, bound_sum, threshold, limit, nb0, nb1, lens, span, delta_lens)
+
+    # A doc is out once (its bound, doc) falls below `floor`: under the
+    # threshold, or tied with the heap's minimum but older.
+    floor = (threshold, top[0][1] if len(top) == limit and top[0][0] == threshold else -1)
+    rest = bound_sum[first - 1] if first else 0.0
+    probes = [(w * (k1 + 1.0), plist, plist.flat()) for _, w, plist in lists[:first]]
+    # Best partial first (newer doc on ties) until the rest are out.
+    for score, doc, nrm in cands:
+        if (score + rest, doc) < floor:
+            break
+        for i in range(first - 1, -1, -1):
+            if (score + bound_sum[i], doc) < floor:
+                break
+            wk, plist, flat = probes[i]
+            if flat is not None:
+                docs, tfs = flat
+                p = bisect_left(docs, doc)
+                tf = tfs[p] if p < len(docs) and docs[p] == doc else 0
+            else:
+                b = plist.block(doc)
+                if b == len(plist.max_tfs):
+                    continue
+                m = plist.max_tfs[b]
+                if (score + wk * m / (m + nrm) + (bound_sum[i - 1] if i else 0.0), doc) < floor:
+                    break
+                tf = plist.tf(b, doc)
+            if tf:
+                score += wk * tf / (tf + nrm)
+        else:
+            if len(top) < limit:
+                heapq.heappush(top, (score, doc))
+            elif (score, doc) > top[0]:
+                heapq.heapreplace(top, (score, doc))
+            else:
+                continue
+            if len(top) == limit:
+                threshold = max(threshold, top[0][0])
+                floor = (threshold, top[0][1] if top[0][0] == threshold else -1)
+
+
+def _scan(
+    lists: List[Tuple[float, float, _TermPostings]],
+    bound_sum: List[float],
+    threshold: float,
+    limit: int,
+    nb0: float,
+    nb1: float,
+    lens,
+    span: Tuple[int, int],
+    delta_lens: Dict[int, int],
+) -> Tuple[int, float, List[Tuple[float, int, float]]]:
+    """
+    Accumulate the essential lists of `_max_score`. Returns how many lists are
+    left to probe, the raised threshold and the candidates that can still
+    reach it as (partial score, doc, length norm), best first.
+    """
+    k1 = BM25_K1
+    lo, hi = span
+    partial: Dict[int, float] = {}
+    norms: Dict[int, float] = {}
+    first = len(lists)
+    while first and bound_sum[first - 1] >= threshold:
+        first -= 1
+        _, w, plist = lists[first]
+        docs, tfs = plist.postings()
+        wk = w * (k1 + 1.0)
+        for doc, tf in zip(docs, tfs):
+            nrm = norms.get(doc)
+            if nrm is None:
+                nrm = norms[doc] = nb0 + nb1 * (lens[doc - lo] if lo <= doc <= hi else delta_lens.get(doc, 0))
+                partial[doc] = wk * tf / (tf + nrm)
+            else:
+                partial[doc] += wk * tf / (tf + nrm)
+        # Only a threshold above the next bound stops the scan early.
+        if first and len(partial) >= limit and bound_sum[first - 1] >= threshold:
+            threshold = max(threshold, heapq.nlargest(limit, partial.values())[-1])
+
+    rest = bound_sum[first - 1] if first else 0.0
+    cands = [(score, doc, norms[doc]) for doc, score in partial.items() if score + rest >= threshold]
+    cands.sort(reverse=True)
+    return first, threshold, cands
+
+
+def _scan_np(
+    lists: List[Tuple[float, float, _TermPostings]],
+    bound_sum: List[float],
+    threshold: float,
+    limit: int,
+    nb0: float,
+    nb1: float,
+    lens,
+    span: Tuple[int, int],
+    delta_lens: Dict[int, int],
+) -> Tuple[int, float, Iterable[Tuple[float, int, float]]]:
+    """
+    `_scan` over dense arrays, for weeks with long lists. Scores are added in
+    the same order, so they come out bit for bit the same; candidates are
+    also dropped when the max tf of the blocks they would be in, at their own
+    length, can't lift them to the threshold.
+    """
+    k1 = BM25_K1
+    lo, hi = span
+    ends = [pl.doc_range() for _, _, pl in lists]
+    base = min(a for a, _ in ends)
+    acc = np.zeros(max(b for _, b in ends) - base + 1)
+    norms = np.zeros(len(acc))
+    seen = np.zeros(len(acc), dtype=bool)
+    seg_lens = np.asarray(lens) if lo <= hi else None
+    first = len(lists)
+    while first and bound_sum[first - 1] >= threshold:
+        first -= 1
+        _, w, plist = lists[first]
+        docs, tfs = plist.postings()
+        ids = np.array(docs, dtype=np.int64)
+        dl = np.zeros(len(ids))
+        n_seg = int(np.searchsorted(ids, hi, side="right")) if seg_lens is not None else 0
+        if n_seg:
+            dl[:n_seg] = seg_lens[ids[:n_seg] - lo]
+        if n_seg < len(docs):
+            dl[n_seg:] = [delta_lens.get(d, 0) for d in docs[n_seg:]]
+        nrm = nb0 + nb1 * dl
+        tf = np.array(tfs, dtype=np.float64)
+        at = ids - base
+        acc[at] += w * (k1 + 1.0) * tf / (tf + nrm)
+        norms[at] = nrm
+        seen[at] = True
+        if first and bound_sum[first - 1] >= threshold:
+            found = acc[seen]
+            if len(found) >= limit:
+                threshold = max(threshold, float(np.partition(found, -limit)[-limit]))
+
+    cand = np.flatnonzero(seen)
+    scores = acc[cand]
+    nrm = norms[cand]
+    docs_at = cand + base
+    ub = scores.copy()
+    for _, w, plist in lists[:first]:
+        last, max_tfs = plist.skip_data()
+        m = np.array(max_tfs + [0], dtype=np.float64)[np.searchsorted(np.array(last, dtype=np.int64), docs_at)]
+        ub += w * (k1 + 1.0) * m / (m + nrm)
+    keep = np.flatnonzero(ub >= threshold)
+    keep = keep[np.lexsort((-docs_at[keep], -scores[keep]))]
+    return first, threshold, zip(scores[keep].tolist(), docs_at[keep].tolist(), nrm[keep].tolist())
+
+
+def _migrate_flat_index(root: Path) -> None:
+    # A single-file index (`index.bin` or legacy `index.json`, with its delta
+    # logs) holds no document times, so it cannot be split into weeks. Drop
+    # it; the owner re-indexes from its source with `add_documents`, which
+    # files each document under the week of its own timestamp.
+    root.mkdir(parents=True, exist_ok=True)
+    flat = root.with_suffix(".bin")
+    for old in (flat, root.with_suffix(".json"), flat.with_suffix(".delta.merging"), flat.with_suffix(".delta.jsonl")):
+        if old.exists():
+            old.unlink()
+
+
+def _doc_terms(seg: Segmenter, doc_id: int, text: str) -> Tuple[int, List[str], List[int]]:
+    counts = _term_counts(seg, text)
+    terms = sorted(counts)
+    return doc_id, terms, [counts[t] for t in terms]
+
+
+def _merged_lens(base: Optional[IndexSegment], delta: Dict[int, int]) -> Tuple[int, array]:
+    # Doc length table for base + delta; delta ids are all above the base's.
+    if base is not None and base.doc_count:
+        min_id, lens = base.min_doc_id, base.doc_lens()
+    else:
+        min_id, lens = min(delta, default=0), array("H")
+    for doc_id in sorted(delta):
+        gap = doc_id - min_id - len(lens)
+        if gap > 0:
+            lens.extend([0] * gap)
+        lens.append(min(delta[doc_id], 0xFFFF))
+    return min_id, lens
+
+
+def _merged_items(
+    base: Optional[IndexSegment], delta: Dict[str, Tuple[int, List[int], List[int]]]
+) -> Iterator[Tuple[str, int, List[int], List[int]]]:
+    # Delta doc ids are all newer than the base's, so postings concatenate.
+    seen: Set[str] = set()
+    if base is not None:
+        for term, df, docs, tfs in base.items():
+            extra = delta.get(term)
+            if extra is not None:
+                seen.add(term)
+                yield term, df + extra[0], docs + extra[1], tfs + extra[2]
+            else:
+                yield term, df, docs, tfs
+    for term, (df, docs, tfs) in delta.items():
+        if term not in seen:
+            yield term, df, docs, tfs
@@ -4,27 +4,38 @@ import json
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from cognition.contradiction import Claim
+from cognition.contradiction import Claim, KnownFacts
 from locale_pack.loader import LocalePack
 from logging.stream import EventBus
 from memory.episodic import EpisodicMemory
 from memory.index import InvertedIndex
 from memory.semantic import SemanticMemory
 from memory.stm import ShortTermMemory, Turn
-from nlp.segmenter import Segmenter
+from memory.tail import tail_lines
+from memory.turn_store import TurnStore, turn_from_json, turn_to_json
+from memory.wal import WriteAheadLog, read_snapshot, write_snapshot
 
 
 @dataclass(frozen=True)
 class RetrievedMemory:
     turns: List[Turn]
     episodes: List[dict]
-    facts: List[Claim]
+    facts: KnownFacts
 
 
 class MemoryStore:
-    def __init__(self, data_dir: Path, locale: LocalePack, stm_turns: int, events: EventBus):
+    def __init__(
+        self,
+        data_dir: Path,
+        locale: LocalePack,
+        stm_turns: int,
+        events: EventBus,
+        index_half_life_days: float = 180.0,
+        index_unload_after_s: float = 900.0,
+        wal_fsync_interval_s: float = 1.0,
+    ):
         self._data_dir = data_dir
         self._locale = locale
         self._events = events
@@ -32,14 +43,33 @@ class MemoryStore:
         self._turns_path = data_dir / "turns.jsonl"
         self._feedback_path = data_dir / "feedback.jsonl"
         self._semantic_path = data_dir / "semantic.json"
-        self._index_path = data_dir / "index.json"
+        self._index_path = data_dir / "index"
         self._episodes_path = data_dir / "episodes.jsonl"
+        self._wal_path = data_dir / "wal.jsonl"
+
+        # Per-turn state changes go to the WAL; state files are snapshots
+        # written at checkpoints (`compact`).
+        self.wal = WriteAheadLog(self._wal_path, fsync_interval_s=wal_fsync_interval_s)
+        state, semantic_seq = read_snapshot(self._semantic_path)
+        self.wal.advance(semantic_seq)
 
         self.stm = ShortTermMemory(max_turns=stm_turns)
-        self.semantic = SemanticMemory.load(self._semantic_path)
-        self.episodes = EpisodicMemory(self._episodes_path, locale=locale)
-        self.index = InvertedIndex.open(self._index_path)
-        self._seg = Segmenter(locale.alphabet)
+        self.semantic = SemanticMemory.from_json(state) if state is not None else SemanticMemory()
+        self.episodes = EpisodicMemory(
+            self._episodes_path,
+            locale=locale,
+            index_half_life_days=index_half_life_days,
+            index_unload_after_s=index_unload_after_s,
+        )
+        self.index = InvertedIndex.open(
+            self._index_path, half_life_days=index_half_life_days, unload_after_s=index_unload_after_s
+        )
+        self.turns = TurnStore(self._turns_path)
+        self._seg = locale.segmenter
+
+        self._replay(semantic_seq)
+        self.wal.on_commit("turn", self._write_turns)
+        self.wal.add_snapshot(("turn", "semantic"), self._snapshot)
 
         self._next_turn_id = 1
         self._load_turns_into_stm(max_turns=stm_turns)
@@ -51,50 +81,101 @@ class MemoryStore:
         self._last_turn_ts: float = self.semantic.last_turn_ts or 0.0
 
     @staticmethod
-    def open(data_dir: Path, locale: LocalePack, stm_turns: int, events: EventBus) -> "MemoryStore":
+    def open(
+        data_dir: Path,
+        locale: LocalePack,
+        stm_turns: int,
+        events: EventBus,
+        index_half_life_days: float = 180.0,
+        index_unload_after_s: float = 900.0,
+        wal_fsync_interval_s: float = 1.0,
+    ) -> "MemoryStore":
         data_dir.mkdir(parents=True, exist_ok=True)
-        return MemoryStore(data_dir=data_dir, locale=locale, stm_turns=stm_turns, events=events)
+        return MemoryStore(
+            data_dir=data_dir,
+            locale=locale,
+            stm_turns=stm_turns,
+            events=events,
+            index_half_life_days=index_half_life_days,
+            index_unload_after_s=index_unload_after_s,
+            wal_fsync_interval_s=wal_fsync_interval_s,
+        )
+
+    def _replay(self, semantic_seq: int) -> None:
+        # turns.jsonl is the source of truth for the index: first index the
+        # stored turns it lacks, each under the week of its own timestamp.
+        # That is every turn after upgrading from a flat index, or turns whose
+        # postings were lost (checkpointed out of the WAL, but the delta log
+        # never reached the disk). The WAL's turns are all newer.
+        self.index.add_documents(self._seg, ((t.turn_id, t.text, t.ts) for t in self.turns.after(self.index.max_doc_id)))
+        # Re-apply what the WAL holds beyond the snapshots: semantic updates
+        # newer than semantic.json, and turns that never reached turns.jsonl
+        # or the index before a crash.
+        for seq, kind, op in self.wal.records(kinds=("turn", "semantic")):
+            if kind == "turn":
+                self._write_turns([op])
+            elif seq > semantic_seq:
+                self._apply_semantic(op)
+
+    def _write_turns(self, ops: List[dict]) -> None:
+        # Runs once the WAL record is committed: both turns of an exchange go
+        # out in a single append.
+        last = self.turns.last_turn_id or 0
+        turns = [turn_from_json(op) for op in ops]
+        self.turns.append_many([t for t in turns if t.turn_id > last])
+        for t in turns:
+            if t.turn_id > self.index.max_doc_id:
+                self.index.add_document(self._seg, t.turn_id, t.text, ts=t.ts)
+
+    def _snapshot(self, seq: int) -> None:
+        # The checkpoint drops `turn` ops, so everything they produced must be on disk.
+        self.turns.sync()
+        self.index.sync()
+        write_snapshot(self._semantic_path, self.semantic.to_json(), seq)
 
     def _load_turns_into_stm(self, max_turns: int) -> None:
-        if not self._turns_path.exists():
-            return
-        lines = self._turns_path.read_text(encoding="utf-8").splitlines()
-        tail = lines[-max_turns:]
-        for ln in tail:
-            obj = json.loads(ln)
-            t = Turn(
-                turn_id=int(obj["turn_id"]),
-                ts=float(obj["ts"]),
-                role=str(obj["role"]),
-                text=str(obj["text"]),
-                meta=dict(obj.get("meta", {})),
-            )
+        # Seek from the end: startup cost stays flat as history grows.
+        for ln in tail_lines(self._turns_path, max_turns):
+            try:
+                t = turn_from_json(json.loads(ln))
+            except Exception:
+                continue
             self.stm.add(t)
             self._next_turn_id = max(self._next_turn_id, t.turn_id + 1)
+        last = self.turns.last_turn_id
+        if last is not None:
+            self._next_turn_id = max(self._next_turn_id, last + 1)
 
     def add_turn(self, role: str, text: str, meta: Optional[dict] = None) -> Turn:
         now = time.time()
         t = Turn(turn_id=self._next_turn_id, ts=now, role=role, text=text, meta=meta or {})
         self._next_turn_id += 1
 
-        self._turns_path.parent.mkdir(parents=True, exist_ok=True)
-        with self._turns_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps({"turn_id": t.turn_id, "ts": t.ts, "role": t.role, "text": t.text, "meta": t.meta}, ensure_ascii=False) + "\n")
-
         self.stm.add(t)
-        self.index.add_document(self._seg, t.turn_id, t.text)
+        # turns.jsonl and the index are written when the WAL record commits.
+        self.wal.log("turn", turn_to_json(t))
 
         self._events.publish("memory.turn", {"turn_id": t.turn_id, "role": role})
         return t
 
     def update_semantic(self, claims: List[Claim], topic_salience: Dict[str, float], distress_score: float) -> None:
-        now = time.time()
-        self.semantic.update_facts(claims, now=now)
-        self.semantic.update_topics(topic_salience, now=now)
-        self.semantic.update_emotions(distress_score)
+        op = {
+            "claims": [c.__dict__ for c in claims],
+            "topics": dict(topic_salience),
+            "distress": float(distress_score),
+            "ts": time.time(),
+        }
+        with self.wal.batch():
+            self._apply_semantic(op)
+            self.wal.log("semantic", op)
+        self._events.publish("memory.semantic", {"facts": len(self.semantic.facts), "topics": self.semantic.topic_count})
+
+    def _apply_semantic(self, op: dict) -> None:
+        now = float(op["ts"])
+        self.semantic.update_facts([Claim(**c) for c in op["claims"]], now=now)
+        self.semantic.update_topics({str(k): float(v) for k, v in op["topics"].items()}, now=now)
+        self.semantic.update_emotions(float(op["distress"]))
         self.semantic.last_turn_ts = now
-        self.semantic.save(self._semantic_path)
-        self._events.publish("memory.semantic", {"facts": len(self.semantic.facts), "topics": len(self.semantic.topics)})
 
     def add_feedback(self, payload: dict) -> None:
         payload = dict(payload)
@@ -104,35 +185,27 @@ class MemoryStore:
             f.write(json.dumps(payload, ensure_ascii=False) + "\n")
         self._events.publish("memory.feedback", {"kind": payload.get("kind")})
 
-    def retrieve(self, query: str, limit_turns: int = 10, scan_tail_lines: int = 8000) -> RetrievedMemory:
-        hits = self.index.search(self._seg, query, limit=limit_turns)
-        if not hits:
-            return RetrievedMemory(turns=[], episodes=[], facts=self.semantic.facts)
-        ids = {doc_id for doc_id, _ in hits}
-
-        turns: List[Turn] = []
-        if self._turns_path.exists():
-            # Scan from the end; typical usage wants recent related context.
-            tail_n = max(500, int(scan_tail_lines))
-            for ln in reversed(self._turns_path.read_text(encoding="utf-8").splitlines()[-tail_n:]):
-                if len(turns) >= limit_turns:
-                    break
-                obj = json.loads(ln)
-                tid = int(obj["turn_id"])
-                if tid not in ids:
-                    continue
-                turns.append(
-                    Turn(
-                        turn_id=tid,
-                        ts=float(obj["ts"]),
-                        role=str(obj["role"]),
-                        text=str(obj["text"]),
-                        meta=dict(obj.get("meta", {})),
-                    )
-                )
+    def iter_turns(self, role: Optional[str] = None) -> Iterator[Turn]:
+        """Stream stored turns oldest-first without loading the whole file."""
+        return self.turns.iter(role)
 
+    def retrieve(
+        self, query: str, limit_turns: int = 10, scan_segments: Optional[int] = None, limit_episodes: int = 6
+    ) -> RetrievedMemory:
+        # `scan_segments` caps how many weekly index segments are searched (newest first).
+        hits = self.index.search(self._seg, query, limit=limit_turns, max_segments=scan_segments)
+
+        # One sidecar lookup and one line read per hit.
+        turns = self.turns.get_many([doc_id for doc_id, _ in hits])[:limit_turns]
         turns.sort(key=lambda t: t.turn_id)
-        episodes = [e.__dict__ for e in self.episodes.recent(6)]
+
+        # Episodes whose top terms match the query, then the ones the
+        # retrieved turns belong to, up to `limit_episodes`.
+        episode_ids = [eid for eid, _ in self.episodes.search(query, limit=limit_episodes, max_segments=scan_segments)]
+        for eid in self.episodes.covering(t.ts for t in turns):
+            if eid not in episode_ids:
+                episode_ids.append(eid)
+        episodes = [e.__dict__ for e in self.episodes.get_many(sorted(episode_ids[:limit_episodes]))]
         return RetrievedMemory(turns=turns, episodes=episodes, facts=self.semantic.facts)
 
     def maybe_close_episode(self) -> None:
@@ -165,11 +238,18 @@ class MemoryStore:
         self._last_turn_ts = now
 
     def compact(self) -> None:
-        # Flush index and semantic; JSONL is append-only (intentionally).
+        # Merge the index delta and checkpoint the WAL (snapshot every state
+        # file, then drop the log); JSONL is append-only (intentionally).
         self.index.flush()
-        self.semantic.save(self._semantic_path)
+        self.index.unload_idle()
+        self.episodes.index.flush()
+        self.episodes.index.unload_idle()
+        self.wal.checkpoint()
         self._events.publish("memory.compact", {"doc_count": self.index.doc_count})
 
     def close(self) -> None:
         self.maybe_close_episode()
         self.compact()
+        self.turns.close()
+        self.episodes.close()
+        self.wal.close()
@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+
+# Layout (little-endian):
+#   header      magic, version, n_terms, doc_count, max_doc_id, min_doc_id, total_len
+#   doc_len     uint16[max_doc_id - min_doc_id + 1]   indexed tokens per doc id (0 = none)
+#   term_off    uint32[n_terms + 1]   byte offsets into the term blob
+#   post_off    uint64[n_terms + 1]   byte offsets into the postings blob
+#   doc_freq    uint32[n_terms]
+#   max_tf      uint16[n_terms]       largest term frequency in each posting list
+#   skip_off    uint64[n_terms + 1]   byte offsets into the skip blob
+#   term blob   utf-8 terms, sorted by their encoded bytes
+#   postings    per term: varint(first id), varint(tf), varint(gap), varint(tf), ...
+#   skips       per term of more than _BLOCK postings, per block of _BLOCK:
+#               uint64 last id, uint32 end byte within the term's postings, uint16 max tf
+_MAGIC = b"SXIX"
+_VERSION = 2
+_BLOCK = 64
+_HEADER = struct.Struct("<4sIIQQQQ")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_SKIP = struct.Struct("<QIH")
+_MAX_U16 = 0xFFFF
+
+# (ascending doc ids, parallel term frequencies)
+Postings = Tuple[List[int], List[int]]
+
+
+def encode_postings(doc_ids: Sequence[int], tfs: Sequence[int], prev: int = 0) -> bytes:
+    """Ascending doc ids and their term frequencies as interleaved LEB128 varints (ids delta-encoded from `prev`)."""
+    out = bytearray()
+    for d, tf in zip(doc_ids, tfs):
+        for v in (d - prev, min(int(tf), _MAX_U16)):
+            while v >= 0x80:
+                out.append((v & 0x7F) | 0x80)
+                v >>= 7
+            out.append(v)
+        prev = d
+    return bytes(out)
+
+
+def decode_postings(buf, start: int = 0, end: Optional[int] = None, prev: int = 0) -> Postings:
+    data = bytes(buf[start:end])
+    if not data:
+        return [], []
+    if np is not None and len(data) >= 256:
+        vals = _decode_np(data)
+        vals[0] += prev
+        return np.cumsum(vals[0::2]).tolist(), vals[1::2].tolist()
+    vals = _varints(data)
+    vals[0] += prev
+    return list(accumulate(vals[0::2])), vals[1::2]
+
+
+def _varints(data: bytes) -> List[int]:
+    # Only the first id is usually wider than a byte; the rest decode in C.
+    first, i = _varint(data, 0)
+    rest = data[i:]
+    if rest.isascii():
+        return [first, *rest]
+    return [first] + [tok[0] if len(tok) == 1 else _varint(tok, 0)[0] for tok in _VARINT.findall(rest)]
+
+
+_VARINT = re.compile(rb"[\x80-\xff]*[\x00-\x7f]")
+
+
+def _varint(data: bytes, i: int) -> Tuple[int, int]:
+    v = 0
+    shift = 0
+    for j in range(i, len(data)):
+        b = data[j]
+        v |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return v, j + 1
+        shift += 7
+    return v, len(data)
+
+
+def _decode_np(data: bytes):
+    b = np.frombuffer(data, dtype=np.uint8)
+    is_start = np.empty(len(b), dtype=bool)
+    is_start[0] = True
+    is_start[1:] = b[:-1] < 0x80
+    # Byte position within its varint gives the 7-bit shift.
+    idx = np.arange(len(b))
+    pos = idx - np.maximum.accumulate(np.where(is_start, idx, 0))
+    return np.add.reduceat((b & 0x7F).astype(np.int64) << (7 * pos), np.flatnonzero(is_start))
+
+
+@dataclass(frozen=True)
+class SegmentInfo:
+    """Header fields of a segment file, read without mapping it."""
+
+    n_terms: int
+    doc_count: int
+    max_doc_id: int
+    min_doc_id: int
+    total_len: int
+    size: int
+
+
+def read_info(path: Path) -> SegmentInfo:
+    with path.open("rb") as f:
+        magic, version, n, doc_count, max_doc_id, min_doc_id, total_len = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path} is not an index segment (v{_VERSION})")
+    return SegmentInfo(int(n), int(doc_count), int(max_doc_id), int(min_doc_id), int(total_len), path.stat().st_size)
+
+
+class IndexSegment:
+    """
+    Read-only, memory-mapped index segment. Opening only reads the header;
+    a lookup binary-searches the sorted term dictionary and decodes one
+    posting list, so resident memory and startup do not grow with vocabulary.
+    """
+
+    def __init__(self, path: Path, cache_terms: int = 128):
+        self.path = path
+        # Decoded posting lists (by term) or blocks (by term and block) of
+        # recently queried terms; bounded, not per vocabulary.
+        self._cache: "OrderedDict[object, Postings]" = OrderedDict()
+        self._cache_terms = int(cache_terms)
+        # Dictionary lookups of recent terms (-1 = absent); cheap to keep more of.
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        with path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, doc_count, max_doc_id, min_doc_id, total_len = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not an index segment (v{_VERSION})")
+        self.n_terms = int(n)
+        self.doc_count = int(doc_count)
+        self.max_doc_id = int(max_doc_id)
+        self.min_doc_id = int(min_doc_id)
+        self.total_len = int(total_len)
+        span = _span(self.doc_count, self.min_doc_id, self.max_doc_id)
+        # Doc lengths by `doc_id - min_doc_id`, read straight from the map.
+        self.lens = memoryview(self._map)[_HEADER.size : _HEADER.size + 2 * span].cast("H")
+        self._term_off = _HEADER.size + 2 * span
+        self._toff = memoryview(self._map)[self._term_off : self._term_off + 4 * (n + 1)].cast("I")
+        self._post_off = self._term_off + 4 * (n + 1)
+        self._df = self._post_off + 8 * (n + 1)
+        self._max_tf = self._df + 4 * n
+        self._skip_off = self._max_tf + 2 * n
+        self._terms = self._skip_off + 8 * (n + 1)
+        self._postings = self._terms + _U32.unpack_from(self._map, self._term_off + 4 * n)[0]
+        self._skips = self._postings + _U64.unpack_from(self._map, self._post_off + 8 * n)[0]
+
+    @staticmethod
+    def open(path: Path) -> Optional["IndexSegment"]:
+        return IndexSegment(path) if path.exists() else None
+
+    def __len__(self) -> int:
+        return self.n_terms
+
+    def _term_bytes(self, i: int) -> bytes:
+        return self._map[self._terms + self._toff[i] : self._terms + self._toff[i + 1]]
+
+    def slot(self, term: str) -> Optional[int]:
+        hit = self._slots.get(term)
+        if hit is not None:
+            self._slots.move_to_end(term)
+            return hit if hit >= 0 else None
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = lo if lo < self.n_terms and self._term_bytes(lo) == key else -1
+        self._slots[term] = found
+        if len(self._slots) > 8 * self._cache_terms:
+            self._slots.popitem(last=False)
+        return found if found >= 0 else None
+
+    def doc_freq_at(self, i: int) -> int:
+        return _U32.unpack_from(self._map, self._df + 4 * i)[0]
+
+    def max_tf_at(self, i: int) -> int:
+        return _U16.unpack_from(self._map, self._max_tf + 2 * i)[0]
+
+    def postings_at(self, i: int) -> Postings:
+        hit = self._cache.get(i)
+        if hit is not None:
+            self._cache.move_to_end(i)
+            return hit
+        a, b = struct.unpack_from("<QQ", self._map, self._post_off + 8 * i)
+        out = decode_postings(self._map, self._postings + a, self._postings + b)
+        self._cache[i] = out
+        if len(self._cache) > self._cache_terms:
+            self._cache.popitem(last=False)
+        return out
+
+    def skips_at(self, i: int) -> List[Tuple[int, int, int]]:
+        """(last doc id, end byte, max tf) per block of term `i`'s postings; empty if it is one block."""
+        a, b = struct.unpack_from("<QQ", self._map, self._skip_off + 8 * i)
+        return list(_SKIP.iter_unpack(self._map[self._skips + a : self._skips + b]))
+
+    def block_at(self, i: int, k: int, skips: Sequence[Tuple[int, int, int]]) -> Postings:
+        """Decode only block `k` of term `i`; `skips` is `skips_at(i)`."""
+        if not skips:
+            return self.postings_at(i)
+        hit = self._cache.get((i, k))
+        if hit is not None:
+            self._cache.move_to_end((i, k))
+            return hit
+        a = self._postings + _U64.unpack_from(self._map, self._post_off + 8 * i)[0]
+        start, prev = (skips[k - 1][1], skips[k - 1][0]) if k else (0, 0)
+        out = decode_postings(self._map, a + start, a + skips[k][1], prev)
+        self._cache[(i, k)] = out
+        if len(self._cache) > self._cache_terms:
+            self._cache.popitem(last=False)
+        return out
+
+    def doc_freq(self, term: str) -> int:
+        i = self.slot(term)
+        return self.doc_freq_at(i) if i is not None else 0
+
+    def postings(self, term: str) -> Postings:
+        i = self.slot(term)
+        return self.postings_at(i) if i is not None else ([], [])
+
+    def doc_len(self, doc_id: int) -> int:
+        i = doc_id - self.min_doc_id
+        return self.lens[i] if 0 <= i < len(self.lens) else 0
+
+    def doc_lens(self) -> array:
+        """Copy of the doc length table (index 0 is `min_doc_id`)."""
+        return array("H", self.lens.tobytes())
+
+    def term_stats(self) -> Iterator[Tuple[str, int, int]]:
+        """(term, doc_freq, max_tf) in term order, without decoding postings."""
+        for i in range(self.n_terms):
+            yield self._term_bytes(i).decode("utf-8"), self.doc_freq_at(i), self.max_tf_at(i)
+
+    def items(self) -> Iterator[Tuple[str, int, List[int], List[int]]]:
+        """(term, doc_freq, doc ids, term frequencies) in term order."""
+        for i in range(self.n_terms):
+            a, b = struct.unpack_from("<QQ", self._map, self._post_off + 8 * i)
+            docs, tfs = decode_postings(self._map, self._postings + a, self._postings + b)
+            yield self._term_bytes(i).decode("utf-8"), self.doc_freq_at(i), docs, tfs
+
+    def close(self) -> None:
+        self.lens.release()
+        self._toff.release()
+        self._map.close()
+
+
+def write_segment(
+    path: Path,
+    items: Iterable[Tuple[str, int, Sequence[int], Sequence[int]]],
+    doc_count: int,
+    max_doc_id: int,
+    min_doc_id: int,
+    doc_lens: Sequence[int],
+) -> None:
+    """
+    Write `(term, doc_freq, ascending doc ids, term frequencies)` items as a
+    segment; `doc_lens[i]` is the length of doc `min_doc_id + i`. Items may come
+    in any order; the file is written to a temp name and renamed into place.
+    """
+    rows = sorted(((t.encode("utf-8"), df, d, tf) for t, df, d, tf in items), key=lambda r: r[0])
+    n = len(rows)
+    span = _span(doc_count, min_doc_id, max_doc_id)
+    lens = array("H", (min(int(v), _MAX_U16) for v in doc_lens[:span]))
+    lens.extend([0] * (span - len(lens)))
+    term_off = [0]
+    post_off = [0]
+    skip_off = [0]
+    blobs: List[bytes] = []
+    skips: List[bytes] = []
+    for term, _, docs, tfs in rows:
+        term_off.append(term_off[-1] + len(term))
+        blob = bytearray()
+        skip = bytearray()
+        if len(docs) > _BLOCK:
+            for k in range(0, len(docs), _BLOCK):
+                blob += encode_postings(docs[k : k + _BLOCK], tfs[k : k + _BLOCK], docs[k - 1] if k else 0)
+                last = docs[min(k + _BLOCK, len(docs)) - 1]
+                skip += _SKIP.pack(last, len(blob), min(max(tfs[k : k + _BLOCK]), _MAX_U16))
+        else:
+            blob += encode_postings(docs, tfs)
+        blobs.append(bytes(blob))
+        skips.append(bytes(skip))
+        post_off.append(post_off[-1] + len(blob))
+        skip_off.append(skip_off[-1] + len(skip))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, n, int(doc_count), int(max_doc_id), int(min_doc_id), sum(lens)))
+        f.write(lens.tobytes())
+        f.write(struct.pack(f"<{n + 1}I", *term_off))
+        f.write(struct.pack(f"<{n + 1}Q", *post_off))
+        f.write(struct.pack(f"<{n}I", *(df for _, df, _, _ in rows)))
+        f.write(struct.pack(f"<{n}H", *(min(max(tfs, default=0), _MAX_U16) for _, _, _, tfs in rows)))
+        f.write(struct.pack(f"<{n + 1}Q", *skip_off))
+        for term, _, _, _ in rows:
+            f.write(term)
+        for blob in blobs:
+            f.write(blob)
+        for skip in skips:
+            f.write(skip)
+        # The rename must not become durable before the data it points at.
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _span(doc_count: int, min_doc_id: int, max_doc_id: int) -> int:
+    return max(0, max_doc_id - min_doc_id + 1) if doc_count else 0
+
+
+def _write_counted(dst: Path, postings: dict, doc_freq: dict, doc_count: int, max_doc_id: int) -> None:
+    # Sources without doc lengths or tfs: every indexed term counted once.
+    # Only `convert_json_index` (and so only tools/bench_index.py) uses this.
+    counts: dict = {}
+    for docs in postings.values():
+        for d in docs:
+            counts[d] = counts.get(d, 0) + 1
+    min_id = min(counts, default=0)
+    lens = [counts.get(d, 0) for d in range(min_id, max_doc_id + 1)] if counts else []
+    write_segment(
+        dst,
+        ((t, doc_freq.get(t, len(p)), p, [1] * len(p)) for t, p in postings.items()),
+        doc_count=doc_count,
+        max_doc_id=max_doc_id,
+        min_doc_id=min_id,
+        doc_lens=lens,
+    )
+
+
+def convert_json_index(src: Path, dst: Path) -> IndexSegment:
+    """
+    Convert a legacy `index.json` (postings/doc_freq/doc_count) into a segment.
+    Used by tools/bench_index.py only: a running install drops flat indexes
+    and rebuilds from `turns.jsonl` (see `memory.index`).
+    """
+    data = json.loads(src.read_text(encoding="utf-8"))
+    postings = {k: sorted(set(map(int, v))) for k, v in data.get("postings", {}).items()}
+    doc_freq = {k: int(v) for k, v in data.get("doc_freq", {}).items()}
+    max_id = data.get("max_doc_id")
+    if max_id is None:
+        max_id = max((v[-1] for v in postings.values() if v), default=0)
+    _write_counted(dst, postings, doc_freq, doc_count=int(data.get("doc_count", 0)), max_doc_id=int(max_id))
+    return IndexSegment(dst)
@@ -1,63 +1,139 @@
 from __future__ import annotations
 
+import heapq
 import json
+import math
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from cognition.contradiction import Claim
+from cognition.contradiction import Claim, KnownFacts
+
+
+FACT_TTL_DAYS = 60.0  # low-confidence facts not seen for this long are dropped
+FACT_KEEP_CONFIDENCE = 0.55
+TOPIC_DECAY = 0.995  # per turn
+TOPIC_FLOOR = 0.02
+_LOG_DECAY = math.log(TOPIC_DECAY)
 
 
 def _ema(prev: float, x: float, alpha: float) -> float:
     return (1 - alpha) * prev + alpha * x
 
 
+def _topic_rank(v: float, at: int) -> float:
+    # log of v * TOPIC_DECAY**(n - at) minus the n-dependent term all topics
+    # share, so the order of topics doesn't change as turns pass.
+    return math.log(v) - at * _LOG_DECAY if v > 0 else -math.inf
+
+
+def _turns_above_floor(v: float) -> int:
+    # Smallest k >= 1 with v * TOPIC_DECAY**k < TOPIC_FLOOR.
+    if v < TOPIC_FLOOR:
+        return 1
+    k = max(1, int(math.log(TOPIC_FLOOR / v) / math.log(TOPIC_DECAY)))
+    while v * TOPIC_DECAY**k >= TOPIC_FLOOR:
+        k += 1
+    while k > 1 and v * TOPIC_DECAY ** (k - 1) < TOPIC_FLOOR:
+        k -= 1
+    return k
+
+
 @dataclass
 class SemanticMemory:
-    facts: List[Claim] = field(default_factory=list)
-    fact_last_seen: Dict[str, float] = field(default_factory=dict)
-    topics: Dict[str, float] = field(default_factory=dict)  # salience
+    facts: KnownFacts = field(default_factory=KnownFacts)
+    # "key:value" -> last seen, oldest first, so expiry stops at the first recent one.
+    fact_last_seen: "OrderedDict[str, float]" = field(default_factory=OrderedDict)
     emotions: Dict[str, float] = field(default_factory=lambda: {"distress": 0.0})
     unresolved: Dict[str, float] = field(default_factory=dict)  # topic->ts first seen
     last_turn_ts: float = 0.0
+    # Topic salience decays per turn; stored as (salience, turn it was set)
+    # and decayed on read, with a heap of (turn it falls below the floor,
+    # topic, turn set) to drop faded topics without touching the rest and a
+    # max-heap of (-rank, topic, turn set) for the most salient one. Entries
+    # whose turn no longer matches `_topics` are stale and skipped.
+    _topics: Dict[str, Tuple[float, int]] = field(default_factory=dict, repr=False)
+    _topic_turn: int = field(default=0, repr=False)
+    _topic_expiry: List[Tuple[int, str, int]] = field(default_factory=list, repr=False)
+    _topic_rank: List[Tuple[float, str, int]] = field(default_factory=list, repr=False)
+
+    @property
+    def topics(self) -> Dict[str, float]:
+        """Current salience per topic."""
+        n = self._topic_turn
+        return {t: v * TOPIC_DECAY ** (n - at) for t, (v, at) in self._topics.items()}
+
+    @property
+    def topic_count(self) -> int:
+        return len(self._topics)
+
+    def top_topic(self) -> Optional[Tuple[str, float]]:
+        """The most salient topic and its current salience, or None."""
+        heap = self._topic_rank
+        while heap:
+            _, topic, at = heap[0]
+            cur = self._topics.get(topic)
+            if cur is not None and cur[1] == at:
+                return topic, cur[0] * TOPIC_DECAY ** (self._topic_turn - at)
+            heapq.heappop(heap)
+        return None
 
     def update_facts(self, claims: List[Claim], now: float) -> None:
         for c in claims:
-            key = f"{c.key}:{c.value}"
-            self.fact_last_seen[key] = now
             # Replace existing (same key/value) with higher confidence, keep polarity.
-            replaced = False
-            for i, kf in enumerate(self.facts):
-                if kf.key == c.key and kf.value == c.value:
-                    conf = max(kf.confidence, c.confidence)
-                    self.facts[i] = Claim(key=kf.key, value=kf.value, polarity=c.polarity, confidence=conf)
-                    replaced = True
-                    break
-            if not replaced:
-                self.facts.append(c)
-
-        # Drop very old, low-confidence facts.
-        keep: List[Claim] = []
-        for c in self.facts:
+            kf = self.facts.get(c.key, c.value)
+            if kf is not None:
+                c = Claim(key=kf.key, value=kf.value, polarity=c.polarity, confidence=max(kf.confidence, c.confidence))
+            self.facts.put(c)
             k = f"{c.key}:{c.value}"
-            age_days = (now - self.fact_last_seen.get(k, now)) / 86400.0
-            if c.confidence >= 0.55:
-                keep.append(c)
-            elif age_days < 60:
-                keep.append(c)
-        self.facts = keep
+            self.fact_last_seen[k] = now
+            self.fact_last_seen.move_to_end(k)
+
+        # Drop very old, low-confidence facts. Confidence never goes down, so
+        # entries past the horizon are no longer needed for the others either.
+        cutoff = now - FACT_TTL_DAYS * 86400.0
+        while self.fact_last_seen:
+            k, seen = next(iter(self.fact_last_seen.items()))
+            if seen > cutoff:
+                break
+            self.fact_last_seen.popitem(last=False)
+            key, _, value = k.partition(":")
+            kf = self.facts.get(key, value)
+            if kf is not None and kf.confidence < FACT_KEEP_CONFIDENCE:
+                self.facts.remove(key, value)
 
     def update_topics(self, topic_counts: Dict[str, float], now: float) -> None:
+        prev = self._topic_turn
+        n = self._topic_turn = prev + 1
         for topic, inc in topic_counts.items():
-            self.topics[topic] = _ema(self.topics.get(topic, 0.0), min(1.0, inc), 0.18)
+            v, at = self._topics.get(topic, (0.0, prev))
+            # EMA on the salience as of the last turn, then this turn's decay.
+            v = _ema(v * TOPIC_DECAY ** (prev - at), min(1.0, inc), 0.18) * TOPIC_DECAY
             if inc >= 0.9 and topic not in self.unresolved:
                 self.unresolved[topic] = now
-        # Gentle decay
-        for topic in list(self.topics.keys()):
-            self.topics[topic] *= 0.995
-            if self.topics[topic] < 0.02:
-                self.topics.pop(topic, None)
+            if v < TOPIC_FLOOR:
+                self._topics.pop(topic, None)
+                continue
+            self._topics[topic] = (v, n)
+            heapq.heappush(self._topic_expiry, (n + _turns_above_floor(v), topic, n))
+            heapq.heappush(self._topic_rank, (-_topic_rank(v, n), topic, n))
+        # Gentle decay: only topics fading out this turn are touched.
+        expiry = self._topic_expiry
+        while expiry and expiry[0][0] <= n:
+            _, topic, at = heapq.heappop(expiry)
+            cur = self._topics.get(topic)
+            if cur is not None and cur[1] == at:
+                del self._topics[topic]
+        if max(len(expiry), len(self._topic_rank)) > 2 * len(self._topics) + 64:
+            self._rebuild_topic_heaps()
+
+    def _rebuild_topic_heaps(self) -> None:
+        self._topic_expiry = [(at + _turns_above_floor(v), t, at) for t, (v, at) in self._topics.items()]
+        heapq.heapify(self._topic_expiry)
+        self._topic_rank = [(-_topic_rank(v, at), t, at) for t, (v, at) in self._topics.items()]
+        heapq.heapify(self._topic_rank)
 
     def update_emotions(self, distress_score: float) -> None:
         self.emotions["distress"] = _ema(self.emotions.get("distress", 0.0), distress_score, 0.12)
@@ -78,9 +154,11 @@ class SemanticMemory:
     @staticmethod
     def from_json(obj: dict) -> "SemanticMemory":
         sm = SemanticMemory()
-        sm.facts = [Claim(**c) for c in obj.get("facts", [])]
-        sm.fact_last_seen = {k: float(v) for k, v in obj.get("fact_last_seen", {}).items()}
-        sm.topics = {k: float(v) for k, v in obj.get("topics", {}).items()}
+        sm.facts = KnownFacts(Claim(**c) for c in obj.get("facts", []))
+        seen = ((k, float(v)) for k, v in obj.get("fact_last_seen", {}).items())
+        sm.fact_last_seen = OrderedDict(sorted(seen, key=lambda kv: kv[1]))
+        sm._topics = {k: (float(v), 0) for k, v in obj.get("topics", {}).items()}
+        sm._rebuild_topic_heaps()
         sm.emotions = {k: float(v) for k, v in obj.get("emotions", {}).items()}
         sm.unresolved = {k: float(v) for k, v in obj.get("unresolved", {}).items()}
         sm.last_turn_ts = float(obj.get("last_turn_ts", 0.0))
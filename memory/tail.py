@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import List
+
+
+def tail_lines(path: Path, n: int, block_size: int = 1 << 16) -> List[bytes]:
+    """
+    The last `n` non-blank, newline-terminated lines of `path` (without the
+    newline), found by reading fixed-size blocks backwards from the end.
+
+    Cost depends on `n` and line length, not file size. A final line without a
+    trailing newline is a torn write from a crash and is ignored.
+    """
+    if n <= 0 or not path.exists():
+        return []
+    chunks: List[bytes] = []
+    with path.open("rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        newlines = 0
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+            # n complete lines need n + 1 newlines unless we reach the start.
+            if newlines > n and len(_complete(chunks, pos)) >= n:
+                break
+    return _complete(chunks, pos)[-n:]
+
+
+def _complete(chunks: List[bytes], pos: int) -> List[bytes]:
+    parts = b"".join(reversed(chunks)).split(b"\n")
+    parts.pop()  # empty after the last newline, or a torn final line
+    if pos > 0 and parts:
+        parts.pop(0)  # may start mid-line
+    return [p for p in parts if p.strip()]
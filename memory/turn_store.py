@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from memory.stm import Turn
+
+
+_MAGIC = b"SXTI"
+_VERSION = 1
+_HEADER = struct.Struct("<4sI")  # magic, version
+_RECORD = struct.Struct("<QQI")  # turn_id, byte offset, byte length (incl. newline)
+
+
+def turn_from_json(obj: dict) -> Turn:
+    return Turn(
+        turn_id=int(obj["turn_id"]),
+        ts=float(obj["ts"]),
+        role=str(obj["role"]),
+        text=str(obj["text"]),
+        meta=dict(obj.get("meta", {})),
+    )
+
+
+def turn_to_json(t: Turn) -> dict:
+    return {"turn_id": t.turn_id, "ts": t.ts, "role": t.role, "text": t.text, "meta": t.meta}
+
+
+class TurnStore:
+    """
+    Append-only `turns.jsonl` with a fixed-width sidecar (`turns.idx`) of
+    `(turn_id, offset, length)` records in file order.
+
+    Lookups go through the memory-mapped sidecar and read exactly one line, so
+    fetching retrieval hits costs O(hits) regardless of history size; recently
+    decoded turns are kept in a small LRU. A missing, foreign or stale sidecar is
+    rebuilt (or caught up) from `turns.jsonl` on open.
+    """
+
+    def __init__(self, path: Path, index_path: Optional[Path] = None, cache_size: int = 512):
+        self.path = path
+        self.index_path = index_path or path.with_suffix(".idx")
+        self._cache: "OrderedDict[int, Turn]" = OrderedDict()
+        self._cache_size = int(cache_size)
+        self._lock = threading.RLock()
+        self._map: Optional[mmap.mmap] = None
+        self._reader = None
+        self._count = 0
+        self._end = 0  # bytes of turns.jsonl covered by the sidecar
+        self._torn = False  # turns.jsonl ends in a partial line
+        self._sync()
+
+    # ---- sidecar maintenance ----
+
+    def _sync(self) -> None:
+        size = self.path.stat().st_size if self.path.exists() else 0
+        count = self._read_sidecar_count()
+        if count is None:
+            self.rebuild()
+            return
+        self._count = count
+        self._end = 0
+        if count:
+            tid, off, ln = self._record(count - 1)
+            self._end = off + ln
+            if self._end > size or self._line_id(off, ln) != tid:
+                # turns.jsonl was replaced or truncated underneath the sidecar.
+                self.rebuild()
+                return
+        self._index_from(self._end)
+
+    def _read_sidecar_count(self) -> Optional[int]:
+        if not self.index_path.exists():
+            return None
+        size = self.index_path.stat().st_size
+        if size < _HEADER.size:
+            return None
+        with self.index_path.open("rb") as f:
+            magic, version = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            return None
+        count, extra = divmod(size - _HEADER.size, _RECORD.size)
+        if extra:
+            # A torn record from a crash mid-append; drop it.
+            with self.index_path.open("r+b") as f:
+                f.truncate(_HEADER.size + count * _RECORD.size)
+        return count
+
+    def _line_id(self, off: int, ln: int) -> Optional[int]:
+        with self.path.open("rb") as f:
+            f.seek(off)
+            return _line_turn_id(f.read(ln))
+
+    def rebuild(self) -> int:
+        """Rewrite the sidecar from scratch by scanning `turns.jsonl`; returns the record count."""
+        with self._lock:
+            self._unmap()
+            self._cache.clear()
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.index_path.open("wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION))
+            self._count = 0
+            self._end = 0
+            self._index_from(0)
+            return self._count
+
+    def _index_from(self, start: int) -> None:
+        self._torn = False
+        if not self.path.exists():
+            return
+        records: List[bytes] = []
+        with self.path.open("rb") as f:
+            f.seek(start)
+            off = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    self._torn = True
+                    break
+                tid = _line_turn_id(line)
+                if tid is not None:
+                    records.append(_RECORD.pack(tid, off, len(line)))
+                    self._end = off + len(line)
+                off += len(line)
+        if records:
+            with self.index_path.open("ab") as f:
+                f.write(b"".join(records))
+            self._count += len(records)
+            self._unmap()
+
+    # ---- reads ----
+
+    def _unmap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _record(self, i: int) -> Tuple[int, int, int]:
+        if self._map is None:
+            with self.index_path.open("rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return _RECORD.unpack_from(self._map, _HEADER.size + i * _RECORD.size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_turn_id(self) -> Optional[int]:
+        with self._lock:
+            return self._record(self._count - 1)[0] if self._count else None
+
+    def position(self, turn_id: int) -> Optional[int]:
+        """Record index of `turn_id` (0 = oldest), or None if it is not stored."""
+        with self._lock:
+            if not self._count:
+                return None
+            # Turn ids are dense in practice, so the first guess usually lands.
+            first = self._record(0)[0]
+            guess = turn_id - first
+            if 0 <= guess < self._count and self._record(guess)[0] == turn_id:
+                return guess
+            lo, hi = 0, self._count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._record(mid)[0] < turn_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < self._count and self._record(lo)[0] == turn_id:
+                return lo
+            return None
+
+    def _read_at(self, i: int) -> Optional[Turn]:
+        tid, off, ln = self._record(i)
+        hit = self._cache.get(tid)
+        if hit is not None:
+            self._cache.move_to_end(tid)
+            return hit
+        if self._reader is None:
+            self._reader = self.path.open("rb")
+        self._reader.seek(off)
+        try:
+            t = turn_from_json(json.loads(self._reader.read(ln)))
+        except Exception:
+            return None
+        self._cache[tid] = t
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return t
+
+    def get(self, turn_id: int) -> Optional[Turn]:
+        with self._lock:
+            hit = self._cache.get(turn_id)
+            if hit is not None:
+                self._cache.move_to_end(turn_id)
+                return hit
+            i = self.position(turn_id)
+            return self._read_at(i) if i is not None else None
+
+    def get_many(self, turn_ids: List[int], within_last: Optional[int] = None) -> List[Turn]:
+        """Turns for `turn_ids` in the given order; unknown ids (or ones older than the last `within_last` records) are skipped."""
+        out: List[Turn] = []
+        with self._lock:
+            floor = self._count - within_last if within_last is not None else 0
+            for tid in turn_ids:
+                i = self.position(tid)
+                if i is None or i < floor:
+                    continue
+                t = self._read_at(i)
+                if t is not None:
+                    out.append(t)
+        return out
+
+    def after(self, turn_id: int) -> Iterator[Turn]:
+        """Stored turns with an id above `turn_id`, oldest first."""
+        with self._lock:
+            lo, hi = 0, self._count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._record(mid)[0] <= turn_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        i = lo
+        while True:
+            with self._lock:
+                if i >= self._count:
+                    return
+                t = self._read_at(i)
+            if t is not None:
+                yield t
+            i += 1
+
+    def tail(self, n: int) -> List[Turn]:
+        """The last `n` stored turns, oldest first."""
+        with self._lock:
+            out: List[Turn] = []
+            for i in range(max(0, self._count - n), self._count):
+                t = self._read_at(i)
+                if t is not None:
+                    out.append(t)
+            return out
+
+    def iter(self, role: Optional[str] = None) -> Iterator[Turn]:
+        """Stream stored turns oldest-first without loading the whole file."""
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as f:
+            for ln in f:
+                if not ln.strip():
+                    continue
+                try:
+                    obj = json.loads(ln)
+                except Exception:
+                    continue
+                if role is not None and obj.get("role") != role:
+                    continue
+                yield turn_from_json(obj)
+
+    # ---- writes ----
+
+    def append(self, t: Turn) -> None:
+        self.append_many([t])
+
+    def append_many(self, turns: List[Turn]) -> None:
+        """Append `turns` with one write to `turns.jsonl` and one to the sidecar."""
+        if not turns:
+            return
+        lines = [(json.dumps(turn_to_json(t), ensure_ascii=False) + "\n").encode("utf-8") for t in turns]
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("ab") as f:
+                if self._torn:
+                    # Terminate a partial line left by a crash instead of gluing onto it.
+                    f.write(b"\n")
+                    self._torn = False
+                off = f.tell()
+                f.write(b"".join(lines))
+            records = []
+            for t, data in zip(turns, lines):
+                records.append(_RECORD.pack(t.turn_id, off, len(data)))
+                off += len(data)
+            with self.index_path.open("ab") as f:
+                f.write(b"".join(records))
+            self._count += len(turns)
+            self._end = off
+            self._unmap()
+            for t in turns:
+                self._cache[t.turn_id] = t
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def sync(self) -> None:
+        """fsync `turns.jsonl` and the sidecar."""
+        with self._lock:
+            for p in (self.path, self.index_path):
+                if p.exists():
+                    with p.open("rb") as f:
+                        os.fsync(f.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            self._unmap()
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+
+def _line_turn_id(line: bytes) -> Optional[int]:
+    if not line.strip():
+        return None
+    try:
+        return int(json.loads(line)["turn_id"])
+    except Exception:
+        return None
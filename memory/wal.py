@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def write_snapshot(path: Path, obj: dict, seq: int) -> None:
+    """Atomically replace `path` with `obj` plus the WAL sequence it covers."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps({**obj, "wal_seq": int(seq)}, ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: Path) -> Tuple[Optional[dict], int]:
+    """(state, covered WAL sequence); files written before the WAL count as sequence 0."""
+    if not path.exists():
+        return None, 0
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None, 0
+    return obj, int(obj.pop("wal_seq", 0) or 0)
+
+
+class WriteAheadLog:
+    """
+    Append-only `wal.jsonl` of state mutations, one line per committed batch:
+    `{"seq": n, "ops": [[kind, payload], ...]}`.
+
+    A request groups its changes with `batch()` so an exchange costs one
+    append instead of rewriting every state file. Lines reach the OS on
+    commit (safe against a process crash) and are fsynced at most every
+    `fsync_interval_s` by a background flusher, so concurrent commits share
+    one fsync; 0 syncs every commit.
+
+    State owners keep snapshot files stamped with the last sequence they
+    cover (`write_snapshot`) and on startup replay `records(after=seq)`.
+    `checkpoint()` asks every owner for a snapshot and then drops the log.
+    """
+
+    def __init__(self, path: Path, fsync_interval_s: float = 1.0):
+        self.path = path
+        self.fsync_interval_s = float(fsync_interval_s)
+        self.seq = 0
+        self._lock = threading.RLock()
+        self._cond = threading.Condition()
+        self._open = 0  # batches in flight
+        self._checkpointing = False
+        self._local = threading.local()
+        self._on_commit: Dict[str, Callable[[List[dict]], None]] = {}
+        self._snapshots: Dict[str, Callable[[int], None]] = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        good = 0
+        for seq, _, end in self._scan():
+            self.seq = max(self.seq, seq)
+            good = end
+        if self.path.exists() and good < self.path.stat().st_size:
+            # Drop a torn final batch so the next append starts on a fresh line.
+            with self.path.open("r+b") as f:
+                f.truncate(good)
+        self._fh = self.path.open("ab", buffering=0)
+
+    # ---- reading ----
+
+    def _scan(self) -> Iterator[Tuple[int, list, int]]:
+        # (seq, ops, end offset) per intact line; stops at the first torn one.
+        if not self.path.exists():
+            return
+        end = 0
+        with self.path.open("rb") as f:
+            for ln in f:
+                if not ln.endswith(b"\n"):
+                    return
+                try:
+                    obj = json.loads(ln)
+                    seq, ops = int(obj["seq"]), list(obj["ops"])
+                except Exception:
+                    return
+                end += len(ln)
+                yield seq, ops, end
+
+    def records(self, after: int = 0, kinds: Optional[Iterable[str]] = None) -> Iterator[Tuple[int, str, dict]]:
+        """Committed `(seq, kind, payload)` ops with seq > `after`, oldest first."""
+        wanted = set(kinds) if kinds is not None else None
+        for seq, ops, _ in self._scan():
+            if seq <= after:
+                continue
+            for kind, payload in ops:
+                if wanted is None or kind in wanted:
+                    yield seq, kind, payload
+
+    def advance(self, seq: int) -> None:
+        """Never hand out sequences at or below `seq` (e.g. a snapshot's, if the log was lost)."""
+        with self._lock:
+            self.seq = max(self.seq, int(seq))
+
+    # ---- registration ----
+
+    def on_commit(self, kind: str, fn: Callable[[List[dict]], None]) -> None:
+        """Call `fn(payloads)` with a batch's ops of `kind` once the batch is in the log."""
+        self._on_commit[kind] = fn
+
+    def add_snapshot(self, kinds: Iterable[str], fn: Callable[[int], None]) -> None:
+        """`fn(seq)` persists everything `kinds` ops up to `seq` changed; used by `checkpoint`."""
+        for kind in kinds:
+            self._snapshots[kind] = fn
+
+    # ---- writing ----
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Collect this thread's `log()` calls into one record, committed on exit
+        (also on error, since the in-memory changes have already happened).
+        Mutate state inside the batch so a checkpoint never sees half of it.
+        Nested batches join the outer one.
+        """
+        if getattr(self._local, "ops", None) is not None:
+            yield
+            return
+        self._begin()
+        self._local.ops = ops = []
+        try:
+            yield
+        finally:
+            detached = self._local.ops is not ops
+            self._local.ops = None
+            if not detached:
+                self._end(ops)
+
+    def detach(self) -> Optional[List[list]]:
+        """
+        Hand this thread's open batch to another thread, which finishes it
+        with `resume()`; the enclosing `batch()` then exits without
+        committing. Call it last in the batch. None outside a batch.
+        """
+        ops = getattr(self._local, "ops", None)
+        self._local.ops = None
+        return ops
+
+    @contextmanager
+    def resume(self, ops: List[list]) -> Iterator[None]:
+        """Continue a `detach()`ed batch on this thread and commit it on exit."""
+        self._local.ops = ops
+        try:
+            yield
+        finally:
+            self._local.ops = None
+            self._end(ops)
+
+    def _begin(self) -> None:
+        with self._cond:
+            while self._checkpointing:
+                self._cond.wait()
+            self._open += 1
+
+    def _end(self, ops: List[list]) -> None:
+        try:
+            if ops:
+                self._commit(ops)
+        finally:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify_all()
+
+    def log(self, kind: str, payload: dict) -> None:
+        ops = getattr(self._local, "ops", None)
+        if ops is not None:
+            ops.append([kind, payload])
+            return
+        with self.batch():
+            self._local.ops.append([kind, payload])
+
+    def _commit(self, ops: List[list]) -> None:
+        with self._lock:
+            seq = self.seq + 1
+            self._fh.write((json.dumps({"seq": seq, "ops": ops}, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.seq = seq
+            if self.fsync_interval_s <= 0:
+                os.fsync(self._fh.fileno())
+            else:
+                self._dirty = True
+                self._start_flusher()
+            by_kind: Dict[str, List[dict]] = {}
+            for kind, payload in ops:
+                if kind in self._on_commit:
+                    by_kind.setdefault(kind, []).append(payload)
+            for kind, payloads in by_kind.items():
+                self._on_commit[kind](payloads)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="sx-wal", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.fsync_interval_s):
+            self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._dirty:
+                os.fsync(self._fh.fileno())
+                self._dirty = False
+
+    def checkpoint(self) -> int:
+        """
+        Snapshot every registered owner at the current sequence and drop the
+        log; ops of kinds nobody snapshots are carried over. Waits for open
+        batches, so call it outside one. Returns the sequence covered.
+        """
+        with self._cond:
+            while self._checkpointing:
+                self._cond.wait()
+            self._checkpointing = True
+            while self._open:
+                self._cond.wait()
+        try:
+            with self._lock:
+                seq = self.seq
+                for fn in dict.fromkeys(self._snapshots.values()):
+                    fn(seq)
+                keep: Dict[int, list] = {}
+                for s, kind, payload in self.records():
+                    if kind not in self._snapshots:
+                        keep.setdefault(s, []).append([kind, payload])
+                lines = [json.dumps({"seq": s, "ops": ops}, ensure_ascii=False) for s, ops in keep.items()]
+                # An empty marker keeps the sequence monotonic across restarts.
+                lines.append(json.dumps({"seq": seq, "ops": []}))
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                with tmp.open("w", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._fh.close()
+                os.replace(tmp, self.path)
+                self._fh = self.path.open("ab", buffering=0)
+                self._dirty = False
+                return seq
+        finally:
+            with self._cond:
+                self._checkpointing = False
+                self._cond.notify_all()
+
+    def size(self) -> int:
+        with self._lock:
+            return self.path.stat().st_size if self.path.exists() else 0
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            if not self._fh.closed:
+                os.fsync(self._fh.fileno())
+                self._fh.close()
@@ -8,13 +8,16 @@ from typing import Optional
 class Budget:
     cpu_percent_max: float = 50.0
     mem_percent_max: float = 50.0
+    # Weekly index segments a query may scan when within budget (None = all;
+    # recency decay and the week-level bound already skip old weeks).
+    scan_segments: Optional[int] = None
 
 
 @dataclass(frozen=True)
 class DegradeHints:
     level: str  # "none" | "light" | "hard"
     retrieval_limit_turns: int
-    scan_tail_lines: int
+    scan_segments: Optional[int]  # weekly index segments searched; None = all
     allow_proactive: bool
     allow_actions: bool
 
@@ -39,12 +42,13 @@ class ResourceGovernor:
         mem = float(getattr(snap, "mem_percent", 0.0) or 0.0)
 
         if cpu <= self._user_budget.cpu_percent_max and mem <= self._user_budget.mem_percent_max:
-            return DegradeHints(level="none", retrieval_limit_turns=10, scan_tail_lines=8000, allow_proactive=True, allow_actions=True)
+            return DegradeHints(level="none", retrieval_limit_turns=10, scan_segments=self._user_budget.scan_segments, allow_proactive=True, allow_actions=True)
 
         # Light degrade (just over budget)
         if cpu < 70.0 and mem < 70.0:
-            return DegradeHints(level="light", retrieval_limit_turns=4, scan_tail_lines=2000, allow_proactive=False, allow_actions=False)
+            scan = 4 if self._user_budget.scan_segments is None else min(4, self._user_budget.scan_segments)
+            return DegradeHints(level="light", retrieval_limit_turns=4, scan_segments=scan, allow_proactive=False, allow_actions=False)
 
         # Hard degrade (system hot): minimal work
-        return DegradeHints(level="hard", retrieval_limit_turns=0, scan_tail_lines=0, allow_proactive=False, allow_actions=False)
+        return DegradeHints(level="hard", retrieval_limit_turns=0, scan_segments=1, allow_proactive=False, allow_actions=False)
 
@@ -23,9 +23,10 @@ async def health(sx: SentienceX = Depends(get_sx)) -> Dict[str, Any]:
         "memory": {
             "stm_turns": len(list(sx.memory.stm.iter())),
             "facts": len(sx.memory.semantic.facts),
-            "topics": len(sx.memory.semantic.topics),
-            "episodes": len(sx.memory.episodes.all()),
+            "topics": sx.memory.semantic.topic_count,
+            "episodes": sx.memory.episodes.count(),
             "index_docs": sx.memory.index.doc_count,
+            "index": sx.memory.index.stats(),
         },
         "resources": {
             "cpu_percent": snap.cpu_percent,
@@ -1,16 +1,44 @@
 from __future__ import annotations
 
+from typing import Dict
+
 from prometheus_client import Counter, Gauge, Histogram, generate_latest
 
 
 class Metrics:
-    def __init__(self):
+    def __init__(self, safety_budget_ms: float = 25.0):
         self.chat_requests = Counter("sentiencex_chat_requests_total", "Total chat requests")
         self.chat_latency_ms = Histogram(
             "sentiencex_chat_latency_ms",
             "Chat pipeline latency (ms)",
             buckets=(5, 10, 25, 50, 100, 200, 400, 800, 1500, 3000, 6000),
         )
+        # The budget is itself a bucket edge, so `le="<budget>"` / `_count` is the
+        # share of crisis replies that met it.
+        self.safety_budget_ms = float(safety_budget_ms)
+        self.safety_latency_ms = Histogram(
+            "sentiencex_safety_reply_latency_ms",
+            "Safety fast-path reply latency (ms)",
+            buckets=tuple(sorted({0.5, 1, 2, 5, 10, 25, 50, 100, 250, self.safety_budget_ms})),
+        )
+        self.safety_over_budget = Counter("sentiencex_safety_reply_over_budget_total", "Safety fast-path replies over the latency budget")
+        self.chat_queue_depth = Gauge("sentiencex_chat_queue_depth", "Chat requests admitted and not yet finished")
+        self.chat_queue_wait_ms = Histogram(
+            "sentiencex_chat_queue_wait_ms",
+            "Time a chat request waits for its turn and a worker (ms)",
+            buckets=(0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 3000, 10000),
+        )
+        self.deferred_wait_ms = Histogram(
+            "sentiencex_deferred_wait_ms",
+            "Time a turn waits for the previous turn's deferred memory and learning writes (ms)",
+            buckets=(0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 3000),
+        )
+        self.turn_stage_ms = Histogram(
+            "sentiencex_turn_stage_ms",
+            "Run time of each chat turn stage (ms)",
+            ["stage"],
+            buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000),
+        )
         self.cpu_percent = Gauge("sentiencex_cpu_percent", "CPU percent")
         self.mem_rss_mb = Gauge("sentiencex_mem_rss_mb", "Resident memory (MB)")
         self.mem_percent = Gauge("sentiencex_mem_percent", "System memory percent")
@@ -22,6 +50,25 @@ class Metrics:
         self.chat_requests.inc()
         self.chat_latency_ms.observe(float(ms))
 
+    def observe_safety_latency(self, ms: float) -> None:
+        self.chat_requests.inc()
+        self.safety_latency_ms.observe(float(ms))
+        if ms > self.safety_budget_ms:
+            self.safety_over_budget.inc()
+
+    def set_chat_queue_depth(self, n: int) -> None:
+        self.chat_queue_depth.set(int(n))
+
+    def observe_chat_wait(self, ms: float) -> None:
+        self.chat_queue_wait_ms.observe(float(ms))
+
+    def observe_deferred_wait(self, ms: float) -> None:
+        self.deferred_wait_ms.observe(float(ms))
+
+    def observe_turn_stages(self, timings: Dict[str, float]) -> None:
+        for stage, ms in timings.items():
+            self.turn_stage_ms.labels(stage=stage).observe(float(ms))
+
     def set_resources(
         self,
         cpu_percent: float,
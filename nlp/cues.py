@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+
+# Fixed cue phrases read by feature extraction alongside the locale lexicons.
+# They are compiled into the same phrase automaton as the lexicons, so adding
+# entries here does not add another scan per message.
+CUE_PHRASES: Dict[str, Tuple[str, ...]] = {
+    "cue_but": ("but",),
+    "cue_and": ("and",),
+    "cue_urgent": ("urgent", "asap", "now", "immediately"),
+    "cue_self_harm": ("kill myself", "end my life", "hurt myself", "i want to die", "i should die"),
+    "cue_please": ("please",),
+    "cue_thanks": ("thank",),
+    "cue_profanity": ("fuck", "shit", "damn"),
+}
+
+
+# High-salience threat/self-harm phrases. A hit forces the threat label and lets
+# the dialogue policy answer from the safety templates before anything else runs.
+SAFETY_PHRASES: Dict[str, Tuple[str, ...]] = {
+    "self_harm": ("kill myself", "end my life", "i want to die", "hurt myself"),
+    "threat": ("kill you", "hurt you", "shoot", "stab", "attack"),
+}
+
+# Confidence a SAFETY_PHRASES hit gives its label. The policy only takes the
+# safety fast path when this reaches the configured threat threshold.
+SAFETY_CONFIDENCE: Dict[str, float] = {
+    "self_harm": 0.90,
+    "threat": 0.85,
+}
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from nlp.hashing import DEFAULT_HASH_SPACE, HashSpace
+
+
+# Every non-hashed feature the extractor emits, in column order.
+NAMED_FEATURES: Tuple[str, ...] = (
+    "bias",
+    "len_chars",
+    "len_tokens",
+    "qmarks",
+    "emarks",
+    "ellipses",
+    "newlines",
+    "caps_ratio",
+    "negations",
+    "apology",
+    "first_person",
+    "second_person",
+    "pos_hits",
+    "neg_hits",
+    "hedging_hits",
+    "minimizer_hits",
+    "masking_hits",
+    "distress_hits",
+    "threat_hits",
+    "sarcasm_hits",
+    "contains_quote",
+    "contains_but",
+    "contains_and",
+    "log_len_tokens",
+    "log_len_chars",
+    "punct_intensity",
+    "urgent_words",
+    "self_harm_phrase",
+    "please",
+    "thanks",
+    "profanity",
+)
+
+NAMED_INDEX: Dict[str, int] = {name: i for i, name in enumerate(NAMED_FEATURES)}
+
+# Named features grouped by the work that produces them; a group is computed
+# as a whole or skipped. "unigrams"/"bigrams" are the `ug_*`/`bg_*` buckets.
+FEATURE_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "bias": ("bias",),
+    "length": ("len_chars", "len_tokens", "log_len_tokens", "log_len_chars"),
+    "punct": ("qmarks", "emarks", "ellipses", "punct_intensity"),
+    "newlines": ("newlines",),
+    "caps": ("caps_ratio",),
+    "negations": ("negations",),
+    "apology": ("apology",),
+    "pronouns": ("first_person", "second_person"),
+    "sentiment_lex": ("pos_hits", "neg_hits"),
+    "phrases": (
+        "hedging_hits",
+        "minimizer_hits",
+        "masking_hits",
+        "distress_hits",
+        "threat_hits",
+        "sarcasm_hits",
+        "contains_but",
+        "contains_and",
+        "urgent_words",
+        "self_harm_phrase",
+        "please",
+        "thanks",
+        "profanity",
+    ),
+    "quote": ("contains_quote",),
+    "unigrams": (),
+    "bigrams": (),
+}
+
+_GROUP_OF: Dict[str, str] = {name: g for g, names in FEATURE_GROUPS.items() for name in names}
+
+
+@dataclass(frozen=True)
+class FeaturePlan:
+    """
+    The feature groups some consumer actually reads. Built from the loaded
+    model weights plus the features cognition/style rules look at, so pruned
+    weights translate directly into skipped work.
+    """
+
+    groups: FrozenSet[str]
+
+    def wants(self, group: str) -> bool:
+        return group in self.groups
+
+    @staticmethod
+    def for_features(names: Iterable[str]) -> "FeaturePlan":
+        groups = {"bias"}
+        for name in names:
+            g = _GROUP_OF.get(name)
+            if g is None:
+                if name.startswith("ug_"):
+                    g = "unigrams"
+                elif name.startswith("bg_"):
+                    g = "bigrams"
+                else:
+                    continue
+            groups.add(g)
+        return FeaturePlan(groups=frozenset(groups))
+
+
+FULL_PLAN = FeaturePlan(groups=frozenset(FEATURE_GROUPS))
+
+
+@dataclass(frozen=True)
+class SparseVector:
+    """
+    Index/value pairs in a `FeatureSpace`; indices are unique.
+    """
+
+    idx: List[int]
+    val: List[float]
+
+    def __len__(self) -> int:
+        return len(self.idx)
+
+
+@dataclass(frozen=True)
+class FeatureSpace:
+    """
+    Integer vocabulary shared by the extractor and compiled models.
+
+    Columns are laid out as named features, then `ug_0..ug_{B-1}`, then
+    `bg_0..bg_{B-1}`, so hashed buckets map to columns by arithmetic and never
+    need a string name on the hot path.
+    """
+
+    hashing: HashSpace = DEFAULT_HASH_SPACE
+
+    @property
+    def ug_offset(self) -> int:
+        return len(NAMED_FEATURES)
+
+    @property
+    def bg_offset(self) -> int:
+        return len(NAMED_FEATURES) + self.hashing.buckets
+
+    @property
+    def size(self) -> int:
+        return len(NAMED_FEATURES) + 2 * self.hashing.buckets
+
+    def index(self, name: str) -> Optional[int]:
+        i = NAMED_INDEX.get(name)
+        if i is not None:
+            return i
+        prefix, _, num = name.partition("_")
+        if prefix not in ("ug", "bg") or not num.isdigit():
+            return None
+        b = int(num)
+        if b >= self.hashing.buckets:
+            return None
+        return (self.ug_offset if prefix == "ug" else self.bg_offset) + b
+
+    def name(self, i: int) -> str:
+        if i < self.ug_offset:
+            return NAMED_FEATURES[i]
+        if i < self.bg_offset:
+            return f"ug_{i - self.ug_offset}"
+        return f"bg_{i - self.bg_offset}"
+
+    def vectorize(self, feats: Mapping[str, float]) -> SparseVector:
+        """Map a name-keyed feature dict into this space; unknown names are dropped."""
+        acc: Dict[int, float] = {}
+        for k, v in feats.items():
+            i = self.index(k)
+            if i is not None:
+                acc[i] = acc.get(i, 0.0) + float(v)
+        return SparseVector(idx=list(acc.keys()), val=list(acc.values()))
+
+    def names(self, vec: SparseVector) -> Dict[str, float]:
+        return {self.name(i): v for i, v in zip(vec.idx, vec.val)}
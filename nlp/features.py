@@ -3,10 +3,13 @@ from __future__ import annotations
 import math
 import re
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Dict, Iterable, List, Sequence
 
 from locale_pack.loader import LocalePack
-from nlp.segmenter import Segmenter, contains_phrase, lower_tokens, ngrams
+from nlp.feature_space import FULL_PLAN, NAMED_INDEX, FeaturePlan, FeatureSpace, SparseVector
+from nlp.hashing import DEFAULT_HASH_SPACE, HashSpace, ngram_key
+from nlp.segmenter import Segmenter, lower_tokens, ngrams
 
 
 _NEGATIONS = {"not", "no", "never", "can't", "cant", "won't", "wont", "don't", "dont"}
@@ -23,94 +26,175 @@ class FeatureContext:
     tokens_l: List[str]
 
 
+@dataclass(frozen=True)
+class FeatureBundle:
+    """
+    One turn's analysis, computed once and shared by every classifier,
+    cognition detector and the style extractor. Only the groups in `plan`
+    are computed; skipped named features are absent from `named`.
+    """
+
+    ctx: FeatureContext
+    named: Dict[str, float]
+    vec: SparseVector
+    space: FeatureSpace = FeatureSpace()
+    plan: FeaturePlan = FULL_PLAN
+
+    @property
+    def text(self) -> str:
+        return self.ctx.text
+
+    @cached_property
+    def feats(self) -> Dict[str, float]:
+        # Name-keyed view including `ug_*`/`bg_*`; only training needs it.
+        return self.space.names(self.vec)
+
+
 def make_context(locale: LocalePack, text: str) -> FeatureContext:
-    seg = Segmenter(locale.alphabet)
+    return _context(locale.segmenter, text)
+
+
+def _context(seg: Segmenter, text: str) -> FeatureContext:
     toks = seg.tokens(text)
     toks_l = lower_tokens(toks)
     return FeatureContext(text=text, text_l=text.lower(), tokens=toks, tokens_l=toks_l)
 
 
+def make_bundle(locale: LocalePack, text: str, space: HashSpace = DEFAULT_HASH_SPACE, plan: FeaturePlan = FULL_PLAN) -> FeatureBundle:
+    ctx = make_context(locale, text)
+    return _bundle_from_context(locale, ctx, FeatureSpace(space), plan)
+
+
+def make_bundles(
+    locale: LocalePack,
+    texts: Sequence[str],
+    space: HashSpace = DEFAULT_HASH_SPACE,
+    plan: FeaturePlan = FULL_PLAN,
+) -> List[FeatureBundle]:
+    seg = locale.segmenter
+    fspace = FeatureSpace(space)
+    return [_bundle_from_context(locale, _context(seg, t), fspace, plan) for t in texts]
+
+
+def rehash_bundle(locale: LocalePack, bundle: FeatureBundle, space: HashSpace) -> FeatureBundle:
+    if bundle.space.hashing == space:
+        return bundle
+    fspace = FeatureSpace(space)
+    vec = _vector(bundle.ctx, bundle.named, fspace, bundle.plan)
+    return FeatureBundle(ctx=bundle.ctx, named=bundle.named, vec=vec, space=fspace, plan=bundle.plan)
+
+
 def _count_in(tokens_l: Sequence[str], wordset: Iterable[str]) -> int:
-    s = set(wordset)
+    s = wordset if isinstance(wordset, (set, frozenset)) else set(wordset)
     return sum(1 for t in tokens_l if t in s)
 
 
-def extract_features(locale: LocalePack, text: str) -> Dict[str, float]:
-    ctx = make_context(locale, text)
+def extract_features(locale: LocalePack, text: str, space: HashSpace = DEFAULT_HASH_SPACE) -> Dict[str, float]:
+    return make_bundle(locale, text, space).feats
+
+
+def _bundle_from_context(locale: LocalePack, ctx: FeatureContext, fspace: FeatureSpace, plan: FeaturePlan) -> FeatureBundle:
+    named = _named_features(locale, ctx, plan)
+    return FeatureBundle(ctx=ctx, named=named, vec=_vector(ctx, named, fspace, plan), space=fspace, plan=plan)
+
+
+def _vector(ctx: FeatureContext, named: Dict[str, float], fspace: FeatureSpace, plan: FeaturePlan) -> SparseVector:
+    idx: List[int] = [NAMED_INDEX[n] for n in named]
+    val: List[float] = list(named.values())
+
+    # Token n-grams hashed into a small, stable space (symbolic-statistical, no embeddings).
+    # This helps distinguish intents with minimal overhead. The hash is seeded and
+    # process-independent, so trained bucket weights survive restarts; buckets go
+    # straight to column indices without building `ug_*`/`bg_*` names.
+    space = fspace.hashing
+    counts: Dict[int, float] = {}
+    if plan.wants("bigrams"):
+        off = fspace.bg_offset
+        for ng in ngrams(ctx.tokens_l, 2):
+            i = off + space.bucket(ngram_key(ng))
+            counts[i] = counts.get(i, 0.0) + 1.0
+    if plan.wants("unigrams"):
+        off = fspace.ug_offset
+        for t in ctx.tokens_l:
+            i = off + space.bucket(t)
+            counts[i] = counts.get(i, 0.0) + 1.0
+    idx.extend(counts.keys())
+    val.extend(counts.values())
+    return SparseVector(idx=idx, val=val)
+
+
+def _named_features(locale: LocalePack, ctx: FeatureContext, plan: FeaturePlan) -> Dict[str, float]:
     lex = locale.lexicons
+    want = plan.groups
 
     feats: Dict[str, float] = {}
     feats["bias"] = 1.0
 
-    feats["len_chars"] = float(len(ctx.text))
-    feats["len_tokens"] = float(len(ctx.tokens_l))
-    feats["qmarks"] = float(ctx.text.count("?"))
-    feats["emarks"] = float(ctx.text.count("!"))
-    feats["ellipses"] = float(ctx.text.count("..."))
-    feats["newlines"] = float(ctx.text.count("\n"))
-
-    if ctx.text:
-        caps = sum(1 for c in ctx.text if c.isupper())
-        letters = sum(1 for c in ctx.text if c.isalpha())
-        feats["caps_ratio"] = float(caps / max(1, letters))
-    else:
-        feats["caps_ratio"] = 0.0
-
-    feats["negations"] = float(sum(1 for t in ctx.tokens_l if t in _NEGATIONS))
-    feats["apology"] = float(_count_in(ctx.tokens_l, _APOLOGY))
-    feats["first_person"] = float(_count_in(ctx.tokens_l, _FIRST))
-    feats["second_person"] = float(_count_in(ctx.tokens_l, _SECOND))
-
-    feats["pos_hits"] = float(_count_in(ctx.tokens_l, lex.sentiment_pos))
-    feats["neg_hits"] = float(_count_in(ctx.tokens_l, lex.sentiment_neg))
-    feats["hedging_hits"] = float(sum(1 for phrase in lex.hedging if contains_phrase(ctx.text_l, phrase)))
-    feats["minimizer_hits"] = float(sum(1 for phrase in lex.minimizers if contains_phrase(ctx.text_l, phrase)))
-    feats["masking_hits"] = float(sum(1 for phrase in lex.masking_markers if contains_phrase(ctx.text_l, phrase)))
-    feats["distress_hits"] = float(sum(1 for phrase in lex.distress_topics if contains_phrase(ctx.text_l, phrase)))
-    feats["threat_hits"] = float(sum(1 for phrase in lex.threat if contains_phrase(ctx.text_l, phrase)))
-    feats["sarcasm_hits"] = float(sum(1 for phrase in lex.sarcasm if contains_phrase(ctx.text_l, phrase)))
-
-    # Structural patterns
-    feats["contains_quote"] = float(1.0 if '"' in ctx.text or "'" in ctx.text else 0.0)
-    feats["contains_but"] = float(1.0 if contains_phrase(ctx.text_l, "but") else 0.0)
-    feats["contains_and"] = float(1.0 if contains_phrase(ctx.text_l, "and") else 0.0)
-
-    # Token n-grams hashed into a small, stable space (symbolic-statistical, no embeddings).
-    # This helps distinguish intents with minimal overhead.
-    buckets = 64
-    for ng in ngrams(ctx.tokens_l, 2):
-        h = (hash(ng) & 0xFFFFFFFF) % buckets
-        feats[f"bg_{h}"] = feats.get(f"bg_{h}", 0.0) + 1.0
-    for t in ctx.tokens_l:
-        h = (hash(t) & 0xFFFFFFFF) % buckets
-        feats[f"ug_{h}"] = feats.get(f"ug_{h}", 0.0) + 1.0
-
-    # Length transforms
-    feats["log_len_tokens"] = math.log1p(feats["len_tokens"])
-    feats["log_len_chars"] = math.log1p(feats["len_chars"])
-
-    # Punctuation intensity
-    feats["punct_intensity"] = float(min(3.0, feats["qmarks"] + feats["emarks"] + feats["ellipses"]))
-
-    # Simple urgency
-    feats["urgent_words"] = float(sum(1 for w in ("urgent", "asap", "now", "immediately") if contains_phrase(ctx.text_l, w)))
-
-    # Self-harm intent hints (kept separate from generic threat words)
-    feats["self_harm_phrase"] = float(
-        1.0
-        if any(
-            contains_phrase(ctx.text_l, p)
-            for p in ("kill myself", "end my life", "hurt myself", "i want to die", "i should die")
-        )
-        else 0.0
-    )
-
-    # Politeness / social smoothing
-    feats["please"] = float(1.0 if contains_phrase(ctx.text_l, "please") else 0.0)
-    feats["thanks"] = float(1.0 if contains_phrase(ctx.text_l, "thank") else 0.0)
-
-    # Mild profanity signal (non-exhaustive)
-    feats["profanity"] = float(sum(1 for w in ("fuck", "shit", "damn") if contains_phrase(ctx.text_l, w)))
+    if "length" in want:
+        feats["len_chars"] = float(len(ctx.text))
+        feats["len_tokens"] = float(len(ctx.tokens_l))
+        # Length transforms
+        feats["log_len_tokens"] = math.log1p(feats["len_tokens"])
+        feats["log_len_chars"] = math.log1p(feats["len_chars"])
+
+    if "punct" in want:
+        feats["qmarks"] = float(ctx.text.count("?"))
+        feats["emarks"] = float(ctx.text.count("!"))
+        feats["ellipses"] = float(ctx.text.count("..."))
+        # Punctuation intensity
+        feats["punct_intensity"] = float(min(3.0, feats["qmarks"] + feats["emarks"] + feats["ellipses"]))
+
+    if "newlines" in want:
+        feats["newlines"] = float(ctx.text.count("\n"))
+
+    if "caps" in want:
+        if ctx.text:
+            caps = sum(1 for c in ctx.text if c.isupper())
+            letters = sum(1 for c in ctx.text if c.isalpha())
+            feats["caps_ratio"] = float(caps / max(1, letters))
+        else:
+            feats["caps_ratio"] = 0.0
+
+    if "negations" in want:
+        feats["negations"] = float(sum(1 for t in ctx.tokens_l if t in _NEGATIONS))
+    if "apology" in want:
+        feats["apology"] = float(_count_in(ctx.tokens_l, _APOLOGY))
+    if "pronouns" in want:
+        feats["first_person"] = float(_count_in(ctx.tokens_l, _FIRST))
+        feats["second_person"] = float(_count_in(ctx.tokens_l, _SECOND))
+
+    if "sentiment_lex" in want:
+        feats["pos_hits"] = float(_count_in(ctx.tokens_l, lex.sentiment_pos))
+        feats["neg_hits"] = float(_count_in(ctx.tokens_l, lex.sentiment_neg))
+
+    if "phrases" in want:
+        # One automaton pass yields every phrase-lexicon and cue count.
+        hits = locale.phrases.counts(ctx.text_l)
+        feats["hedging_hits"] = float(hits["hedging"])
+        feats["minimizer_hits"] = float(hits["minimizers"])
+        feats["masking_hits"] = float(hits["masking_markers"])
+        feats["distress_hits"] = float(hits["distress_topics"])
+        feats["threat_hits"] = float(hits["threat"])
+        feats["sarcasm_hits"] = float(hits["sarcasm"])
+
+        # Structural patterns
+        feats["contains_but"] = float(1.0 if hits["cue_but"] else 0.0)
+        feats["contains_and"] = float(1.0 if hits["cue_and"] else 0.0)
+
+        # Simple urgency
+        feats["urgent_words"] = float(hits["cue_urgent"])
+
+        # Self-harm intent hints (kept separate from generic threat words)
+        feats["self_harm_phrase"] = float(1.0 if hits["cue_self_harm"] else 0.0)
+
+        # Politeness / social smoothing
+        feats["please"] = float(1.0 if hits["cue_please"] else 0.0)
+        feats["thanks"] = float(1.0 if hits["cue_thanks"] else 0.0)
+
+        # Mild profanity signal (non-exhaustive)
+        feats["profanity"] = float(hits["cue_profanity"])
+
+    if "quote" in want:
+        feats["contains_quote"] = float(1.0 if '"' in ctx.text or "'" in ctx.text else 0.0)
 
     return feats
-
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+_FNV_OFFSET = 0x811C9DC5
+_FNV_PRIME = 0x01000193
+_NGRAM_SEP = "\x1f"
+
+
+@lru_cache(maxsize=65536)
+def fnv1a32(key: str, seed: int = 0) -> int:
+    # FNV-1a over UTF-8 bytes; the seed is folded into the offset basis.
+    # Unlike built-in hash() this is identical across processes and restarts.
+    h = (_FNV_OFFSET ^ (seed & 0xFFFFFFFF)) & 0xFFFFFFFF
+    for b in key.encode("utf-8"):
+        h ^= b
+        h = (h * _FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+def ngram_key(tokens: Sequence[str]) -> str:
+    return _NGRAM_SEP.join(tokens)
+
+
+@dataclass(frozen=True)
+class HashSpace:
+    """
+    Bucket space for hashed unigram/bigram features (`ug_*` / `bg_*`).
+
+    Stored next to the weights in `models/*_weights.json` so a model is always
+    scored in the space it was trained in.
+    """
+
+    buckets: int = 64
+    seed: int = 0
+    scheme: str = "fnv1a32"
+
+    def bucket(self, key: str) -> int:
+        return fnv1a32(key, self.seed) % self.buckets
+
+    def to_json(self) -> dict:
+        return {"scheme": self.scheme, "seed": self.seed, "buckets": self.buckets}
+
+    @staticmethod
+    def from_json(obj: Optional[dict]) -> Optional["HashSpace"]:
+        if not obj:
+            return None
+        scheme = str(obj.get("scheme", "fnv1a32"))
+        if scheme != "fnv1a32":
+            raise ValueError(f"Unsupported hashing scheme: {scheme!r}")
+        buckets = int(obj.get("buckets", 64))
+        if buckets <= 0:
+            raise ValueError(f"Invalid bucket count: {buckets}")
+        return HashSpace(buckets=buckets, seed=int(obj.get("seed", 0)), scheme=scheme)
+
+
+DEFAULT_HASH_SPACE = HashSpace()
+
+
+def is_hashed_feature(name: str) -> bool:
+    return name.startswith("ug_") or name.startswith("bg_")
+
+
+class CollisionTracker:
+    """
+    Collects the distinct n-grams seen during training and reports how crowded
+    the hash space is, for the configured size and a few alternatives.
+    """
+
+    def __init__(self, space: HashSpace, max_keys: int = 200_000):
+        self._space = space
+        self._max_keys = int(max_keys)
+        self._hashes: Dict[str, int] = {}
+        self.truncated = False
+
+    def observe(self, tokens_l: Sequence[str]) -> None:
+        if len(self._hashes) >= self._max_keys:
+            self.truncated = True
+            return
+        for t in tokens_l:
+            self._add(t)
+        for i in range(len(tokens_l) - 1):
+            self._add(ngram_key(tokens_l[i : i + 2]))
+
+    def _add(self, key: str) -> None:
+        if key not in self._hashes:
+            self._hashes[key] = fnv1a32(key, self._space.seed)
+
+    @staticmethod
+    def _rate(hashes: Iterable[int], buckets: int) -> tuple[int, float]:
+        per_bucket: Dict[int, int] = {}
+        n = 0
+        for h in hashes:
+            b = h % buckets
+            per_bucket[b] = per_bucket.get(b, 0) + 1
+            n += 1
+        colliding = sum(c for c in per_bucket.values() if c > 1)
+        return len(per_bucket), (colliding / n if n else 0.0)
+
+    def report(self, alternatives: Sequence[int] = (32, 64, 128, 256, 512, 1024, 2048, 4096)) -> dict:
+        hashes: List[int] = list(self._hashes.values())
+        used, rate = self._rate(hashes, self._space.buckets)
+        sizes = sorted(set(int(b) for b in alternatives if int(b) > 0) | {self._space.buckets})
+        return {
+            "hashing": self._space.to_json(),
+            "distinct_ngrams": len(hashes),
+            "buckets_used": used,
+            # Share of distinct n-grams that land in a bucket with at least one other n-gram.
+            "collision_rate": rate,
+            "collision_rate_by_buckets": {str(b): self._rate(hashes, b)[1] for b in sizes},
+            "truncated": self.truncated,
+        }
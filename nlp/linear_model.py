@@ -2,9 +2,19 @@ from __future__ import annotations
 
 import json
 import math
+from array import array
+from itertools import chain
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from nlp.feature_space import FeatureSpace, SparseVector
+from nlp.hashing import DEFAULT_HASH_SPACE, HashSpace, is_hashed_feature
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
 
 
 @dataclass(frozen=True)
@@ -30,25 +40,148 @@ def softmax(scores: Dict[str, float]) -> Dict[str, float]:
     return {k: v / z for k, v in exps.items()}
 
 
+Prediction = Tuple[str, float, Dict[str, float]]
+
+
+class WeightMatrix:
+    """
+    Dense feature-major weight matrix (`W[f * C + c]`) plus one bias per column.
+
+    Scoring a sparse vector touches each active feature's row once. NumPy is
+    used when installed; otherwise `array('d')` with a pure-Python sparse dot.
+    """
+
+    def __init__(self, n_features: int, bias: Sequence[float]):
+        self.n_features = int(n_features)
+        self.n_cols = len(bias)
+        self.bias = array("d", bias)
+        self.w = array("d", bytes(8 * self.n_cols * self.n_features))
+        # Feature rows with at least one non-zero weight; the rest are skipped.
+        self.active = bytearray(self.n_features)
+        self._np_w = None
+        self._np_bias = None
+
+    def set(self, f: int, c: int, v: float) -> None:
+        self.w[f * self.n_cols + c] = v
+        if v:
+            self.active[f] = 1
+
+    def freeze(self) -> "WeightMatrix":
+        if np is not None and self.n_cols:
+            self._np_w = np.frombuffer(self.w, dtype=np.float64).reshape(self.n_features, self.n_cols)
+            self._np_bias = np.frombuffer(self.bias, dtype=np.float64)
+        return self
+
+    @staticmethod
+    def stack(parts: Sequence["WeightMatrix"]) -> "WeightMatrix":
+        """Concatenate matrices over the same features column-wise."""
+        n_features = parts[0].n_features if parts else 0
+        if any(p.n_features != n_features for p in parts):
+            raise ValueError("Cannot stack weight matrices over different feature spaces")
+        out = WeightMatrix(n_features, [b for p in parts for b in p.bias])
+        off = 0
+        for p in parts:
+            for f in range(n_features):
+                src = f * p.n_cols
+                dst = f * out.n_cols + off
+                out.w[dst : dst + p.n_cols] = p.w[src : src + p.n_cols]
+                if p.active[f]:
+                    out.active[f] = 1
+            off += p.n_cols
+        return out.freeze()
+
+    def used_features(self, space: FeatureSpace) -> List[str]:
+        return [space.name(f) for f, on in enumerate(self.active) if on]
+
+    def dot(self, vec: SparseVector) -> List[float]:
+        if self._np_w is not None:
+            if not vec.idx:
+                return self._np_bias.tolist()
+            rows = self._np_w[np.asarray(vec.idx, dtype=np.intp)]
+            return (self._np_bias + np.asarray(vec.val, dtype=np.float64) @ rows).tolist()
+        n_cols = self.n_cols
+        w, active = self.w, self.active
+        s = list(self.bias)
+        for f, x in zip(vec.idx, vec.val):
+            if not active[f] or not x:
+                continue
+            base = f * n_cols
+            for c in range(n_cols):
+                s[c] += w[base + c] * x
+        return s
+
+    def dot_batch(self, vecs: Sequence[SparseVector]) -> List[List[float]]:
+        if self._np_w is None or len(vecs) < 2:
+            return [self.dot(v) for v in vecs]
+        # Scatter the batch into a dense (n x F) block and score it with one matmul.
+        n = sum(len(v.idx) for v in vecs)
+        rows = np.repeat(np.arange(len(vecs), dtype=np.intp), [len(v.idx) for v in vecs])
+        cols = np.fromiter(chain.from_iterable(v.idx for v in vecs), dtype=np.intp, count=n)
+        vals = np.fromiter(chain.from_iterable(v.val for v in vecs), dtype=np.float64, count=n)
+        x = np.zeros((len(vecs), self.n_features), dtype=np.float64)
+        x[rows, cols] = vals
+        return (x @ self._np_w + self._np_bias).tolist()
+
+
 class LinearClassifier:
-    def __init__(self, label_weights: Dict[str, LinearWeights]):
+    """
+    Softmax linear model compiled against a `FeatureSpace` into a `WeightMatrix`
+    with one column per label.
+    """
+
+    def __init__(self, label_weights: Dict[str, LinearWeights], hash_space: Optional[HashSpace] = None):
         self._lw = label_weights
+        # `load` drops bucket weights of models without a hashing block, so
+        # the default space only ever scores named features for them.
+        self.hash_space = hash_space or DEFAULT_HASH_SPACE
+        self.space = FeatureSpace(self.hash_space)
+        self.labels: Tuple[str, ...] = tuple(label_weights.keys())
+
+        self.matrix = WeightMatrix(self.space.size, [label_weights[lab].bias for lab in self.labels])
+        for c, lab in enumerate(self.labels):
+            for k, v in label_weights[lab].weights.items():
+                f = self.space.index(k)
+                if f is not None:
+                    self.matrix.set(f, c, v)
+        self.matrix.freeze()
 
     @staticmethod
     def load(path: Path) -> "LinearClassifier":
         data = json.loads(path.read_text(encoding="utf-8"))
         if "labels" not in data:
             raise ValueError(f"{path} missing 'labels'")
+        space = HashSpace.from_json(data.get("hashing"))
         lw: Dict[str, LinearWeights] = {}
         for label, obj in data["labels"].items():
-            lw[label] = LinearWeights(bias=float(obj.get("bias", 0.0)), weights={k: float(v) for k, v in obj["weights"].items()})
-        return LinearClassifier(lw)
+            weights = {k: float(v) for k, v in obj["weights"].items()}
+            if space is None:
+                # Saved without a hashing block: any `ug_*`/`bg_*` weights were
+                # bucketed with the process-salted built-in hash() and match no
+                # bucket in any stable space, so they are dropped.
+                weights = {k: v for k, v in weights.items() if not is_hashed_feature(k)}
+            lw[label] = LinearWeights(bias=float(obj.get("bias", 0.0)), weights=weights)
+        return LinearClassifier(lw, hash_space=space)
+
+    def logits(self, vec: SparseVector) -> List[float]:
+        return self.matrix.dot(vec)
+
+    def predict_vector(self, vec: SparseVector) -> Prediction:
+        return pick(self.labels, self.logits(vec))
+
+    def predict_batch(self, vecs: Sequence[SparseVector]) -> List[Prediction]:
+        return [pick(self.labels, s) for s in self.matrix.dot_batch(vecs)]
+
+    def predict(self, feats: Dict[str, float]) -> Prediction:
+        return self.predict_vector(self.space.vectorize(feats))
+
+    def used_features(self) -> List[str]:
+        """Names of the features with a non-zero weight for some label."""
+        return self.matrix.used_features(self.space)
 
-    def predict(self, feats: Dict[str, float]) -> Tuple[str, float, Dict[str, float]]:
-        scores = {label: w.score(feats) for label, w in self._lw.items()}
-        probs = softmax(scores)
-        if not probs:
-            return "unknown", 0.0, {}
-        label = max(probs, key=probs.get)
-        return label, float(probs[label]), probs
 
+def pick(labels: Sequence[str], logits: Sequence[float]) -> Prediction:
+    probs = softmax(dict(zip(labels, logits)))
+    if not probs:
+        return "unknown", 0.0, {}
+    label = max(probs, key=probs.get)
+    return label, float(probs[label]), probs
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from nlp.feature_space import FeatureSpace, SparseVector
+from nlp.linear_model import LinearClassifier, Prediction, WeightMatrix, pick
+
+
+HEAD_FILES: Dict[str, str] = {
+    "sentiment": "sentiment_weights.json",
+    "intent": "intent_weights.json",
+    "sarcasm": "sarcasm_weights.json",
+    "threat": "threat_weights.json",
+}
+
+
+class MultiHeadClassifier:
+    """
+    Several linear heads over one feature space, stacked into a single weight
+    matrix: one pass over the feature vector yields every head's logits, and
+    each head's slice gets its own softmax.
+    """
+
+    def __init__(self, heads: Mapping[str, LinearClassifier]):
+        spaces = {clf.hash_space for clf in heads.values()}
+        if len(spaces) > 1:
+            raise ValueError(f"Heads disagree on hashing config: {[s.to_json() for s in spaces]}")
+        self.space = next(iter(heads.values())).space if heads else FeatureSpace()
+        self.hash_space = self.space.hashing
+
+        self._slices: List[Tuple[str, Tuple[str, ...], int, int]] = []
+        off = 0
+        for name, clf in heads.items():
+            self._slices.append((name, clf.labels, off, off + len(clf.labels)))
+            off += len(clf.labels)
+        self.matrix = WeightMatrix.stack([clf.matrix for clf in heads.values()])
+
+    @property
+    def heads(self) -> Tuple[str, ...]:
+        return tuple(name for name, _, _, _ in self._slices)
+
+    def used_features(self) -> List[str]:
+        return self.matrix.used_features(self.space)
+
+    @staticmethod
+    def load(models_dir: Path, files: Mapping[str, str] = HEAD_FILES) -> "MultiHeadClassifier":
+        return MultiHeadClassifier({name: LinearClassifier.load(models_dir / fn) for name, fn in files.items()})
+
+    def predict_all(self, vec: SparseVector) -> Dict[str, Prediction]:
+        logits = self.matrix.dot(vec)
+        return {name: pick(labels, logits[lo:hi]) for name, labels, lo, hi in self._slices}
+
+    def predict_all_batch(self, vecs: Sequence[SparseVector]) -> List[Dict[str, Prediction]]:
+        out: List[Dict[str, Prediction]] = []
+        for logits in self.matrix.dot_batch(vecs):
+            out.append({name: pick(labels, logits[lo:hi]) for name, labels, lo, hi in self._slices})
+        return out
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Iterable, List, Tuple
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple, Union
 
 
 @dataclass(frozen=True)
@@ -12,33 +13,178 @@ class NormalizeRule:
 
 
 def parse_rules(lines: Iterable[str]) -> List[NormalizeRule]:
+    """
+    Parse `LEFT => RIGHT` lines. The separator is `" => "` so either side may
+    begin or end with a space (`" + =>  "` collapses runs of spaces); lines
+    written without the surrounding spaces fall back to a stripped split.
+    """
     rules: List[NormalizeRule] = []
     for ln in lines:
-        if "=>" not in ln:
+        ln = ln.rstrip("\r\n")
+        if " => " in ln:
+            left, right = ln.split(" => ", 1)
+        elif "=>" in ln:
+            left, right = ln.split("=>", 1)
+            left = left.strip()
+            right = right.strip()
+        else:
             raise ValueError(f"Invalid normalize rule (missing '=>'): {ln!r}")
-        left, right = ln.split("=>", 1)
-        left = left.strip()
-        right = right.strip()
+        if not left:
+            raise ValueError(f"Invalid normalize rule (empty pattern): {ln!r}")
         rules.append(NormalizeRule(pattern=re.compile(left), repl=right))
     return rules
 
 
+_META = set(".^$*+?{}[]|()")
+_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "f": "\f", "v": "\v", "a": "\a", "0": "\0"}
+_HEX = {"x": 2, "u": 4, "U": 8}
+
+
+def _literal_pattern(src: str) -> Optional[str]:
+    """The string a regex matches if it is a plain literal, else None."""
+    out: List[str] = []
+    i = 0
+    while i < len(src):
+        ch = src[i]
+        if ch in _META:
+            return None
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+        if i + 1 >= len(src):
+            return None
+        nxt = src[i + 1]
+        if nxt in _ESCAPES:
+            out.append(_ESCAPES[nxt])
+            i += 2
+        elif nxt in _HEX:
+            n = _HEX[nxt]
+            digits = src[i + 2 : i + 2 + n]
+            if len(digits) != n or any(c not in "0123456789abcdefABCDEF" for c in digits):
+                return None
+            out.append(chr(int(digits, 16)))
+            i += 2 + n
+        elif not nxt.isalnum():
+            out.append(nxt)
+            i += 2
+        else:
+            return None  # \d, \s, \b, backreferences ...
+    return "".join(out)
+
+
+def _literal_repl(repl: str) -> Optional[str]:
+    if "\\" not in repl:
+        return repl
+    # Only simple escapes; group references keep the rule on the regex path.
+    out: List[str] = []
+    i = 0
+    while i < len(repl):
+        ch = repl[i]
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+        nxt = repl[i + 1 : i + 2]
+        if nxt in ("n", "r", "t", "f", "v", "a"):
+            out.append(_ESCAPES[nxt])
+        elif nxt == "\\":
+            out.append("\\")
+        else:
+            return None
+        i += 2
+    return "".join(out)
+
+
+def _mergeable(group: List[Tuple[str, str]], src: str) -> bool:
+    # Applying the group in one left-to-right pass must give the same result as
+    # applying its rules one after another. Conservative checks against every
+    # earlier rule (old -> rep) for the new literal `src`:
+    for old, rep in group:
+        if old in src:
+            return False  # the earlier rule would have broken up `src`
+        if any(src.endswith(old[:k]) for k in range(1, min(len(old), len(src)))):
+            return False  # a `src` match could start inside an `old` match
+        if not rep or set(rep) & set(src):
+            return False  # earlier output could create new `src` matches
+    return True
+
+
+Step = Union[NormalizeRule, Callable[[str], str]]
+
+
+def _compile_group(group: List[Tuple[str, str]]) -> Callable[[str], str]:
+    table = dict(group)
+    if all(len(src) == 1 for src in table):
+        trans = str.maketrans(table)
+        return lambda s: s.translate(trans)
+    # Longest-first so an earlier, longer literal (e.g. "\r\n") wins over its prefix
+    # ("\r"); single characters go last as one class, which `re` scans fastest.
+    multi = [re.escape(src) for src in sorted(table, key=len, reverse=True) if len(src) > 1]
+    single = "".join(re.escape(src) for src in table if len(src) == 1)
+    alt = re.compile("|".join(multi + ([f"[{single}]"] if single else [])))
+    return lambda s: alt.sub(lambda m: table[m.group(0)], s)
+
+
+def compile_steps(rules: List[NormalizeRule]) -> List[Step]:
+    """
+    Fold runs of consecutive literal rules into single-pass steps (a `str.translate`
+    table when every input is one character, else one literal alternation); regex
+    rules are kept as-is, in order.
+    """
+    steps: List[Step] = []
+    group: List[Tuple[str, str]] = []
+
+    def flush() -> None:
+        if group:
+            steps.append(_compile_group(list(group)))
+            group.clear()
+
+    for rule in rules:
+        src = _literal_pattern(rule.pattern.pattern) if not rule.pattern.flags & ~re.UNICODE else None
+        rep = _literal_repl(rule.repl)
+        if src is None or rep is None or not src:
+            flush()
+            steps.append(rule)
+            continue
+        if not _mergeable(group, src):
+            flush()
+        group.append((src, rep))
+    flush()
+    return steps
+
+
 class Normalizer:
-    def __init__(self, rules: List[NormalizeRule]):
+    """
+    Rule-based normalizer compiled once per locale pack.
+
+    `cache_size > 0` keeps a bounded LRU of recent inputs; retried sends and
+    re-ingested lines then skip the rule passes entirely.
+    """
+
+    def __init__(self, rules: List[NormalizeRule], cache_size: int = 0):
         self._rules = rules
+        self._steps = compile_steps(rules)
+        if cache_size > 0:
+            self.apply = lru_cache(maxsize=int(cache_size))(self._apply)  # type: ignore[method-assign]
 
     @staticmethod
-    def from_rule_lines(lines: Iterable[str]) -> "Normalizer":
-        return Normalizer(parse_rules(lines))
+    def from_rule_lines(lines: Iterable[str], cache_size: int = 0) -> "Normalizer":
+        return Normalizer(parse_rules(lines), cache_size=cache_size)
 
     def apply(self, text: str) -> str:
+        return self._apply(text)
+
+    def _apply(self, text: str) -> str:
         out = text
-        for rule in self._rules:
-            out = rule.pattern.sub(rule.repl, out)
+        for step in self._steps:
+            if isinstance(step, NormalizeRule):
+                out = step.pattern.sub(step.repl, out)
+            else:
+                out = step(out)
         return out.strip()
 
 
 def normalize_basic(text: str) -> Tuple[str, str]:
     s = text.strip()
     return s, s.lower()
-
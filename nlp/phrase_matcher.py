@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+
+class PhraseMatcher:
+    """
+    Aho–Corasick automaton over lowercase phrases grouped into categories.
+
+    One linear scan of the text finds every phrase occurrence; a hit counts only
+    when it is bounded by non-alphanumerics (same rule as `contains_phrase`, but
+    every occurrence is considered, not just the first). With `bounded=False`
+    any substring occurrence counts, like `phrase in text`. Cost per message is
+    independent of how many phrases are loaded.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]], bounded: bool = True):
+        self._bounded = bounded
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._phrases: List[str] = []
+        self._cats: List[Tuple[str, ...]] = []
+        self._categories: Tuple[str, ...] = tuple(groups.keys())
+
+        ids: Dict[str, int] = {}
+        for cat, phrases in groups.items():
+            for raw in phrases:
+                p = raw.lower()
+                if not p:
+                    continue
+                pid = ids.get(p)
+                if pid is None:
+                    pid = len(self._phrases)
+                    ids[p] = pid
+                    self._phrases.append(p)
+                    self._cats.append((cat,))
+                    self._insert(p, pid)
+                elif cat not in self._cats[pid]:
+                    self._cats[pid] = self._cats[pid] + (cat,)
+        self._link()
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        return self._categories
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def _insert(self, phrase: str, pid: int) -> None:
+        node = 0
+        for ch in phrase:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (pid,)
+
+    def _link(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+        q: deque[int] = deque(goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fc = goto[f].get(ch, 0)
+                fail[child] = fc if fc != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+                q.append(child)
+
+    def find(self, text_l: str) -> Set[int]:
+        """Ids of phrases with at least one (word-bounded, unless disabled) occurrence in `text_l`."""
+        goto, fail, out, phrases = self._goto, self._fail, self._out, self._phrases
+        n = len(text_l)
+        hits: Set[int] = set()
+        node = 0
+        for i, ch in enumerate(text_l):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            if not self._bounded:
+                hits.update(out[node])
+                continue
+            after_ok = i + 1 >= n or not text_l[i + 1].isalnum()
+            if not after_ok:
+                continue
+            for pid in out[node]:
+                if pid in hits:
+                    continue
+                start = i - len(phrases[pid]) + 1
+                if start == 0 or not text_l[start - 1].isalnum():
+                    hits.add(pid)
+        return hits
+
+    def matches(self, text_l: str) -> Dict[str, List[str]]:
+        """Distinct matched phrases per category (categories without hits are omitted)."""
+        res: Dict[str, List[str]] = {}
+        for pid in sorted(self.find(text_l)):
+            for cat in self._cats[pid]:
+                res.setdefault(cat, []).append(self._phrases[pid])
+        return res
+
+    def counts(self, text_l: str) -> Dict[str, int]:
+        """Number of distinct matched phrases for every category (zeros included)."""
+        res = {cat: 0 for cat in self._categories}
+        for pid in self.find(text_l):
+            for cat in self._cats[pid]:
+                res[cat] += 1
+        return res
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
 
 from locale_pack.loader import LocalePack
-from nlp.features import extract_features
-from nlp.linear_model import LinearClassifier
+from nlp.features import FeatureBundle, make_bundle, make_bundles
+from nlp.hashing import HashSpace
+from nlp.linear_model import LinearClassifier, Prediction
 
 
 @dataclass(frozen=True)
@@ -20,12 +21,29 @@ class SarcasmModel:
     def __init__(self, clf: LinearClassifier):
         self._clf = clf
 
+    @property
+    def classifier(self) -> LinearClassifier:
+        return self._clf
+
+    @property
+    def hash_space(self) -> HashSpace:
+        return self._clf.hash_space
+
     @staticmethod
     def load(models_dir: Path) -> "SarcasmModel":
         return SarcasmModel(LinearClassifier.load(models_dir / "sarcasm_weights.json"))
 
     def infer(self, locale: LocalePack, text: str) -> SarcasmResult:
-        feats = extract_features(locale, text)
-        label, conf, probs = self._clf.predict(feats)
+        return self.infer_bundle(make_bundle(locale, text, self.hash_space))
+
+    def infer_batch(self, locale: LocalePack, texts: Sequence[str]) -> List[SarcasmResult]:
+        return self.infer_bundles(make_bundles(locale, texts, self.hash_space))
+
+    def infer_bundles(self, bundles: Sequence[FeatureBundle]) -> List[SarcasmResult]:
+        preds = self._clf.predict_batch([b.vec for b in bundles])
+        return [self.infer_bundle(b, p) for b, p in zip(bundles, preds)]
+
+    def infer_bundle(self, bundle: FeatureBundle, pred: Optional[Prediction] = None) -> SarcasmResult:
+        label, conf, probs = pred or self._clf.predict_vector(bundle.vec)
         return SarcasmResult(is_sarcastic=(label == "sarcastic"), confidence=conf, probs=probs)
 
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import List, Sequence, Set, Tuple
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
 
 
 @dataclass(frozen=True)
@@ -14,9 +15,31 @@ def _is_word_char(ch: str) -> bool:
     return ch.isalnum() or ch in {"'", "’", "_"}
 
 
+# Runs of `_is_word_char` characters: for str patterns `\w` is exactly
+# `str.isalnum()` plus "_".
+_WORD_RUN = re.compile(r"[\w'’]+")
+
+
+class _AlphabetFilter(dict):
+    """
+    `str.translate` table that deletes every character outside the alphabet.
+    Entries are filled in on first sight, so steady state is a C-level lookup.
+    """
+
+    def __init__(self, alphabet: Iterable[str]):
+        super().__init__()
+        self._alphabet = frozenset(alphabet)
+
+    def __missing__(self, code: int) -> Optional[int]:
+        keep = code if chr(code) in self._alphabet else None
+        self[code] = keep
+        return keep
+
+
 class Segmenter:
     def __init__(self, alphabet: Set[str]):
         self._alphabet = alphabet
+        self._filter = _AlphabetFilter(alphabet)
 
     def segments(self, text: str) -> List[Segment]:
         segs: List[Segment] = []
@@ -56,15 +79,9 @@ class Segmenter:
         return segs
 
     def tokens(self, text: str) -> List[str]:
-        toks: List[str] = []
-        for s in self.segments(text):
-            if s.kind != "word":
-                continue
-            t = s.text.strip()
-            if not t:
-                continue
-            toks.append(t)
-        return toks
+        # Same result as keeping the "word" runs of `segments()`, without
+        # walking the text in Python or building Segment objects.
+        return _WORD_RUN.findall(text.translate(self._filter))
 
 
 def lower_tokens(tokens: Sequence[str]) -> List[str]:
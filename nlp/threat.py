@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
 
 from locale_pack.loader import LocalePack
-from nlp.features import extract_features
-from nlp.linear_model import LinearClassifier
-from nlp.segmenter import contains_phrase
+from nlp.cues import SAFETY_CONFIDENCE, SAFETY_PHRASES
+from nlp.features import FeatureBundle, make_bundle, make_bundles
+from nlp.hashing import HashSpace
+from nlp.linear_model import LinearClassifier, Prediction
+from nlp.phrase_matcher import PhraseMatcher
 
 
 @dataclass(frozen=True)
@@ -18,30 +20,64 @@ class ThreatResult:
     rule_hit: bool
 
 
+@dataclass(frozen=True)
+class SafetyHit:
+    label: str  # threat|self_harm
+    phrases: List[str]
+    confidence: float
+
+
+_SAFETY = PhraseMatcher(SAFETY_PHRASES)
+
+
+def safety_screen(text_l: str) -> Optional[SafetyHit]:
+    """
+    Rule-only threat/self-harm check on lowercased, normalized text: one
+    automaton pass, no features, models, memory or disk. Self-harm wins over
+    threat, matching `ThreatModel.infer_bundle`.
+    """
+    hits = _SAFETY.matches(text_l)
+    for label in ("self_harm", "threat"):
+        if label in hits:
+            return SafetyHit(label=label, phrases=hits[label], confidence=SAFETY_CONFIDENCE[label])
+    return None
+
+
 class ThreatModel:
     def __init__(self, clf: LinearClassifier):
         self._clf = clf
 
+    @property
+    def classifier(self) -> LinearClassifier:
+        return self._clf
+
+    @property
+    def hash_space(self) -> HashSpace:
+        return self._clf.hash_space
+
     @staticmethod
     def load(models_dir: Path) -> "ThreatModel":
         return ThreatModel(LinearClassifier.load(models_dir / "threat_weights.json"))
 
     def infer(self, locale: LocalePack, text: str) -> ThreatResult:
-        tl = text.lower()
-        rule_self = any(contains_phrase(tl, p) for p in ("kill myself", "end my life", "i want to die", "hurt myself"))
-        rule_threat = any(contains_phrase(tl, p) for p in ("kill you", "hurt you", "shoot", "stab", "attack"))
-        rule_hit = rule_self or rule_threat
+        return self.infer_bundle(make_bundle(locale, text, self.hash_space))
+
+    def infer_batch(self, locale: LocalePack, texts: Sequence[str]) -> List[ThreatResult]:
+        return self.infer_bundles(make_bundles(locale, texts, self.hash_space))
 
-        feats = extract_features(locale, text)
-        label, conf, probs = self._clf.predict(feats)
+    def infer_bundles(self, bundles: Sequence[FeatureBundle]) -> List[ThreatResult]:
+        preds = self._clf.predict_batch([b.vec for b in bundles])
+        return [self.infer_bundle(b, p) for b, p in zip(bundles, preds)]
+
+    def infer_bundle(self, bundle: FeatureBundle, pred: Optional[Prediction] = None) -> ThreatResult:
+        hit = safety_screen(bundle.ctx.text_l)
+
+        label, conf, probs = pred or self._clf.predict_vector(bundle.vec)
 
         # Force label if high-salience rule patterns present.
-        if rule_self:
-            label = "self_harm"
-            conf = max(conf, 0.90)
-        elif rule_threat:
-            label = "threat"
-            conf = max(conf, 0.85)
-
-        return ThreatResult(label=label, confidence=conf, probs=probs, rule_hit=rule_hit)
+        if hit is not None:
+            label = hit.label
+            conf = max(conf, hit.confidence)
+
+        return ThreatResult(label=label, confidence=conf, probs=probs, rule_hit=hit is not None)
 
@@ -14,7 +14,6 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 class JobIntervals:
     resources_sec: int = 10
     artifacts_sec: int = 20
-    updater_sec: int = 60
     compact_min: int = 5
     episode_idle_min: int = 30
     episode_check_sec: int = 60
@@ -110,19 +109,11 @@ def register_jobs(
             )
         _safe(policy, "resources.sample", run)
 
-    def persist_learning() -> None:
-        def run() -> None:
-            if _over_budget_user():
-                return
-            updater.save()
-        _safe(policy, "learning.save", run)
-
     def compact() -> None:
         def run() -> None:
             if _over_budget_user():
                 return
             store.compact()
-            updater.save()
             try:
                 policy._events.publish("scheduler.compact", {"doc_count": store.index.doc_count})
             except Exception:
@@ -137,8 +128,8 @@ def register_jobs(
                 policy.refresh_artifacts()
             # Model hot-reload happens inside inference_state via mtimes; call to ensure cache refresh.
             try:
-                from cognition.inference_state import _get_models  # type: ignore
-                _get_models()
+                from cognition.inference_state import _get_fused  # type: ignore
+                _get_fused()
             except Exception:
                 pass
         guard_refresh.run(lambda: _safe(policy, "artifacts.refresh", run))
@@ -205,15 +196,6 @@ def register_jobs(
         max_instances=1,
         coalesce=True,
     )
-    scheduler.add_job(
-        persist_learning,
-        "interval",
-        seconds=int(iv.updater_sec),
-        id="learning.save",
-        replace_existing=True,
-        max_instances=1,
-        coalesce=True,
-    )
     scheduler.add_job(
         refresh_artifacts,
         "interval",
@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from typing import List
 
 from locale_pack.loader import LocalePack
-from nlp.features import extract_features, make_context
+from nlp.features import FeatureBundle, make_bundle
 
 
 _EMOJI_RE = re.compile(
@@ -13,6 +13,9 @@ _EMOJI_RE = re.compile(
     flags=re.UNICODE,
 )
 
+# Named features read below; the inference feature plan must cover them.
+STYLE_FEATURES = ("emarks", "qmarks", "hedging_hits")
+
 
 @dataclass(frozen=True)
 class StyleSignals:
@@ -24,11 +27,14 @@ class StyleSignals:
 
 
 def extract_style(locale: LocalePack, text: str) -> StyleSignals:
-    ctx = make_context(locale, text)
-    feats = extract_features(locale, text)
-    emojis = len(_EMOJI_RE.findall(text))
+    return style_from_bundle(make_bundle(locale, text))
+
+
+def style_from_bundle(bundle: FeatureBundle) -> StyleSignals:
+    feats = bundle.named
+    emojis = len(_EMOJI_RE.findall(bundle.text))
     return StyleSignals(
-        tokens=len(ctx.tokens_l),
+        tokens=len(bundle.ctx.tokens_l),
         emojis=emojis,
         exclaims=int(feats.get("emarks", 0.0)),
         questions=int(feats.get("qmarks", 0.0)),
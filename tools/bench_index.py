@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+def _project_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+
+def _corpus(root: Path) -> List[str]:
+    lines: List[str] = []
+    for p in sorted((root / "TRAIN").rglob("*.txt")):
+        for ln in p.read_text(encoding="utf-8", errors="ignore").splitlines():
+            ln = ln.strip()
+            if ln and not ln.startswith("#"):
+                lines.append(ln)
+    return lines or ["I'm tired of work and I can't sleep."]
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _traced(fn: Callable[[], object]) -> tuple:
+    tracemalloc.start()
+    obj = fn()
+    cur, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, cur
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare the legacy JSON index with the binary segment format.")
+    ap.add_argument("--docs", type=int, default=100_000, help="Synthetic documents (turns) to index.")
+    ap.add_argument("--queries", type=int, default=2_000)
+    ap.add_argument("--per-week", type=int, default=1_000, help="Documents per weekly segment.")
+    ap.add_argument("--scan-segments", type=int, default=4, help="Scan window (weeks) under load, as the governor's light level.")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    root = _project_root()
+    sys.path.insert(0, str(root))
+    from locale_pack.loader import LocalePack
+    from memory.index import WEEK_S, InvertedIndex, PostingsTable, _term_counts, _terms, partition_path
+    from memory.segment import IndexSegment, convert_json_index, write_segment
+
+    seg = LocalePack.load("en").segmenter
+    lines = _corpus(root)
+    rnd = random.Random(args.seed)
+
+    postings: Dict[str, List[int]] = {}
+    tfs: Dict[str, List[int]] = {}
+    doc_lens: List[int] = []
+    docs: List[str] = []
+    for doc_id in range(1, args.docs + 1):
+        text = rnd.choice(lines)
+        docs.append(text)
+        counts = _term_counts(seg, text)
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append(doc_id)
+            tfs.setdefault(term, []).append(tf)
+        doc_lens.append(sum(counts.values()))
+    doc_freq = {t: len(p) for t, p in postings.items()}
+
+    tmp = Path(tempfile.mkdtemp())
+    src, dst = tmp / "index.json", tmp / "index.bin"
+    src.write_text(json.dumps({"postings": postings, "doc_freq": doc_freq, "doc_count": args.docs}), encoding="utf-8")
+    convert_json_index(src, dst).close()
+
+    def as_table() -> PostingsTable:
+        table = PostingsTable()
+        for t, p in postings.items():
+            for d, tf in zip(p, tfs[t]):
+                table.add(t, d, tf)
+        return table
+
+    _, table_mem = _traced(as_table)
+
+    def load_json() -> dict:
+        return json.loads(src.read_text(encoding="utf-8"))
+
+    data, json_mem = _traced(load_json)
+    segment, seg_mem = _traced(lambda: IndexSegment(dst))
+    terms = list(postings)
+    queries = [rnd.choice(terms) for _ in range(args.queries)]
+
+    mismatches = sum(1 for t in queries if segment.postings(t)[0] != data["postings"][t] or segment.doc_freq(t) != data["doc_freq"][t])
+    if mismatches:
+        print(f"{mismatches} of {len(queries)} lookups differ", file=sys.stderr)
+        return 1
+
+    json_open = _best(load_json, args.repeat)
+    seg_open = _best(lambda: IndexSegment(dst).close(), args.repeat)
+    json_q = _best(lambda: [(data["postings"].get(t, []), data["doc_freq"].get(t, 0)) for t in queries], args.repeat)
+    cold = IndexSegment(dst, cache_terms=0)
+    seg_cold = _best(lambda: [(cold.postings(t), cold.doc_freq(t)) for t in queries], args.repeat)
+    seg_q = _best(lambda: [(segment.postings(t), segment.doc_freq(t)) for t in queries], args.repeat)
+    cold.close()
+    segment.close()
+
+    n_post = sum(len(p) for p in postings.values())
+    print(f"docs={args.docs} terms={len(terms)} postings={n_post} identical=yes")
+    print(f"file size:   json {src.stat().st_size / 1e6:8.2f} MB   binary {dst.stat().st_size / 1e6:8.2f} MB")
+    print(f"open:        json {json_open * 1e3:8.2f} ms   binary {seg_open * 1e3:8.3f} ms")
+    print(f"heap after:  json {json_mem / 1e6:8.2f} MB   binary {seg_mem / 1e6:8.3f} MB")
+    print(f"in memory:   dict/list {json_mem / n_post:6.1f} B/posting   PostingsTable {table_mem / n_post:6.1f} B/posting")
+    print(f"lookup/term: json {json_q / len(queries) * 1e6:8.2f} us   binary {seg_cold / len(queries) * 1e6:8.2f} us (decode)  {seg_q / len(queries) * 1e6:8.2f} us (LRU)")
+
+    # Ranking: the old idf sum over the newest 400 postings per term (on the
+    # flat segment, as it ran) vs. BM25 over weekly segments, without and with
+    # recency decay (early exit), and within the scan window.
+    # Not `index/`: opening that drops the flat `index.bin` next to it.
+    index_dir = tmp / "weeks"
+    index_dir.mkdir()
+    for start in range(1, args.docs + 1, args.per_week):
+        ids = range(start, min(start + args.per_week, args.docs + 1))
+        week_items = []
+        for t, p in postings.items():
+            lo, hi = bisect_left(p, ids[0]), bisect_left(p, ids[-1] + 1)
+            if lo < hi:
+                week_items.append((t, hi - lo, p[lo:hi], tfs[t][lo:hi]))
+        write_segment(
+            partition_path(index_dir, start // args.per_week),
+            week_items,
+            doc_count=len(ids),
+            max_doc_id=ids[-1],
+            min_doc_id=ids[0],
+            doc_lens=doc_lens[ids[0] - 1 : ids[-1]],
+        )
+    texts = [rnd.choice(lines) for _ in range(min(args.queries, 500))]
+    single = IndexSegment(dst)
+    flat = InvertedIndex.open(index_dir, half_life_days=0)
+    decayed = InvertedIndex.open(index_dir)
+    # An upgraded install drops its flat index and rebuilds the weeks from
+    # turns.jsonl, one turn at a time in the week of its timestamp.
+    migrated = InvertedIndex.open(tmp / "index")
+    t0 = time.perf_counter()
+    migrated.add_documents(seg, ((i + 1, text, (i // args.per_week) * WEEK_S) for i, text in enumerate(docs)))
+    rebuild_s = time.perf_counter() - t0
+
+    def sliced(text: str) -> list:
+        scores: Dict[int, float] = {}
+        for term in _terms(seg, text):
+            df = single.doc_freq(term)
+            w = math.log(1.0 + (args.docs - df + 0.5) / (df + 0.5))
+            for doc_id in single.postings(term)[0][-400:]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + w
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:10]
+
+    old_q = _best(lambda: [sliced(q) for q in texts], args.repeat)
+    all_q = _best(lambda: [flat.search(seg, q, limit=10) for q in texts], args.repeat)
+    new_q = _best(lambda: [decayed.search(seg, q, limit=10) for q in texts], args.repeat)
+    cap = args.scan_segments or None
+    cap_all_q = _best(lambda: [flat.search(seg, q, limit=10, max_segments=cap) for q in texts], args.repeat)
+    cap_q = _best(lambda: [decayed.search(seg, q, limit=10, max_segments=cap) for q in texts], args.repeat)
+    one_q = _best(lambda: [migrated.search(seg, q, limit=10) for q in texts], args.repeat)
+    print(f"search/query ({len(flat.partitions)} weekly segments, top 10):")
+    print(f"  newest-400 slice           {old_q / len(texts) * 1e3:8.3f} ms")
+    print(f"  BM25, every week           {all_q / len(texts) * 1e3:8.3f} ms")
+    print(f"  BM25, {decayed.half_life_days:g}-day half-life   {new_q / len(texts) * 1e3:8.3f} ms")
+    print(f"  BM25, newest {args.scan_segments} weeks       {cap_all_q / len(texts) * 1e3:8.3f} ms (no decay)  {cap_q / len(texts) * 1e3:8.3f} ms (decay)")
+    print(f"  BM25, migrated flat index  {one_q / len(texts) * 1e3:8.3f} ms (decay; rebuilt in {rebuild_s:.2f}s)")
+    single.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+
+def _project_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+
+def _corpus(root: Path) -> List[str]:
+    lines: List[str] = []
+    for p in sorted((root / "TRAIN").rglob("*.txt")):
+        for ln in p.read_text(encoding="utf-8", errors="ignore").splitlines():
+            ln = ln.strip()
+            if ln and not ln.startswith("#"):
+                lines.append(ln)
+    return lines or ["I'm fine, really… it’s just work — again!! (and the “deadline”)."]
+
+
+def _messages(lines: List[str], n: int, chars: int, seed: int) -> List[str]:
+    rnd = random.Random(seed)
+    out: List[str] = []
+    for _ in range(n):
+        buf: List[str] = []
+        size = 0
+        while size < chars:
+            ln = rnd.choice(lines)
+            buf.append(ln)
+            size += len(ln) + 1
+        out.append(" ".join(buf)[:chars])
+    return out
+
+
+def _time(fn: Callable[[str], object], msgs: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for m in msgs:
+            fn(m)
+        best = min(best, time.perf_counter() - t0)
+    return best / max(1, len(msgs))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark Segmenter.tokens against the segment-walking path.")
+    ap.add_argument("--locale", default="en")
+    ap.add_argument("--chars", type=int, default=10_000, help="Characters per synthetic message.")
+    ap.add_argument("--messages", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    root = _project_root()
+    sys.path.insert(0, str(root))
+    from locale_pack.loader import LocalePack
+
+    seg = LocalePack.load(args.locale).segmenter
+    msgs = _messages(_corpus(root), args.messages, args.chars, args.seed)
+
+    def segment_walk(text: str) -> List[str]:
+        return [s.text for s in seg.segments(text) if s.kind == "word"]
+
+    mismatches = sum(1 for m in msgs if seg.tokens(m) != segment_walk(m))
+    if mismatches:
+        print(f"{mismatches} of {len(msgs)} messages tokenized differently", file=sys.stderr)
+        return 1
+
+    slow = _time(segment_walk, msgs, args.repeat)
+    fast = _time(seg.tokens, msgs, args.repeat)
+    print(f"messages={len(msgs)} chars={args.chars} identical=yes")
+    print(f"segments(): {slow * 1e3:8.3f} ms/msg")
+    print(f"tokens():   {fast * 1e3:8.3f} ms/msg")
+    print(f"speedup:    {slow / fast if fast else float('inf'):8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
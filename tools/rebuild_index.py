@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+def _project_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Rebuild the weekly retrieval index (index/) from turns.jsonl. Stop the server first.")
+    ap.add_argument("--data-dir", default="./data", help="Directory holding turns.jsonl (SENTIENCEX_DATA_DIR).")
+    ap.add_argument("--locale", default="en", help="Locale whose segmenter tokenizes turns (SENTIENCEX_LOCALE).")
+    args = ap.parse_args()
+
+    sys.path.insert(0, str(_project_root()))
+    from locale_pack.loader import LocalePack
+    from memory.index import InvertedIndex
+    from memory.turn_store import TurnStore
+
+    data_dir = Path(args.data_dir)
+    path = data_dir / "turns.jsonl"
+    if not path.exists():
+        print(f"{path} not found", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    root = data_dir / "index"
+    if root.exists():
+        for pattern in ("w*.bin", "sealed-*.bin", "delta.jsonl", "delta.merging"):
+            for p in root.glob(pattern):
+                p.unlink()
+    seg = LocalePack.load(args.locale).segmenter
+    index = InvertedIndex.open(root)
+    store = TurnStore(path)
+    n = index.add_documents(seg, ((t.turn_id, t.text, t.ts) for t in store.iter()))
+    store.close()
+    print(f"indexed {n} turns into {len(index.partitions)} weekly segments in {root} in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
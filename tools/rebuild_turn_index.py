@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+def _project_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Rebuild the turns.idx offset sidecar from turns.jsonl.")
+    ap.add_argument("--data-dir", default="./data", help="Directory holding turns.jsonl (SENTIENCEX_DATA_DIR).")
+    args = ap.parse_args()
+
+    sys.path.insert(0, str(_project_root()))
+    from memory.turn_store import TurnStore
+
+    path = Path(args.data_dir) / "turns.jsonl"
+    if not path.exists():
+        print(f"{path} not found", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    store = TurnStore(path)
+    n = store.rebuild()
+    store.close()
+    print(f"indexed {n} turns into {store.index_path} in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
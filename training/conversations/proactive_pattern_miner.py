@@ -4,10 +4,9 @@ import json
 from pathlib import Path
 from typing import Dict, List
 
-from cognition.hidden_emotion import infer_hidden_distress
+from cognition.hidden_emotion import hidden_distress_from_bundle
 from locale_pack.loader import LocalePack
-from nlp.features import make_context
-from style.extractor import extract_style
+from nlp.features import make_bundles
 
 
 def _root() -> Path:
@@ -31,17 +30,15 @@ def mine_proactive_patterns(locale: LocalePack, data_dir: Path, conversations: D
         # Track user shortness after distressful user message.
         last_user_distress = 0.0
         last_user_tokens = 0
-        for t in turns:
-            if t.role != "user":
-                continue
-            ctx = make_context(locale, t.text)
-            hidden = infer_hidden_distress(locale, t.text)
+        for bundle in make_bundles(locale, [t.text for t in turns if t.role == "user"]):
+            hidden = hidden_distress_from_bundle(bundle)
+            n_tokens = len(bundle.ctx.tokens_l)
             if last_user_distress >= 0.70:
                 after_total += 1
-                if len(ctx.tokens_l) <= max(5, int(last_user_tokens * 0.6)):
+                if n_tokens <= max(5, int(last_user_tokens * 0.6)):
                     withdraw_after_distress += 1
             last_user_distress = hidden.distress_score
-            last_user_tokens = len(ctx.tokens_l)
+            last_user_tokens = n_tokens
 
         # Topic repetition: crude measure using distress topics lexicon.
         seen = set()
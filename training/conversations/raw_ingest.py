@@ -92,7 +92,7 @@ def _parse_jsonl(normalizer: Normalizer, text: str) -> List[ConvTurn]:
 
 def ingest_raw_conversations(locale: LocalePack, train_dir: Path) -> Dict[str, object]:
     folder = train_dir / "raw_conversations"
-    normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
+    normalizer = locale.normalizer
 
     convs: List[Conversation] = []
     for p in _walk(folder):
@@ -6,7 +6,6 @@ from pathlib import Path
 from typing import Iterable, Iterator, Optional, Tuple
 
 from locale_pack.loader import LocalePack
-from nlp.normalizer import Normalizer
 from nlp.sentence_splitter import SentenceSplitter
 from training.state import TrainingState
 
@@ -21,7 +20,7 @@ class LoadedLine:
 class StreamLoader:
     def __init__(self, locale: LocalePack):
         self._locale = locale
-        self._normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
+        self._normalizer = locale.normalizer
         self._splitter = SentenceSplitter(locale.abbreviations)
 
     def iter_lines_incremental(self, path: Path, state: TrainingState) -> Iterator[LoadedLine]:
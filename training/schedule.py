@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 
 from locale_pack.loader import LocalePack
+from nlp.hashing import HashSpace
 from training.state import TrainingState
 
 from training.supervised.intent_trainer import train_intent
@@ -27,6 +28,8 @@ from training.weak_labels.weak_supervision import build_weak_label_sets
 class TrainingConfig:
     train_dir: Path
     data_dir: Path
+    hash_buckets: int = 64
+    hash_seed: int = 0
 
 
 class TrainingRunner:
@@ -55,10 +58,11 @@ class TrainingRunner:
             self._state.mark_run("weak_labels")
 
         if "supervised" in want:
-            out["supervised_intent"] = train_intent(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full)
-            out["supervised_sentiment"] = train_sentiment(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full)
-            out["supervised_sarcasm"] = train_sarcasm(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full)
-            out["supervised_threat"] = train_threat(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full)
+            space = HashSpace(buckets=int(self._cfg.hash_buckets), seed=int(self._cfg.hash_seed))
+            out["supervised_intent"] = train_intent(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full, hash_space=space)
+            out["supervised_sentiment"] = train_sentiment(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full, hash_space=space)
+            out["supervised_sarcasm"] = train_sarcasm(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full, hash_space=space)
+            out["supervised_threat"] = train_threat(locale=self._locale, train_dir=self._cfg.train_dir, data_dir=self._cfg.data_dir, state=self._state, force_full=force_full, hash_space=space)
             self._state.mark_run("supervised")
 
         if "stories" in want:
@@ -6,7 +6,6 @@ from pathlib import Path
 from typing import Dict, List
 
 from locale_pack.loader import LocalePack
-from nlp.normalizer import Normalizer
 from training.skills.action_extractor import extract_actions
 
 
@@ -16,7 +15,7 @@ def _root() -> Path:
 
 def ingest_skills(locale: LocalePack, train_dir: Path) -> Dict[str, object]:
     folder = train_dir / "skills"
-    normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
+    normalizer = locale.normalizer
     out_dir = _root() / "knowledge" / "actions"
     out_dir.mkdir(parents=True, exist_ok=True)
 
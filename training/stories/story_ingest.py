@@ -6,14 +6,14 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, Iterator, List, Tuple
 
-from cognition.hidden_emotion import infer_hidden_distress
-from cognition.masking_detector import detect_masking
+from cognition.hidden_emotion import hidden_distress_from_bundle
+from cognition.masking_detector import masking_from_bundle
 from locale_pack.loader import LocalePack
+from nlp.features import make_bundles
 from nlp.intent import IntentModel
 from nlp.sarcasm import SarcasmModel
 from nlp.sentiment import SentimentModel
 from nlp.threat import ThreatModel
-from nlp.normalizer import Normalizer
 from nlp.sentence_splitter import SentenceSplitter
 
 
@@ -51,7 +51,7 @@ def _state(sentiment: str, distress: float, masking: float) -> str:
 
 
 def ingest_stories(locale: LocalePack, folder: Path) -> Iterator[Tuple[Path, List[str]]]:
-    normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
+    normalizer = locale.normalizer
     splitter = SentenceSplitter(locale.abbreviations)
 
     for p in _walk_txt(folder):
@@ -84,11 +84,11 @@ def run_story_mining(locale: LocalePack, train_dir: Path) -> Dict[str, object]:
         doc_count += 1
         seq: List[StorySentence] = []
         prev_was_distress = False
-        for s in sents:
+        bundles = make_bundles(locale, sents, sentiment_m.hash_space)
+        for s, bundle, sr in zip(sents, bundles, sentiment_m.infer_bundles(bundles)):
             sent_count += 1
-            sr = sentiment_m.infer(locale, s)
-            hidden = infer_hidden_distress(locale, s)
-            masking = detect_masking(locale, s)
+            hidden = hidden_distress_from_bundle(bundle)
+            masking = masking_from_bundle(bundle)
             seq.append(StorySentence(text=s, sentiment=sr.label, distress=hidden.distress_score, masking=masking.confidence))
 
             if masking.is_masking:
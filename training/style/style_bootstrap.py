@@ -5,7 +5,6 @@ from pathlib import Path
 from typing import Dict
 
 from locale_pack.loader import LocalePack
-from nlp.normalizer import Normalizer
 from style.extractor import extract_style
 from style.profile import StyleProfile, save_style
 
@@ -16,7 +15,7 @@ def bootstrap_style(locale: LocalePack, train_dir: Path, data_dir: Path) -> Dict
     if not p.exists():
         return {"bootstrapped": False, "reason": "TRAIN/style_samples/user.txt not found"}
 
-    normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
+    normalizer = locale.normalizer
     txt = normalizer.apply(p.read_text(encoding="utf-8", errors="ignore"))
     lines = [ln.strip() for ln in txt.splitlines() if ln.strip()]
     if not lines:
@@ -5,7 +5,9 @@ import math
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from nlp.hashing import DEFAULT_HASH_SPACE, HashSpace, is_hashed_feature
 
 
 def _clip(x: float, lo: float, hi: float) -> float:
@@ -26,6 +28,7 @@ class SoftmaxWeights:
     labels: List[str]
     bias: Dict[str, float]
     weights: Dict[str, Dict[str, float]]  # label -> feature -> weight
+    hashing: HashSpace = DEFAULT_HASH_SPACE
 
     @staticmethod
     def from_model_json(obj: dict) -> "SoftmaxWeights":
@@ -36,10 +39,14 @@ class SoftmaxWeights:
             lobj = obj["labels"][lab]
             bias[lab] = float(lobj.get("bias", 0.0))
             weights[lab] = {k: float(v) for k, v in lobj.get("weights", {}).items()}
-        return SoftmaxWeights(labels=labels, bias=bias, weights=weights)
+        hashing = HashSpace.from_json(obj.get("hashing")) or DEFAULT_HASH_SPACE
+        return SoftmaxWeights(labels=labels, bias=bias, weights=weights, hashing=hashing)
 
     def to_model_json(self) -> dict:
-        return {"labels": {lab: {"bias": self.bias.get(lab, 0.0), "weights": self.weights.get(lab, {})} for lab in self.labels}}
+        return {
+            "hashing": self.hashing.to_json(),
+            "labels": {lab: {"bias": self.bias.get(lab, 0.0), "weights": self.weights.get(lab, {})} for lab in self.labels},
+        }
 
     def score(self, feats: Dict[str, float]) -> Dict[str, float]:
         scores: Dict[str, float] = {}
@@ -123,10 +130,25 @@ class SoftmaxSGD:
                 wlab.pop(k, None)
 
 
-def load_or_init(path: Path, labels: List[str]) -> SoftmaxWeights:
+def load_or_init(path: Path, labels: List[str], space: Optional[HashSpace] = None) -> Tuple[SoftmaxWeights, bool]:
+    """
+    Load weights for continued training in `space` (default: the stored space).
+
+    Returns `(weights, rehashed)`. When the stored model was hashed differently
+    (or predates the `hashing` block) its `ug_*`/`bg_*` weights are meaningless
+    in the new space and are dropped; named features are kept.
+    """
     if path.exists():
         obj = json.loads(path.read_text(encoding="utf-8"))
         w = SoftmaxWeights.from_model_json(obj)
+        rehashed = False
+        stored = HashSpace.from_json(obj.get("hashing"))
+        target = space or stored or DEFAULT_HASH_SPACE
+        if stored != target:
+            for lab in list(w.weights.keys()):
+                w.weights[lab] = {k: v for k, v in w.weights[lab].items() if not is_hashed_feature(k)}
+            w.hashing = target
+            rehashed = True
         # Ensure label set stable; add missing with zero weights.
         for lab in labels:
             if lab not in w.labels:
@@ -134,8 +156,9 @@ def load_or_init(path: Path, labels: List[str]) -> SoftmaxWeights:
                 w.bias[lab] = 0.0
                 w.weights[lab] = {}
         w.labels = sorted(set(w.labels))
-        return w
-    return SoftmaxWeights(labels=sorted(labels), bias={lab: 0.0 for lab in labels}, weights={lab: {} for lab in labels})
+        return w, rehashed
+    w = SoftmaxWeights(labels=sorted(labels), bias={lab: 0.0 for lab in labels}, weights={lab: {} for lab in labels}, hashing=space or DEFAULT_HASH_SPACE)
+    return w, False
 
 
 def save_model(path: Path, w: SoftmaxWeights) -> None:
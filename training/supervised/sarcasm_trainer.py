@@ -2,36 +2,52 @@ from __future__ import annotations
 
 import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 from locale_pack.loader import LocalePack
-from nlp.features import extract_features
+from nlp.features import make_bundle
+from nlp.hashing import CollisionTracker, HashSpace
 from training.state import TrainingState
 from training.supervised.dataset import labels_in_folder, stream_samples
 from training.supervised.linear_sgd import SGDConfig, SoftmaxSGD, load_or_init, save_model
 
 
-def train_sarcasm(locale: LocalePack, train_dir: Path, data_dir: Path, state: TrainingState, force_full: bool = False) -> Dict[str, object]:
+def train_sarcasm(locale: LocalePack, train_dir: Path, data_dir: Path, state: TrainingState, force_full: bool = False, hash_space: Optional[HashSpace] = None) -> Dict[str, object]:
     t0 = time.time()
     folder = train_dir / "sarcasm"
     weak = data_dir / "weak_labels" / "sarcasm"
     labels = labels_in_folder(folder) or ["sarcastic", "not_sarcastic"]
     model_path = Path(__file__).resolve().parents[2] / "models" / "sarcasm_weights.json"
 
-    w = load_or_init(model_path, labels=labels)
+    w, rehashed = load_or_init(model_path, labels=labels, space=hash_space)
     sgd = SoftmaxSGD(w, SGDConfig(lr0=0.20, l2=1e-4))
+    tracker = CollisionTracker(w.hashing)
 
+    # Bucket weights were dropped with the old hash space; relearn them from every sample.
+    full = force_full or rehashed
     seen = 0
-    for samp in stream_samples(locale, folder, state, force_full=force_full):
-        feats = extract_features(locale, samp.text)
-        sgd.update(feats, gold=samp.label, weight=1.0)
+    for samp in stream_samples(locale, folder, state, force_full=full):
+        bundle = make_bundle(locale, samp.text, w.hashing)
+        tracker.observe(bundle.ctx.tokens_l)
+        sgd.update(bundle.feats, gold=samp.label, weight=1.0)
         seen += 1
-    for samp in stream_samples(locale, weak, state, force_full=force_full):
-        feats = extract_features(locale, samp.text)
-        sgd.update(feats, gold=samp.label, weight=0.45)
+    for samp in stream_samples(locale, weak, state, force_full=full):
+        bundle = make_bundle(locale, samp.text, w.hashing)
+        tracker.observe(bundle.ctx.tokens_l)
+        sgd.update(bundle.feats, gold=samp.label, weight=0.45)
         seen += 1
 
-    if seen > 0:
+    saved = seen > 0 or rehashed
+    if saved:
         save_model(model_path, sgd.w)
-    return {"samples": seen, "labels": labels, "steps": sgd.steps, "saved": bool(seen > 0), "seconds": time.time() - t0}
+    return {
+        "samples": seen,
+        "labels": labels,
+        "steps": sgd.steps,
+        "saved": saved,
+        "rehashed": rehashed,
+        "full_pass": full,
+        "hashing": tracker.report(),
+        "seconds": time.time() - t0,
+    }
 
@@ -7,7 +7,6 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 
 from locale_pack.loader import LocalePack
-from nlp.normalizer import Normalizer
 
 
 def _root() -> Path:
@@ -35,7 +34,7 @@ def _parse_header(line: str) -> Tuple[str, str]:
 
 def ingest_topics(locale: LocalePack, train_dir: Path) -> Dict[str, object]:
     folder = train_dir / "topics"
-    normalizer = Normalizer.from_rule_lines(locale.normalize_rules)
+    normalizer = locale.normalizer
 
     ingests: List[TopicIngest] = []
     if folder.exists():